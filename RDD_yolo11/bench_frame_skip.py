@@ -0,0 +1,91 @@
+"""自适应跳帧基准测试
+
+逐帧推理（vid_max_skip=0）的跟踪结果作为参照，比较不同 vid_max_skip / vid_skip_thresh
+下的推理帧比例、吞吐量和召回率。召回率为参照结果中每帧的每个检测框在跳帧结果同一帧中
+找到同类别、IoU >= 0.5 的框的比例，跳过的帧使用跟踪器外推的位置。
+
+用法: python bench_frame_skip.py --source dashcam.mp4 --weights best.pt --max-skips 2 4 8 --thresholds 1 2 4
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+import yolov11_predict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def box_iou(a, b):
+    """(N, 4) 与 (M, 4) 的 xyxy 框两两之间的IoU"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def run(model, source, imgsz, conf, max_skip, skip_thresh):
+    """返回 (每帧的跟踪结果, 耗时, 推理帧数, 轨迹数)，跟踪结果每行为 x1, y1, x2, y2, 轨迹ID, 置信度, 类别, 序号"""
+    tracker = yolov11_predict.make_tracker(30, conf)
+    frames, keyframes, track_ids = [], 0, set()
+    start = time.perf_counter()
+    for r in model.predict(source, stream=True, imgsz=imgsz, conf=conf, vid_max_skip=max_skip,
+                           vid_skip_thresh=skip_thresh, verbose=False):
+        keyframe = all(model.predictor.keyframes)
+        keyframes += keyframe
+        boxes = r.boxes.cpu().numpy()
+        if not keyframe:
+            tracked = tracker.propagate()
+        elif len(boxes):
+            tracked = tracker.update(boxes, r.orig_img)
+        else:
+            tracked = np.zeros((0, 8), dtype=np.float32)
+        frames.append(tracked.reshape(-1, 8))
+        track_ids.update(int(t) for t in tracked.reshape(-1, 8)[:, 4])
+    return frames, time.perf_counter() - start, keyframes, len(track_ids)
+
+
+def recall(reference, frames, iou_thresh=0.5):
+    matched = total = 0
+    for ref, out in zip(reference, frames):
+        total += len(ref)
+        if not len(ref) or not len(out):
+            continue
+        iou = box_iou(ref[:, :4], out[:, :4])
+        iou[ref[:, 6][:, None] != out[:, 6][None, :]] = 0
+        matched += int((iou.max(axis=1) >= iou_thresh).sum())
+    return matched / total if total else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自适应跳帧基准测试')
+    parser.add_argument('--source', required=True, help='video file')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--max-skips', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[1.0, 2.0, 4.0],
+                        help='vid_skip_thresh values, mean absolute difference of 64px grayscale thumbnails')
+    args = parser.parse_args()
+
+    yolov11_predict.load_ultralytics()
+    model = yolov11_predict.load_model(args.weights)
+    run(model, args.source, args.imgsz, args.conf, 0, 0)  # 预热模型和视频解码
+
+    reference, elapsed, _, tracks = run(model, args.source, args.imgsz, args.conf, 0, 0)
+    baseline = len(reference) / elapsed
+    print(f"逐帧推理       推理帧 {len(reference):4d}/{len(reference)} | {baseline:6.2f} fps (1.00x) | "
+          f"检测框 {sum(len(f) for f in reference)} 轨迹 {tracks}")
+    for max_skip in args.max_skips:
+        for skip_thresh in args.thresholds:
+            frames, elapsed, keyframes, tracks = run(model, args.source, args.imgsz, args.conf, max_skip, skip_thresh)
+            fps = len(frames) / elapsed
+            print(f"skip={max_skip:<2} thr={skip_thresh:<4g} 推理帧 {keyframes:4d}/{len(frames)} | "
+                  f"{fps:6.2f} fps ({fps / baseline:4.2f}x) | 召回率 {recall(reference, frames):.3f} 轨迹 {tracks}")
+
+
+if __name__ == '__main__':
+    main()
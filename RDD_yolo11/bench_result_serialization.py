@@ -0,0 +1,89 @@
+"""检测结果序列化基准测试
+
+比较把一张图片的 Results 转为脚本输出JSON结构的耗时：
+  逐框      原 result_to_dict 的写法，for box in r.boxes 每个框切片后 int(box.cls[0]) / float(box.conf[0])
+  按列      Boxes.columns 一次转为NumPy后按列 tolist()，再组装成相同的检测列表
+同时比较 Results.to_json() 与列式 Results.to_json(columns=True) 的耗时和输出大小。
+检测框为随机生成，数量由 --counts 指定，并校验两种写法的输出完全一致。
+
+用法: python bench_result_serialization.py --counts 50 200 500 1000
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+import yolov11_predict
+
+NAMES = {0: 'longitudinal_crack', 1: 'transverse_crack', 2: 'alligator_crack', 3: 'pothole'}
+
+
+def make_result(count, seed=0):
+    """生成带 count 个随机检测框的 1920x1080 图片检测结果"""
+    import torch
+    from ultralytics.engine.results import Results
+    generator = torch.Generator().manual_seed(seed)
+    xy = torch.rand((count, 2), generator=generator) * torch.tensor([1800.0, 1000.0])
+    wh = torch.rand((count, 2), generator=generator) * 100 + 10
+    conf = torch.rand((count, 1), generator=generator)
+    cls = torch.randint(0, len(NAMES), (count, 1), generator=generator).float()
+    boxes = torch.cat((xy, xy + wh, conf, cls), dim=1)
+    return Results(np.zeros((1080, 1920, 3), dtype=np.uint8), path='bench.jpg', names=NAMES, boxes=boxes)
+
+
+def per_box(r):
+    """原 result_to_dict 的逐框转换"""
+    detections = []
+    for box in r.boxes:
+        class_id = int(box.cls[0])
+        detections.append({
+            'name': r.names[class_id],
+            'confidence': float(box.conf[0]),
+            'box': [float(coord) for coord in box.xyxy[0]]
+        })
+    return detections
+
+
+def columnar(r):
+    """与 yolov11_predict.result_to_dict 相同的按列转换"""
+    columns = r.boxes.columns(r.names)
+    return [{'name': name, 'confidence': confidence, 'box': box} for name, confidence, box
+            in zip(columns['names'], columns['confidences'], columns['boxes'])]
+
+
+def timeit(fn, r, repeat):
+    """返回多次调用耗时的中位数ms"""
+    fn(r)  # 预热
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(r)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检测结果序列化基准测试')
+    parser.add_argument('--counts', type=int, nargs='+', default=[50, 200, 500, 1000], help='detections per image')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if not yolov11_predict.load_ultralytics():
+        parser.error('需要安装ultralytics')
+    for count in args.counts:
+        r = make_result(count)
+        if json.dumps(per_box(r)) != json.dumps(columnar(r)):
+            raise AssertionError(f'{count} 个检测框时按列转换的输出与逐框转换不一致')
+        old, new = timeit(per_box, r, args.repeat), timeit(columnar, r, args.repeat)
+        summary_json = timeit(lambda x: x.to_json(), r, args.repeat)
+        columns_json = timeit(lambda x: x.to_json(columns=True), r, args.repeat)
+        size, columns_size = len(r.to_json()), len(r.to_json(columns=True))
+        print(f"{count:5d} 个框 | 逐框 {old:8.2f} ms 按列 {new:6.2f} ms ({old / new:5.1f}x) | "
+              f"to_json {summary_json:8.2f} ms {size / 1024:6.1f} KB -> columns {columns_json:6.2f} ms "
+              f"{columns_size / 1024:6.1f} KB ({summary_json / columns_json:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
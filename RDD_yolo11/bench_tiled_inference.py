@@ -0,0 +1,113 @@
+"""大图分块推理基准测试
+
+在带YOLO格式标注的高分辨率图片上比较召回率和耗时：
+  整图     整张图片letterbox到 imgsz（可用 --full-sizes 指定多个尺寸）推理
+  分块     切成重叠的 tile x tile 小块，每 --tile-batch 块一次前向推理，类别感知NMS合并，
+           coarse 表示再加一次整图推理以检出比小块还大的病害
+召回率为标注框中能找到同类别、IoU >= --iou-thresh 的检测框的比例；小目标召回率只统计
+长边小于图片长边 --small 倍的标注框（细裂缝）。标注文件按YOLO数据集的约定放在与 images
+同级的 labels 目录。
+
+用法: python bench_tiled_inference.py --source datasets/road4k/images --weights best.pt --tiles 640 1024
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+import yolov11_predict
+from yolo_export import IMAGE_SUFFIXES, box_iou
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_labels(image_path, shape):
+    """读取图片对应的YOLO标注，返回 (类别数组, xyxy像素坐标数组)"""
+    directory, name = os.path.split(image_path)
+    label_path = os.path.join(os.path.dirname(directory), 'labels', os.path.splitext(name)[0] + '.txt')
+    rows = np.loadtxt(label_path, ndmin=2) if os.path.exists(label_path) else np.zeros((0, 5))
+    h, w = shape
+    xywh = rows[:, 1:5] * [w, h, w, h]
+    xyxy = np.concatenate((xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2), axis=1)
+    return rows[:, 0].astype(int), xyxy
+
+
+def match(labels, result, iou_thresh):
+    """返回每个标注框是否被检出的布尔数组，以及未匹配任何标注的检测框数"""
+    classes, boxes = labels
+    pred = result.boxes.cpu().numpy()
+    found = np.zeros(len(boxes), dtype=bool)
+    if not len(boxes) or not len(pred):
+        return found, len(pred)
+    iou = box_iou(boxes, pred.xyxy)
+    iou[classes[:, None] != pred.cls[None, :].astype(int)] = 0
+    found = iou.max(axis=1) >= iou_thresh
+    return found, int((iou.max(axis=0) < iou_thresh).sum())
+
+
+def run(model, images, labels, options, iou_thresh, small):
+    """返回 (每张图片耗时中位数ms, 召回率, 小目标召回率, 精确率)"""
+    model.predict(images[0], verbose=False, **options)  # 预热
+    times, found, is_small, false_positives = [], [], [], 0
+    for image, (classes, boxes) in zip(images, labels):
+        start = time.perf_counter()
+        result = model.predict(image, verbose=False, **options)[0]
+        times.append((time.perf_counter() - start) * 1000)
+        hit, fp = match((classes, boxes), result, iou_thresh)
+        found.append(hit)
+        is_small.append((boxes[:, 2:] - boxes[:, :2]).max(axis=1) < small * max(result.orig_shape))
+        false_positives += fp
+    found, is_small = np.concatenate(found), np.concatenate(is_small)
+    detected = int(found.sum()) + false_positives
+    return (statistics.median(times), found.mean() if len(found) else float('nan'),
+            found[is_small].mean() if is_small.any() else float('nan'),
+            found.sum() / detected if detected else float('nan'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='大图分块推理基准测试')
+    parser.add_argument('--source', required=True, help='directory of high-resolution images with YOLO labels')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--imgsz', type=int, default=640, help='network input size of slices and the coarse pass')
+    parser.add_argument('--full-sizes', type=int, nargs='+', help='imgsz values of whole-image inference, default imgsz')
+    parser.add_argument('--tiles', type=int, nargs='+', default=[640], help='slice sizes in original image pixels')
+    parser.add_argument('--overlap', type=float, default=0.2)
+    parser.add_argument('--tile-batch', type=int, default=8)
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--iou-thresh', type=float, default=0.3, help='IoU for a label to count as detected')
+    parser.add_argument('--small', type=float, default=0.06,
+                        help='labels whose longest side is below this fraction of the image are small objects')
+    args = parser.parse_args()
+
+    images = sorted(os.path.join(args.source, name) for name in os.listdir(args.source)
+                    if os.path.splitext(name)[1].lower() in IMAGE_SUFFIXES)
+    if not images:
+        parser.error(f'{args.source} 中没有图片')
+    yolov11_predict.load_ultralytics()
+    model = yolov11_predict.load_model(args.weights)
+    labels = []
+    for image in images:
+        with Image.open(image) as im:
+            labels.append(load_labels(image, im.size[::-1]))
+    print(f"{len(images)} 张图片, {sum(len(c) for c, _ in labels)} 个标注框")
+
+    modes = [(f"整图 imgsz={size}", {'imgsz': size}) for size in args.full_sizes or [args.imgsz]]
+    for tile in args.tiles:
+        for coarse in (False, True):
+            modes.append((f"分块 tile={tile}{' +coarse' if coarse else ''}",
+                          {'imgsz': args.imgsz, 'tile': tile, 'tile_overlap': args.overlap,
+                           'tile_batch': args.tile_batch, 'tile_coarse': coarse}))
+    baseline = None
+    for label, options in modes:
+        latency, recall, small_recall, precision = run(model, images, labels, dict(options, conf=args.conf),
+                                                       args.iou_thresh, args.small)
+        baseline = baseline or latency
+        print(f"{label:<24} {latency:8.0f} ms/张 ({latency / baseline:5.2f}x) | 召回率 {recall:.3f} "
+              f"小目标召回率 {small_recall:.3f} | 精确率 {precision:.3f}")
+
+
+if __name__ == '__main__':
+    main()
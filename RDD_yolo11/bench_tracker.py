@@ -0,0 +1,144 @@
+"""多目标跟踪器基准测试
+
+生成 --tracks 个同时存在的目标（车辆）在画面中匀速运动的合成检测序列：每帧约1%的目标
+出现或消失、10%漏检，检测框带位置噪声，置信度在 0.05~1 之间均匀分布（覆盖BYTETracker的
+高/低分两轮关联），再用 BYTETracker 和 BOTSORT 逐帧 update，统计每帧耗时和输出的轨迹数。
+每种配置重复 --repeat 次取最快的一次，减少其他进程的干扰。
+
+跟踪器之前先对同样数量的目标比较卡尔曼滤波逐个 update 与批量 multi_update 的耗时，并检查两者的
+结果一致（np.allclose），不一致时退出码为1。
+
+用法: python bench_tracker.py --tracks 50 200 1000 --frames 60
+"""
+import argparse
+import time
+
+import numpy as np
+
+import yolov11_predict
+
+
+class Detections:
+    """与 track.py 传给跟踪器的 Boxes.cpu().numpy() 相同的 conf / xywh / cls 接口"""
+
+    def __init__(self, xywh, conf, cls):
+        self.xywh, self.conf, self.cls = xywh, conf, cls
+
+    def __len__(self):
+        return len(self.conf)
+
+
+def make_sequence(tracks, frames, seed=0, size=4000):
+    """生成 frames 帧、tracks 个目标的合成检测序列"""
+    rng = np.random.default_rng(seed)
+    position = rng.uniform(0, size, (tracks, 2))
+    velocity = rng.normal(0, 3, (tracks, 2))
+    wh = rng.uniform(20, 80, (tracks, 2))
+    alive = np.ones(tracks, dtype=bool)
+    sequence = []
+    for _ in range(frames):
+        position += velocity
+        alive = (alive | (rng.random(tracks) < 0.01)) & (rng.random(tracks) >= 0.01)
+        seen = alive & (rng.random(tracks) > 0.1)
+        n = int(seen.sum())
+        xywh = np.concatenate((position[seen] + rng.normal(0, 1.5, (n, 2)),
+                               wh[seen] * rng.uniform(0.95, 1.05, (n, 2))), axis=1)
+        order = rng.permutation(n)
+        sequence.append(Detections(xywh[order].astype(np.float32), rng.uniform(0.05, 1.0, n).astype(np.float32)[order],
+                                   rng.integers(0, 4, n).astype(np.float32)))
+    return sequence
+
+
+def kf_measurements(kf, xywh):
+    """xywh 转为卡尔曼滤波的观测格式，KalmanFilterXYAH 为 xyah"""
+    from ultralytics.trackers.utils.kalman_filter import KalmanFilterXYWH
+    if isinstance(kf, KalmanFilterXYWH):
+        return xywh
+    xyah = xywh.copy()
+    xyah[:, 2] /= xyah[:, 3]
+    return xyah
+
+
+def kalman_states(kf, tracks, rng):
+    """生成 tracks 个预测过一帧的卡尔曼状态和对应的观测，与跟踪器中匹配后的状态相同"""
+    xywh = np.concatenate((rng.uniform(0, 4000, (tracks, 2)), rng.uniform(20, 80, (tracks, 2))), axis=1)
+    measurements = kf_measurements(kf, xywh.astype(np.float32))
+    states = [kf.predict(*kf.initiate(m)) for m in measurements]
+    noise = rng.normal(0, 1.5, measurements.shape) * [1, 1, 0, 1]  # 第3维（宽高比或宽度）不加噪声
+    return states, (measurements + noise).astype(np.float32)
+
+
+def bench_kalman(tracks, repeat):
+    """返回 [(滤波器名, 逐个update耗时ms, multi_update耗时ms, 最大误差, 是否一致)]"""
+    from ultralytics.trackers.utils.kalman_filter import KalmanFilterXYAH, KalmanFilterXYWH
+    report = []
+    for kf in (KalmanFilterXYAH(), KalmanFilterXYWH()):
+        states, measurements = kalman_states(kf, tracks, np.random.default_rng(tracks))
+        mean = np.asarray([m for m, _ in states])
+        covariance = np.asarray([c for _, c in states])
+        loop, batch = float('inf'), float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            expected = [kf.update(m, c, z) for (m, c), z in zip(states, measurements)]
+            loop = min(loop, time.perf_counter() - start)
+            start = time.perf_counter()
+            result = kf.multi_update(mean, covariance, measurements)
+            batch = min(batch, time.perf_counter() - start)
+        expected = np.asarray([m for m, _ in expected]), np.asarray([c for _, c in expected])
+        error = max(np.abs(r - e).max() for r, e in zip(result, expected))
+        close = all(np.allclose(r, e) for r, e in zip(result, expected))
+        report.append((type(kf).__name__, loop * 1000, batch * 1000, error, close))
+    return report
+
+
+def make_tracker(tracker_type):
+    from ultralytics.trackers.bot_sort import BOTSORT
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace, yaml_load
+    from ultralytics.utils.checks import check_yaml
+    cfg = IterableSimpleNamespace(**yaml_load(check_yaml(f'{tracker_type}.yaml')))
+    if tracker_type == 'botsort':
+        cfg.gmc_method = None  # 合成序列没有画面，不做相机运动补偿
+        return BOTSORT(cfg, frame_rate=30)
+    return BYTETracker(cfg, frame_rate=30)
+
+
+def run(tracker_type, sequence):
+    """返回 (每帧耗时ms, 平均每帧输出的轨迹数)"""
+    tracker = make_tracker(tracker_type)
+    outputs = 0
+    start = time.perf_counter()
+    for detections in sequence:
+        outputs += len(tracker.update(detections))
+    return (time.perf_counter() - start) / len(sequence) * 1000, outputs / len(sequence)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多目标跟踪器基准测试')
+    parser.add_argument('--tracks', type=int, nargs='+', default=[50, 200, 1000], help='concurrent objects')
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--trackers', nargs='+', choices=['bytetrack', 'botsort'], default=['bytetrack', 'botsort'])
+    args = parser.parse_args()
+
+    if not yolov11_predict.load_ultralytics():
+        parser.error('需要安装ultralytics')
+    consistent = True
+    for tracks in args.tracks:
+        for name, loop, batch, error, close in bench_kalman(tracks, args.repeat):
+            consistent &= close
+            print(f"{tracks:5d} 个目标 {name:<16} 逐个update {loop:8.2f} ms | multi_update {batch:7.2f} ms "
+                  f"({loop / batch:5.1f}x) | 最大误差 {error:.1e} {'一致' if close else '不一致'}")
+    for tracks in args.tracks:
+        sequence = make_sequence(tracks, args.frames)
+        detections = sum(len(d) for d in sequence) / len(sequence)
+        for tracker_type in args.trackers:
+            latency, outputs = min(run(tracker_type, sequence) for _ in range(args.repeat))
+            print(f"{tracks:5d} 个目标 {tracker_type:<10} {latency:8.2f} ms/帧 | 每帧 {detections:6.0f} 个检测框 "
+                  f"{outputs:6.0f} 条输出轨迹")
+    if not consistent:
+        raise SystemExit('multi_update 与逐个 update 的结果不一致')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""视频结果写入方式基准测试
+
+比较得到浏览器可播放视频的总耗时：
+  opencv+转码  推理时用 cv2.VideoWriter 写 AVI/MJPG，结束后再按 route.ts 的参数用 ffmpeg 转码为H.264
+  ffmpeg直编   推理时把标注帧通过管道送给 ffmpeg，推理结束即得到 *_h264.mp4
+
+用法: python bench_video_sink.py --source road.mp4 --weights best.pt --repeat 3
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import time
+
+import yolov11_predict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 与 route.ts 中AVI转码的ffmpeg参数一致
+TRANSCODE_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '23', '-profile:v', 'baseline', '-level', '3.1',
+                  '-pix_fmt', 'yuv420p', '-movflags', '+faststart', '-an', '-avoid_negative_ts', 'make_zero',
+                  '-fflags', '+genpts']
+
+
+def run(model, source, video_writer, imgsz):
+    """推理并得到H.264视频，返回 (推理耗时, 转码耗时, 帧数, 输出文件)"""
+    start = time.perf_counter()
+    frames = 0
+    for _ in model.predict(source, stream=True, save=True, project='runs/detect', name='bench_video_sink',
+                           exist_ok=True, imgsz=imgsz, video_writer=video_writer, verbose=False):
+        frames += 1
+    inference = time.perf_counter() - start
+    output = next(iter(model.predictor.vid_writer.values())).path
+
+    transcode = 0.0
+    if video_writer == 'opencv':
+        start = time.perf_counter()
+        h264_path = os.path.splitext(output)[0] + '_h264.mp4'
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', output, *TRANSCODE_ARGS, h264_path], check=True)
+        transcode = time.perf_counter() - start
+        output = h264_path
+    return inference, transcode, frames, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='视频结果写入方式基准测试')
+    parser.add_argument('--source', required=True, help='video file')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        parser.error('需要安装ffmpeg并加入PATH')
+    yolov11_predict.load_ultralytics()
+    model = yolov11_predict.load_model(args.weights)
+    run(model, args.source, 'opencv', args.imgsz)  # 预热模型
+
+    totals = {}
+    for video_writer, label in (('opencv', 'opencv+转码'), ('ffmpeg', 'ffmpeg直编')):
+        best = None
+        for _ in range(args.repeat):
+            inference, transcode, frames, output = run(model, args.source, video_writer, args.imgsz)
+            if best is None or inference + transcode < sum(best[:2]):
+                best = (inference, transcode, frames, output)
+        inference, transcode, frames, output = best
+        totals[video_writer] = inference + transcode
+        print(f"{label:<10} 推理 {inference * 1000:8.0f} ms + 转码 {transcode * 1000:7.0f} ms = "
+              f"{(inference + transcode) * 1000:8.0f} ms | {frames} 帧 {frames / inference:6.2f} fps | "
+              f"{os.path.basename(output)} {os.path.getsize(output) / 1024:.0f} KB")
+    saved = totals['opencv'] - totals['ffmpeg']
+    print(f"直接编码节省 {saved * 1000:.0f} ms ({saved / totals['opencv'] * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""YOLO动态批处理基准测试
+
+在进程内加载模型，用 --clients 个并发线程持续提交检测请求，比较不同
+max_batch_size 下的吞吐量、请求延迟分位数和实际的batch大小分布
+（max_batch_size=1 即逐个串行推理）。
+
+用法: python bench_yolo_batching.py --weights best.pt --clients 8 --requests 64 --batch-sizes 1 4 8
+"""
+import argparse
+import glob
+import os
+import threading
+import time
+
+import yolov11_predict
+from yolo_batching import BatchScheduler
+from yolo_server import PredictService
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(service, sources, clients, requests):
+    """clients 个线程共提交 requests 个请求，返回耗时（秒）"""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            service.predict(sources[i % len(sources)])
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLO动态批处理基准测试')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--source', default=os.path.join(BASE_DIR, 'ultralytics', 'assets'),
+                        help='image file or directory')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--max-delay-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        sources = sorted(glob.glob(os.path.join(args.source, '*.jpg')))
+    else:
+        sources = [args.source]
+    yolov11_predict.load_ultralytics()
+
+    baseline = None
+    for max_batch in args.batch_sizes:
+        service = PredictService(args.weights, os.path.join(BASE_DIR, 'upload'), max_batch, args.max_delay_ms,
+                                 max_queue=args.clients * 2)
+        service.warmup()
+        run(service, sources, args.clients, min(args.requests, args.clients * 2))  # 预热各batch大小
+        service.scheduler.close()
+        service.scheduler = BatchScheduler(service._run_batch, max_batch, args.max_delay_ms, args.clients * 2)
+
+        elapsed = run(service, sources, args.clients, args.requests)
+        stats = service.scheduler.stats()
+        service.scheduler.close()
+        throughput = args.requests / elapsed
+        baseline = baseline or throughput
+        latency = stats['latency_ms']
+        print(f"max_batch={max_batch:<3} {throughput:6.2f} 张/秒 ({throughput / baseline:4.2f}x) | "
+              f"延迟 p50 {latency['p50']:7.1f} p90 {latency['p90']:7.1f} p99 {latency['p99']:7.1f} ms | "
+              f"平均batch {stats['avg_batch_size']:4.2f} 分布 {stats['batch_sizes']}")
+
+
+if __name__ == '__main__':
+    main()
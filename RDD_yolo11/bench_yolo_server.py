@@ -0,0 +1,89 @@
+"""YOLO推理冷启动与常驻服务延迟对比
+
+  cold    每次启动一个 yolov11_predict.py --local 进程（原来 route.ts 的方式：导入torch、加载权重、推理）
+  client  每次启动一个 yolov11_predict.py 进程，作为瘦客户端请求常驻服务
+  warm    直接向常驻服务发HTTP请求（route.ts 现在的方式）
+
+用法: python bench_yolo_server.py --weights best.pt --source ultralytics/assets/bus.jpg --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import yolov11_predict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(BASE_DIR, 'yolov11_predict.py')
+
+
+def run_cli(args):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, SCRIPT] + args, cwd=BASE_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return elapsed
+
+
+def wait_for_server(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/health', timeout=1) as resp:
+                return json.loads(resp.read())
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('推理服务启动超时')
+
+
+def report(name, times):
+    times = sorted(times)
+    print(f"{name:<8} 平均 {sum(times) / len(times) * 1000:8.1f} ms | "
+          f"中位数 {times[len(times) // 2] * 1000:8.1f} ms | 最小 {times[0] * 1000:8.1f} ms")
+    return sum(times) / len(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLO推理冷启动与常驻服务延迟对比')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--source', default=os.path.join(BASE_DIR, 'ultralytics', 'assets', 'bus.jpg'))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=8799)
+    args = parser.parse_args()
+    weights, source = os.path.abspath(args.weights), os.path.abspath(args.source)
+    url = f'http://127.0.0.1:{args.port}'
+
+    cold = [run_cli(['--source', source, '--weights', weights, '--local']) for _ in range(args.runs)]
+
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, 'yolo_server.py'), '--weights', weights,
+                               '--port', str(args.port)], cwd=BASE_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(url)
+        print(f"服务启动并预热耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+        client = [run_cli(['--source', source, '--weights', weights, '--server', url]) for _ in range(args.runs)]
+        warm = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = json.loads(yolov11_predict.remote_predict(source, weights, url))
+            warm.append(time.perf_counter() - start)
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+    finally:
+        server.terminate()
+        server.wait()
+
+    cold_avg = report('cold', cold)
+    report('client', client)
+    warm_avg = report('warm', warm)
+    print(f"常驻服务相对冷启动加速 {cold_avg / warm_avg:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""YOLO多进程工作池扩展性基准测试
+
+对每个 (进程数, 每进程线程数) 组合启动一个 WorkerPool，用进程数2倍的并发线程持续提交
+检测请求，比较吞吐量、延迟分位数和启动耗时，并与服务进程内的动态批处理（--max-batch）对比。
+吞吐量最高的组合保存到 exports/<权重哈希>/workers.json，yolo_server.py --workers auto 启动时使用。
+默认测试的组合为进程数取 1, 2, 4, ... 且各进程平分本机可用核数，也可用 --configs 指定。
+
+用法: python bench_yolo_workers.py --weights best.pt --requests 64
+      python bench_yolo_workers.py --weights best.pt --configs 1x8 2x4 4x2 8x1
+"""
+import argparse
+import glob
+import os
+
+import yolo_export
+import yolo_workers
+import yolov11_predict
+from bench_yolo_batching import run
+from yolo_server import PredictService
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_config(value):
+    workers, _, threads = value.partition('x')
+    return int(workers), int(threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLO多进程工作池扩展性基准测试')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--source', default=os.path.join(BASE_DIR, 'ultralytics', 'assets'),
+                        help='image file or directory')
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--configs', type=parse_config, nargs='+',
+                        help='WORKERSxTHREADS combinations, default powers of two that use all cores')
+    parser.add_argument('--dispatch', choices=yolo_workers.DISPATCH_MODES, default='least-loaded')
+    parser.add_argument('--max-batch', type=int, default=8, help='in-process batching baseline, 0 skips it')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--export-dir', default=yolo_export.DEFAULT_EXPORT_DIR)
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        sources = sorted(glob.glob(os.path.join(args.source, '*.jpg')))
+    else:
+        sources = [args.source]
+    if not yolov11_predict.load_ultralytics():
+        parser.error('需要安装ultralytics')
+    weights = os.path.abspath(args.weights)
+    model_path = yolo_export.selected_weights(weights, args.export_dir)
+    cores = len(yolo_workers.available_cores())
+    print(f"{len(sources)} 张图片, {args.requests} 个请求, 可用CPU核 {cores}, 模型 {model_path}")
+
+    baseline = None
+    if args.max_batch > 0:
+        clients = args.max_batch * 2
+        service = PredictService(weights, os.path.join(BASE_DIR, 'upload'), args.max_batch, max_queue=clients * 2,
+                                 model_path=model_path)
+        service.warmup(args.imgsz)
+        run(service, sources, clients, clients)  # 预热
+        baseline = args.requests / run(service, sources, clients, args.requests)
+        latency = service.scheduler.stats()['latency_ms']
+        service.scheduler.close()
+        print(f"进程内批处理 max_batch={args.max_batch:<3} {baseline:6.2f} 张/秒 | "
+              f"延迟 p50 {latency['p50']:7.1f} p90 {latency['p90']:7.1f} p99 {latency['p99']:7.1f} ms")
+
+    best, report = yolo_workers.tune(weights, sources, model_path, args.configs, args.requests, args.dispatch,
+                                     args.export_dir, args.imgsz)
+    baseline = baseline or report[0]['throughput']
+    for r in report:
+        latency = r['latency_ms']
+        print(f"{r['workers']:2d} 进程 x {r['threads']:2d} 线程 {r['throughput']:6.2f} 张/秒 "
+              f"({r['throughput'] / baseline:4.2f}x) | 延迟 p50 {latency['p50']:7.1f} p90 {latency['p90']:7.1f} "
+              f"p99 {latency['p99']:7.1f} ms | 启动 {r['startup_s']:5.1f} s")
+    print(f"最优配置: {best['workers']} 进程 x {best['threads']} 线程，已保存到 "
+          f"{yolo_workers.tuning_path(weights, args.export_dir)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,4 @@
- 
\ No newline at end of file
+@echo off
+rem 启动常驻的YOLO推理服务（模型只加载一次），route.ts 会优先请求该服务
+cd /d "%~dp0"
+python yolo_server.py --weights best.pt
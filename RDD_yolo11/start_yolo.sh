@@ -1 +1,4 @@
- 
\ No newline at end of file
+#!/bin/sh
+# 启动常驻的YOLO推理服务（模型只加载一次），route.ts 会优先请求该服务
+cd "$(dirname "$0")"
+exec python yolo_server.py --weights best.pt
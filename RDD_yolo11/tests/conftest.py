@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# 推理服务和脚本以顶层模块方式互相导入（与 python yolo_server.py 启动时一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def weights(tmp_path_factory):
+    """yolo11n.yaml 构建的未训练模型权重，不需要下载"""
+    import yolov11_predict
+    if not yolov11_predict.load_ultralytics():
+        pytest.skip('需要ultralytics')
+    import torch
+    from ultralytics import YOLO
+    path = tmp_path_factory.mktemp('weights') / 'tiny.pt'
+    torch.save({'model': YOLO('yolo11n.yaml').model, 'train_args': {}}, path)
+    return str(path)
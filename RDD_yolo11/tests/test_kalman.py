@@ -0,0 +1,64 @@
+"""卡尔曼滤波批量接口测试：multi_project / multi_update 与逐个 project / update 的结果一致
+
+状态先经过几轮 predict / update，协方差中位置与速度之间有耦合项，而不是 initiate 之后的对角矩阵。
+跟踪器传入的检测框是 float32，float32 和 float64 的状态都要覆盖；N=1 检查批量维度没有被压掉。
+"""
+import numpy as np
+import pytest
+
+from ultralytics.trackers.utils.kalman_filter import KalmanFilterXYAH, KalmanFilterXYWH
+
+FILTERS = [KalmanFilterXYAH, KalmanFilterXYWH]
+DTYPES = [np.float32, np.float64]
+SIZES = [1, 2, 50]
+
+
+def make_states(kf, n, dtype, seed=0):
+    """返回 n 个跟踪了几帧、刚做完 predict 的状态 (mean, covariance) 及本帧的观测，均为 dtype 类型"""
+    rng = np.random.default_rng(seed)
+    xywh = np.concatenate((rng.uniform(0, 4000, (n, 2)), rng.uniform(20, 80, (n, 2))), axis=1)
+    velocity = rng.normal(0, 3, (n, 2))
+
+    def measure(frame):
+        boxes = xywh.copy()
+        boxes[:, :2] += velocity * frame + rng.normal(0, 1.5, (n, 2))
+        if isinstance(kf, KalmanFilterXYAH):
+            boxes[:, 2] /= boxes[:, 3]
+        return boxes
+
+    states = [kf.initiate(m) for m in measure(0)]
+    for frame in range(1, 4):
+        states = [kf.update(*kf.predict(*s), m) for s, m in zip(states, measure(frame))]
+    states = [kf.predict(*s) for s in states]
+    mean = np.asarray([m for m, _ in states], dtype=dtype)
+    covariance = np.asarray([c for _, c in states], dtype=dtype)
+    return mean, covariance, measure(4).astype(dtype)
+
+
+def assert_same(result, expected):
+    for r, e in zip(result, expected):
+        assert r.shape == e.shape
+        assert r.dtype == e.dtype
+        np.testing.assert_allclose(r, e, rtol=1e-9, atol=1e-9 * np.abs(e).max())
+
+
+@pytest.mark.parametrize('n', SIZES)
+@pytest.mark.parametrize('dtype', DTYPES)
+@pytest.mark.parametrize('filter_class', FILTERS)
+def test_multi_project_matches_project(filter_class, dtype, n):
+    kf = filter_class()
+    mean, covariance, _ = make_states(kf, n, dtype)
+    expected = [kf.project(m, c) for m, c in zip(mean, covariance)]
+    assert_same(kf.multi_project(mean, covariance),
+                (np.asarray([m for m, _ in expected]), np.asarray([c for _, c in expected])))
+
+
+@pytest.mark.parametrize('n', SIZES)
+@pytest.mark.parametrize('dtype', DTYPES)
+@pytest.mark.parametrize('filter_class', FILTERS)
+def test_multi_update_matches_update(filter_class, dtype, n):
+    kf = filter_class()
+    mean, covariance, measurement = make_states(kf, n, dtype)
+    expected = [kf.update(m, c, z) for m, c, z in zip(mean, covariance, measurement)]
+    assert_same(kf.multi_update(mean, covariance, measurement),
+                (np.asarray([m for m, _ in expected]), np.asarray([c for _, c in expected])))
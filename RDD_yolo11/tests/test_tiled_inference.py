@@ -0,0 +1,13 @@
+"""分块推理测试：tile 只对指定了它的那次 predict 调用生效，缓存的模型之后的调用恢复整图推理"""
+import numpy as np
+
+import yolov11_predict
+
+
+def test_tile_is_reset_on_calls_that_do_not_set_it(weights):
+    model = yolov11_predict.YOLO(weights)
+    image = np.zeros((96, 160, 3), dtype=np.uint8)
+    model.predict(image, imgsz=64, tile=64, verbose=False)
+    assert model.predictor.args.tile == 64
+    model.predict(image, imgsz=64, verbose=False)
+    assert model.predictor.args.tile == 0
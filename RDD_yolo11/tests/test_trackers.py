@@ -0,0 +1,52 @@
+"""BYTETracker / BOTSORT 回归测试：回放 bench_tracker.py 的合成检测序列，逐帧输出与保存的参考结果比较
+
+参考结果 data/tracker_reference.npz 由改为 track_table 数组存储之前（逐个 STrack 对象）的跟踪器生成，
+每个场景、跟踪器一个数组，每行为 [帧号, x1, y1, x2, y2, 轨迹ID, 置信度, 类别, 检测框序号]。
+跟踪逻辑有意改变时在 RDD_yolo11 目录下重新生成: python -m tests.test_trackers
+"""
+import os
+
+import numpy as np
+import pytest
+
+import bench_tracker
+import yolov11_predict
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tracker_reference.npz')
+# sparse: 目标很少重叠；crowded: 400x400 画面内 30 个目标，频繁交叉，覆盖低分框的第二轮关联和ID保持
+SCENES = {
+    'sparse': {'tracks': 30, 'frames': 40, 'seed': 0},
+    'crowded': {'tracks': 30, 'frames': 40, 'seed': 1, 'size': 400},
+}
+TRACKERS = ('bytetrack', 'botsort')
+
+
+def replay(scene, tracker_type):
+    tracker = bench_tracker.make_tracker(tracker_type)
+    rows = [np.insert(np.asarray(tracker.update(detections), dtype=np.float64).reshape(-1, 8), 0, frame, axis=1)
+            for frame, detections in enumerate(bench_tracker.make_sequence(**SCENES[scene]))]
+    return np.concatenate(rows)
+
+
+@pytest.fixture(scope='module')
+def reference():
+    if not yolov11_predict.load_ultralytics():
+        pytest.skip('需要ultralytics')
+    with np.load(REFERENCE) as data:
+        return dict(data)
+
+
+@pytest.mark.parametrize('tracker_type', TRACKERS)
+@pytest.mark.parametrize('scene', SCENES)
+def test_tracker_matches_reference(reference, scene, tracker_type):
+    expected = reference[f'{scene}_{tracker_type}']
+    result = replay(scene, tracker_type)
+    assert result.shape == expected.shape
+    exact = [0, 5, 7, 8]  # 帧号、轨迹ID、类别、检测框序号必须完全一致
+    np.testing.assert_array_equal(result[:, exact], expected[:, exact])
+    np.testing.assert_allclose(result[:, [1, 2, 3, 4, 6]], expected[:, [1, 2, 3, 4, 6]], rtol=1e-6, atol=1e-4)
+
+
+if __name__ == '__main__':
+    yolov11_predict.load_ultralytics()
+    np.savez_compressed(REFERENCE, **{f'{scene}_{t}': replay(scene, t) for scene in SCENES for t in TRACKERS})
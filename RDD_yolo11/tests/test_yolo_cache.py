@@ -0,0 +1,50 @@
+"""ResultCache 测试：命中缓存时不改写 runs/detect/predict 中并发推理共用的结果图，复制出的结果图随缓存项淘汰"""
+import os
+
+from yolo_cache import ResultCache
+
+
+def make_entry(tmp_path):
+    output_dir = tmp_path / 'runs' / 'detect' / 'predict'
+    output_dir.mkdir(parents=True)
+    image_path = output_dir / 'road.jpg'
+    image_path.write_bytes(b'annotated with conf=0.25')
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.put('a' * 64, {'image_path': str(image_path), 'detections': []})
+    return cache, image_path
+
+
+def test_hit_returns_a_private_copy_of_the_image(tmp_path):
+    cache, image_path = make_entry(tmp_path)
+    # 另一个请求用不同参数推理同一张图片，覆盖了共享的结果图
+    image_path.write_bytes(b'annotated with conf=0.5')
+
+    result = cache.get('a' * 64)
+    assert result['cached'] is True
+    assert result['image_path'] != str(image_path)
+    assert os.path.dirname(result['image_path']) == str(image_path.parent)
+    with open(result['image_path'], 'rb') as f:
+        assert f.read() == b'annotated with conf=0.25'
+    assert image_path.read_bytes() == b'annotated with conf=0.5'
+
+
+def test_repeated_hits_reuse_the_same_copy(tmp_path):
+    cache, _ = make_entry(tmp_path)
+    first = cache.get('a' * 64)['image_path']
+    assert cache.get('a' * 64)['image_path'] == first
+    assert cache.stats()['hits'] == 2
+    assert not [name for name in os.listdir(os.path.dirname(first)) if name.endswith('.tmp')]
+
+
+def test_served_copy_is_counted_and_evicted(tmp_path):
+    cache, image_path = make_entry(tmp_path)
+    entry_bytes = cache.stats()['bytes']
+    served = cache.get('a' * 64)['image_path']
+    assert cache.stats()['bytes'] == entry_bytes + os.path.getsize(served)
+    assert ResultCache(cache.root).stats()['bytes'] == cache.stats()['bytes']  # 重启后按同样的大小恢复
+
+    cache.max_bytes = cache.stats()['bytes']
+    cache.put('b' * 64, {'image_path': str(image_path), 'detections': []})
+    assert cache.stats()['entries'] == 1
+    assert not os.path.exists(served)
+    assert sorted(os.listdir(cache.root)) == ['b' * 64 + '.image', 'b' * 64 + '.json']
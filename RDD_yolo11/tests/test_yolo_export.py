@@ -0,0 +1,26 @@
+"""yolo_export 测试：导出INT8 ONNX时不改写已导出并参与后端选择的FP32 ONNX模型"""
+import os
+
+import pytest
+from PIL import Image
+
+import yolo_export
+from yolo_cache import file_hash
+
+
+def test_int8_export_keeps_the_fp32_onnx_model(weights, tmp_path):
+    pytest.importorskip('onnxruntime')
+    pytest.importorskip('onnxslim')
+    upload = tmp_path / 'upload'
+    upload.mkdir()
+    for i in range(2):
+        Image.new('RGB', (96, 64), (60 * i, 90, 120)).save(upload / f'{i}.jpg')
+    root = str(tmp_path / 'exports')
+
+    fp32 = yolo_export.export_backend(weights, 'onnx', root, str(upload), imgsz=64)
+    digest = file_hash(fp32)
+    int8 = yolo_export.export_backend(weights, 'onnx-int8', root, str(upload), imgsz=64)
+
+    assert int8 is not None and int8 != fp32
+    assert file_hash(fp32) == digest
+    assert not [name for name in os.listdir(os.path.dirname(fp32)) if name.endswith('_fp32.onnx')]
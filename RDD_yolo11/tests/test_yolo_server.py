@@ -0,0 +1,93 @@
+"""yolo_server 测试：不允许的权重在进入推理队列之前被拒绝，推理结果等待超时后放弃，
+请求没有指定的推理参数取默认值，不沿用之前请求的参数"""
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+
+import pytest
+from PIL import Image
+
+import yolov11_predict
+
+from yolo_server import PredictService, WeightsNotAllowed, make_server
+
+
+@pytest.fixture
+def service(tmp_path):
+    weights = tmp_path / 'best.pt'
+    weights.write_bytes(b'')
+    allowed = tmp_path / 'models'
+    allowed.mkdir()
+    (allowed / 'other.pt').write_bytes(b'')
+    service = PredictService(str(weights), str(tmp_path / 'upload'), model_path=str(tmp_path / 'best.onnx'),
+                             allowed_weights_dirs=[str(allowed)])
+    yield service
+    service.scheduler.close()
+
+
+def test_configured_and_allow_listed_weights_are_accepted(service, tmp_path):
+    assert service.check_weights(str(tmp_path / 'best.pt')) == str(tmp_path / 'best.pt')
+    assert service.check_weights(str(tmp_path / 'best.onnx')) == str(tmp_path / 'best.onnx')
+    assert service.check_weights(str(tmp_path / 'models' / 'other.pt')) == str(tmp_path / 'models' / 'other.pt')
+
+
+@pytest.mark.parametrize('name', ['evil.pt', os.path.join('models', '..', 'evil.pt'), 'models_evil/x.pt'])
+def test_other_weights_are_rejected(service, tmp_path, name):
+    with pytest.raises(WeightsNotAllowed):
+        service.predict(str(tmp_path / 'image.jpg'), str(tmp_path / name))
+    assert service.scheduler.stats()['requests'] == 0
+
+
+def test_predict_endpoint_answers_403(service, tmp_path):
+    image = tmp_path / 'image.jpg'
+    image.write_bytes(b'not an image')
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        payload = json.dumps({'source': str(image), 'weights': str(tmp_path / 'evil.pt')}).encode('utf-8')
+        url = f'http://127.0.0.1:{server.server_address[1]}/predict'
+        request = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'})
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with pytest.raises(urllib.error.HTTPError) as error:
+            opener.open(request, timeout=10)
+        assert error.value.code == 403
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_predict_gives_up_after_request_timeout(service, tmp_path, monkeypatch):
+    image = tmp_path / 'image.jpg'
+    image.write_bytes(b'not an image')
+    service.request_timeout = 0.1
+    monkeypatch.setattr(service.scheduler, 'submit', lambda item: Future())  # 执行器永远不给出结果
+    with pytest.raises(TimeoutError):
+        service.predict(str(image))
+
+
+def test_unspecified_options_take_defaults(service, tmp_path, monkeypatch):
+    image = tmp_path / 'image.jpg'
+    image.write_bytes(b'not an image')
+    submitted = []
+    monkeypatch.setattr(service.scheduler, 'submit', lambda item: submitted.append(item) or Future())
+    service.request_timeout = 0
+    for options in ({}, {'conf': 0.25}, {'conf': 0.5, 'tile': 1280}):
+        with pytest.raises(TimeoutError):
+            service.predict(str(image), **options)
+    defaults = tuple(sorted(yolov11_predict.PREDICT_DEFAULTS.items()))
+    assert [options for _, _, options in submitted[:2]] == [defaults, defaults]
+    assert dict(submitted[2][2]) == dict(yolov11_predict.PREDICT_DEFAULTS, conf=0.5, tile=1280)
+
+
+def test_options_do_not_stick_to_the_cached_model(weights, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image = tmp_path / 'image.jpg'
+    Image.new('RGB', (96, 64)).save(image)
+    yolov11_predict.detect_batch([str(image)], weights, conf=0.9, iou=0.3, imgsz=64, tile=32)
+    yolov11_predict.detect_batch([str(image)], weights)
+    args = yolov11_predict.load_model(weights).predictor.args
+    assert {name: getattr(args, name) for name in yolov11_predict.PREDICT_DEFAULTS} == \
+        yolov11_predict.PREDICT_DEFAULTS
@@ -0,0 +1,69 @@
+"""WorkerPool 测试：推理服务经工作池检测上传的图片，工作进程意外退出时在途请求失败，之后的请求只发给存活的进程
+
+工作进程用 yolo11n.yaml 构建的未训练模型（不需要下载权重），启动两个进程约需十几秒。
+工作进程在启动时的当前目录下保存结果图（runs/detect/predict），测试前切换到临时目录。
+"""
+import os
+import signal
+import time
+import pytest
+from PIL import Image
+
+from yolo_server import PredictService
+from yolo_workers import WorkerError, WorkerPool
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, 'SIGSTOP'), reason='需要 SIGSTOP/SIGKILL')
+
+OPTIONS = (('imgsz', 64),)
+
+
+@pytest.fixture
+def image(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'road.jpg'
+    Image.new('RGB', (96, 64), (90, 90, 90)).save(path)
+    return str(path)
+
+
+def test_service_detects_uploads_through_the_pool(weights, image, tmp_path):
+    service = PredictService(weights, str(tmp_path / 'upload'), workers=1, worker_threads=1)
+    try:
+        service.warmup()
+        with open(image, 'rb') as f:
+            upload = service.save_upload(f.read(), 'road.jpg')  # 与 POST /predict 上传图片字节时相同
+        result = service.predict(upload, imgsz=64)
+        assert result['detections'] == []
+        assert result['image_path'] == str(tmp_path / 'runs' / 'detect' / 'predict' / os.path.basename(upload))
+        assert os.path.exists(result['image_path'])
+        assert service.stats()['requests'] == 1
+    finally:
+        service.scheduler.close()
+
+
+def test_dead_worker_fails_its_requests_and_is_skipped(weights, image):
+    pool = WorkerPool(weights, workers=2, threads=1, dispatch='round-robin', imgsz=64, pin=False)
+    try:
+        pool.wait_ready(120)
+        pid = pool.stats()['per_worker'][0]['pid']
+        os.kill(pid, signal.SIGSTOP)  # 暂停而不是直接杀掉，保证请求确实分发给了这个进程
+        future = pool.submit((image, weights, OPTIONS))
+        os.kill(pid, signal.SIGKILL)
+
+        with pytest.raises(WorkerError, match='工作进程 0 已退出'):
+            future.result(timeout=10)
+
+        for _ in range(3):  # round-robin 跳过已退出的进程 0
+            assert os.path.exists(pool.submit((image, weights, OPTIONS)).result(timeout=60)['image_path'])
+        per_worker = pool.stats()['per_worker']
+        assert [w['alive'] for w in per_worker] == [False, True]
+        assert [w['requests'] for w in per_worker] == [0, 3]
+        assert pool.stats()['errors'] == 1
+
+        os.kill(per_worker[1]['pid'], signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while pool.stats()['per_worker'][1]['alive'] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with pytest.raises(WorkerError, match='所有工作进程已退出'):
+            pool.submit((image, weights, OPTIONS))
+    finally:
+        pool.close()
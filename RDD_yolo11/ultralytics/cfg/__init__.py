@@ -106,6 +106,7 @@ CFG_FLOAT_KEYS = {  # integer or float arguments, i.e. x=2 and x=2.0
     "time",
     "workspace",
     "batch",
+    "vid_skip_thresh",
 }
 CFG_FRACTION_KEYS = {  # fractional float arguments with 0.0<=values<=1.0
     "dropout",
@@ -131,6 +132,7 @@ CFG_FRACTION_KEYS = {  # fractional float arguments with 0.0<=values<=1.0
     "conf",
     "iou",
     "fraction",
+    "tile_overlap",
 }
 CFG_INT_KEYS = {  # integer-only arguments
     "epochs",
@@ -141,6 +143,9 @@ CFG_INT_KEYS = {  # integer-only arguments
     "mask_ratio",
     "max_det",
     "vid_stride",
+    "vid_max_skip",
+    "tile",
+    "tile_batch",
     "line_width",
     "nbs",
     "save_period",
@@ -171,6 +176,7 @@ CFG_BOOL_KEYS = {  # boolean-only arguments
     "augment",
     "agnostic_nms",
     "retina_masks",
+    "tile_coarse",
     "show_boxes",
     "keras",
     "optimize",
@@ -171,7 +171,7 @@ def check_source(source):
     return source, webcam, screenshot, from_img, in_memory, tensor
 
 
-def load_inference_source(source=None, batch=1, vid_stride=1, buffer=False):
+def load_inference_source(source=None, batch=1, vid_stride=1, buffer=False, skip_thresh=0.0, max_skip=0):
     """
     Loads an inference source for object detection and applies necessary transformations.
 
@@ -180,6 +180,8 @@ def load_inference_source(source=None, batch=1, vid_stride=1, buffer=False):
         batch (int, optional): Batch size for dataloaders. Default is 1.
         vid_stride (int, optional): The frame interval for video sources. Default is 1.
         buffer (bool, optional): Determined whether stream frames will be buffered. Default is False.
+        skip_thresh (float, optional): Thumbnail difference below which video frames are skipped. Default is 0.0.
+        max_skip (int, optional): Max consecutive skipped video frames, 0 disables frame skipping. Default is 0.
 
     Returns:
         dataset (Dataset): A dataset object for the specified input source.
@@ -199,7 +201,9 @@ def load_inference_source(source=None, batch=1, vid_stride=1, buffer=False):
     elif from_img:
         dataset = LoadPilAndNumpy(source)
     else:
-        dataset = LoadImagesAndVideos(source, batch=batch, vid_stride=vid_stride)
+        dataset = LoadImagesAndVideos(
+            source, batch=batch, vid_stride=vid_stride, skip_thresh=skip_thresh, max_skip=max_skip
+        )
 
     # Attach source types to the dataset
     setattr(dataset, "source_type", source_type)
@@ -294,6 +294,9 @@ class LoadImagesAndVideos:
         video_flag (List[bool]): Flags indicating whether a file is a video (True) or an image (False).
         mode (str): Current mode, 'image' or 'video'.
         vid_stride (int): Stride for video frame-rate.
+        skip_thresh (float): Mean absolute thumbnail difference below which a video frame is not a keyframe.
+        max_skip (int): Maximum number of consecutive non-keyframes, 0 disables adaptive frame skipping.
+        keyframes (List[bool]): Keyframe flags of the last returned batch, non-keyframes need no inference.
         bs (int): Batch size.
         cap (cv2.VideoCapture): Video capture object for OpenCV.
         frame (int): Frame counter for video.
@@ -315,12 +318,15 @@ class LoadImagesAndVideos:
         ...     pass
 
     Notes:
+        - Adaptive frame skipping compares a 64-pixel wide grayscale thumbnail of each video frame with the last
+          keyframe. Frames that changed less than skip_thresh are returned with keyframes[i] = False, at most
+          max_skip in a row, so redundant frames of slow or static footage can reuse earlier detections.
         - Supports various image formats including HEIC.
         - Handles both local files and directories.
         - Can read from a text file containing paths to images and videos.
     """
 
-    def __init__(self, path, batch=1, vid_stride=1):
+    def __init__(self, path, batch=1, vid_stride=1, skip_thresh=0.0, max_skip=0):
         """Initialize dataloader for images and videos, supporting various input formats."""
         parent = None
         if isinstance(path, str) and Path(path).suffix == ".txt":  # *.txt file with img/vid/dir on each line
@@ -356,6 +362,9 @@ class LoadImagesAndVideos:
         self.video_flag = [False] * ni + [True] * nv
         self.mode = "image"
         self.vid_stride = vid_stride  # video frame-rate stride
+        self.skip_thresh = skip_thresh  # adaptive frame skipping threshold
+        self.max_skip = max_skip  # max consecutive skipped frames, 0 disables adaptive frame skipping
+        self.keyframes = []
         self.bs = batch
         if any(videos):
             self._new_video(videos[0])  # new video
@@ -372,6 +381,7 @@ class LoadImagesAndVideos:
     def __next__(self):
         """Returns the next batch of images or video frames with their paths and metadata."""
         paths, imgs, info = [], [], []
+        self.keyframes = []
         while len(imgs) < self.bs:
             if self.count >= self.nf:  # end of file list
                 if imgs:
@@ -397,7 +407,12 @@ class LoadImagesAndVideos:
                         self.frame += 1
                         paths.append(path)
                         imgs.append(im0)
-                        info.append(f"video {self.count + 1}/{self.nf} (frame {self.frame}/{self.frames}) {path}: ")
+                        keyframe = self._is_keyframe(im0)
+                        self.keyframes.append(keyframe)
+                        info.append(
+                            f"video {self.count + 1}/{self.nf} (frame {self.frame}/{self.frames}"
+                            f"{'' if keyframe else ', skipped'}) {path}: "
+                        )
                         if self.frame == self.frames:  # end of video
                             self.count += 1
                             self.cap.release()
@@ -427,6 +442,7 @@ class LoadImagesAndVideos:
                 else:
                     paths.append(path)
                     imgs.append(im0)
+                    self.keyframes.append(True)
                     info.append(f"image {self.count + 1}/{self.nf} {path}: ")
                 self.count += 1  # move to the next file
                 if self.count >= self.ni:  # end of image list
@@ -442,6 +458,25 @@ class LoadImagesAndVideos:
         if not self.cap.isOpened():
             raise FileNotFoundError(f"Failed to open video {path}")
         self.frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) / self.vid_stride)
+        self.last_key = None  # thumbnail of the last keyframe
+        self.skipped = 0  # consecutive non-keyframes since the last keyframe
+
+    def _is_keyframe(self, im0):
+        """Returns True if a video frame differs enough from the last keyframe to need inference."""
+        if self.max_skip <= 0:
+            return True
+        h, w = im0.shape[:2]
+        thumb = cv2.resize(im0, (64, max(1, round(64 * h / w))), interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        if (
+            self.last_key is not None
+            and self.skipped < self.max_skip
+            and cv2.absdiff(thumb, self.last_key).mean() < self.skip_thresh
+        ):
+            self.skipped += 1
+            return False
+        self.last_key, self.skipped = thumb, 0
+        return True
 
     def __len__(self):
         """Returns the number of files (images and videos) in the dataset."""
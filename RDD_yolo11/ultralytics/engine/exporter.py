@@ -405,6 +405,8 @@ class Exporter:
         opset_version = self.args.opset or get_latest_opset()
         LOGGER.info(f"\n{prefix} starting export with onnx {onnx.__version__} opset {opset_version}...")
         f = str(self.file.with_suffix(".onnx"))
+        if self.args.int8:  # float intermediate of the INT8 model, keep an existing FP32 export at f untouched
+            f = str(self.file.with_name(f"{self.file.stem}_int8_fp32.onnx"))
 
         output_names = ["output0", "output1"] if isinstance(self.model, SegmentationModel) else ["output0"]
         dynamic = self.args.dynamic
@@ -448,8 +450,57 @@ class Exporter:
             meta.key, meta.value = k, str(v)
 
         onnx.save(model_onnx, f)
+        Path(f"{f}.data").unlink(missing_ok=True)  # external weights of the torch>=2.9 exporter, now embedded in f
+        if self.args.int8:
+            fq, model_int8 = self.quantize_onnx(f, prefix)
+            Path(f).unlink()
+            return fq, model_int8
         return f, model_onnx
 
+    def quantize_onnx(self, f, prefix=""):
+        """Static INT8 quantization of an exported ONNX model with ONNX Runtime, calibrated on 'data' images."""
+        check_requirements("onnxruntime")
+        import onnx  # noqa
+        from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+        dataloader = self.get_int8_calibration_dataloader(prefix)
+
+        class DataReader(CalibrationDataReader):
+            """Feeds calibration batches as normalized float32 'images' inputs."""
+
+            def __init__(self):
+                self.batches = iter(dataloader)
+
+            def get_next(self):
+                batch = next(self.batches, None)
+                return None if batch is None else {"images": batch["img"].numpy().astype(np.float32) / 255.0}
+
+        # Quantize convolutions only, keep the Detect head box decoding (DFL) in float like the OpenVINO export
+        head_module_name = ".".join(list(self.model.named_modules())[-1][0].split(".")[:2])
+        model_onnx = onnx.load(f)
+        exclude = [n.name for n in model_onnx.graph.node if f"/{head_module_name}/dfl" in n.name]
+        fq = str(self.file.with_name(f"{self.file.stem}_int8.onnx"))
+        LOGGER.info(f"{prefix} quantizing to INT8 with onnxruntime, excluding {len(exclude)} head nodes...")
+        quantize_static(
+            f,
+            fq,
+            DataReader(),
+            quant_format=QuantFormat.QDQ,
+            op_types_to_quantize=["Conv"],
+            nodes_to_exclude=exclude,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+
+        # quantize_static drops the metadata properties, add them back for AutoBackend
+        model_int8 = onnx.load(fq)
+        for k, v in self.metadata.items():
+            meta = model_int8.metadata_props.add()
+            meta.key, meta.value = k, str(v)
+        onnx.save(model_int8, fq)
+        return fq, model_int8
+
     @try_export
     def export_openvino(self, prefix=colorstr("OpenVINO:")):
         """YOLO OpenVINO export."""
@@ -475,7 +526,7 @@ class Exporter:
             if self.model.task != "classify":
                 ov_model.set_rt_info("fit_to_window_letterbox", ["model_info", "resize_type"])
 
-            ov.runtime.save_model(ov_model, file, compress_to_fp16=self.args.half)
+            ov.save_model(ov_model, file, compress_to_fp16=self.args.half)
             yaml_save(Path(file).parent / "metadata.yaml", self.metadata)  # add metadata.yaml
 
         if self.args.int8:
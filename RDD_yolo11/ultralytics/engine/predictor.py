@@ -41,11 +41,13 @@ import torch
 from ultralytics.cfg import get_cfg, get_save_dir
 from ultralytics.data import load_inference_source
 from ultralytics.data.augment import LetterBox, classify_transforms
+from ultralytics.engine.results import Results
 from ultralytics.nn.autobackend import AutoBackend
-from ultralytics.utils import DEFAULT_CFG, LOGGER, MACOS, WINDOWS, callbacks, colorstr, ops
+from ultralytics.utils import DEFAULT_CFG, LOGGER, callbacks, colorstr, ops
 from ultralytics.utils.checks import check_imgsz, check_imshow
 from ultralytics.utils.files import increment_path
 from ultralytics.utils.torch_utils import select_device, smart_inference_mode
+from ultralytics.utils.video import make_video_sink
 
 STREAM_WARNING = """
 WARNING ⚠️ inference results will accumulate in RAM unless `stream=True` is passed, causing potential out-of-memory
@@ -74,7 +76,8 @@ class BasePredictor:
         data (dict): Data configuration.
         device (torch.device): Device used for prediction.
         dataset (Dataset): Dataset used for prediction.
-        vid_writer (dict): Dictionary of {save_path: video_writer, ...} writer for saving video output.
+        vid_writer (dict): Dictionary of {save_path: video_sink, ...} sinks for saving video output.
+        keyframes (list): Keyframe flags of the current batch, see 'vid_max_skip'.
     """
 
     def __init__(self, cfg=DEFAULT_CFG, overrides=None, _callbacks=None):
@@ -99,13 +102,14 @@ class BasePredictor:
         self.imgsz = None
         self.device = None
         self.dataset = None
-        self.vid_writer = {}  # dict of {save_path: video_writer, ...}
+        self.vid_writer = {}  # dict of {save_path: video_sink, ...}
         self.plotted_img = None
         self.source_type = None
         self.seen = 0
         self.windows = []
         self.batch = None
         self.results = None
+        self.keyframes = []
         self.transforms = None
         self.callbacks = _callbacks or callbacks.get_default_callbacks()
         self.txt_path = None
@@ -200,6 +204,8 @@ class BasePredictor:
             batch=self.args.batch,
             vid_stride=self.args.vid_stride,
             buffer=self.args.stream_buffer,
+            skip_thresh=self.args.vid_skip_thresh,
+            max_skip=self.args.vid_max_skip,
         )
         self.source_type = self.dataset.source_type
         if not getattr(self, "stream", True) and (
@@ -244,21 +250,30 @@ class BasePredictor:
             for self.batch in self.dataset:
                 self.run_callbacks("on_predict_batch_start")
                 paths, im0s, s = self.batch
-
-                # Preprocess
-                with profilers[0]:
-                    im = self.preprocess(im0s)
-
-                # Inference
-                with profilers[1]:
-                    preds = self.inference(im, *args, **kwargs)
-                    if self.args.embed:
-                        yield from [preds] if isinstance(preds, torch.Tensor) else preds  # yield embedding tensors
-                        continue
-
-                # Postprocess
-                with profilers[2]:
-                    self.results = self.postprocess(preds, im, im0s)
+                self.keyframes = list(getattr(self.dataset, "keyframes", None) or [True] * len(im0s))
+
+                if self.tiled(im0s) and any(self.keyframes):
+                    # Sliced inference on high-resolution images, pre/post-processing is timed per slice batch
+                    self.results = self.tiled_inference(paths, im0s, profilers)
+                    im = None
+                elif any(self.keyframes) or self.args.embed:
+                    # Preprocess
+                    with profilers[0]:
+                        im = self.preprocess(im0s)
+
+                    # Inference
+                    with profilers[1]:
+                        preds = self.inference(im, *args, **kwargs)
+                        if self.args.embed:
+                            yield from [preds] if isinstance(preds, torch.Tensor) else preds  # yield embedding tensors
+                            continue
+
+                    # Postprocess
+                    with profilers[2]:
+                        self.results = self.postprocess(preds, im, im0s)
+                else:
+                    # Adaptive frame skipping: no frame changed enough since the last keyframe, reuse its detections
+                    self.results = self.reuse_results(paths, im0s)
                 self.run_callbacks("on_predict_postprocess_end")
 
                 # Visualize, save, write results
@@ -282,16 +297,17 @@ class BasePredictor:
 
         # Release assets
         for v in self.vid_writer.values():
-            if isinstance(v, cv2.VideoWriter):
-                v.release()
+            v.release()
 
         # Print final results
         if self.args.verbose and self.seen:
             t = tuple(x.t / self.seen * 1e3 for x in profilers)  # speeds per image
-            LOGGER.info(
-                f"Speed: %.1fms preprocess, %.1fms inference, %.1fms postprocess per image at shape "
-                f"{(min(self.args.batch, self.seen), 3, *im.shape[2:])}" % t
+            shape = (
+                f"at shape {(min(self.args.batch, self.seen), 3, *im.shape[2:])}"
+                if im is not None
+                else f"in {self.args.tile}x{self.args.tile} slices"
             )
+            LOGGER.info(f"Speed: %.1fms preprocess, %.1fms inference, %.1fms postprocess per image {shape}" % t)
         if self.args.save or self.args.save_txt or self.args.save_crop:
             nl = len(list(self.save_dir.glob("labels/*.txt")))  # number of labels
             s = f"\n{nl} label{'s' * (nl > 1)} saved to {self.save_dir / 'labels'}" if self.args.save_txt else ""
@@ -318,7 +334,7 @@ class BasePredictor:
     def write_results(self, i, p, im, s):
         """Write inference results to a file or directory."""
         string = ""  # print string
-        if len(im.shape) == 3:
+        if im is not None and len(im.shape) == 3:
             im = im[None]  # expand for batch dim
         if self.source_type.stream or self.source_type.from_img or self.source_type.tensor:  # batch_size >= 1
             string += f"{i}: "
@@ -328,7 +344,8 @@ class BasePredictor:
             frame = int(match[1]) if match else None  # 0 if frame undetermined
 
         self.txt_path = self.save_dir / "labels" / (p.stem + ("" if self.dataset.mode == "image" else f"_{frame}"))
-        string += "{:g}x{:g} ".format(*im.shape[2:])
+        if im is not None:  # None for tiled inference
+            string += "{:g}x{:g} ".format(*im.shape[2:])
         result = self.results[i]
         result.save_dir = self.save_dir.__str__()  # used in other locations
         string += f"{result.verbose()}{result.speed['inference']:.1f}ms"
@@ -340,7 +357,7 @@ class BasePredictor:
                 boxes=self.args.show_boxes,
                 conf=self.args.show_conf,
                 labels=self.args.show_labels,
-                im_gpu=None if self.args.retina_masks else im[i],
+                im_gpu=None if self.args.retina_masks or im is None else im[i],
             )
 
         # Save results
@@ -355,6 +372,19 @@ class BasePredictor:
 
         return string
 
+    def tiled(self, im0s):
+        """Returns True if the batch is handled by tiled_inference(), only detection predictors implement tiling."""
+        return False
+
+    def reuse_results(self, paths, im0s):
+        """Returns results for skipped video frames holding the boxes of the last inferred frames."""
+        results = []
+        for i, (path, im0) in enumerate(zip(paths, im0s)):
+            last = self.results[min(i, len(self.results) - 1)]
+            held = {k: getattr(last, k).data for k in ("boxes", "obb", "probs") if getattr(last, k) is not None}
+            results.append(Results(im0, path=path, names=last.names, **held))
+        return results
+
     def save_predicted_images(self, save_path="", frame=0):
         """Save video predictions as mp4 at specified path."""
         im = self.plotted_img
@@ -366,12 +396,8 @@ class BasePredictor:
             if save_path not in self.vid_writer:  # new video
                 if self.args.save_frames:
                     Path(frames_path).mkdir(parents=True, exist_ok=True)
-                suffix, fourcc = (".mp4", "avc1") if MACOS else (".avi", "WMV2") if WINDOWS else (".avi", "MJPG")
-                self.vid_writer[save_path] = cv2.VideoWriter(
-                    filename=str(Path(save_path).with_suffix(suffix)),
-                    fourcc=cv2.VideoWriter_fourcc(*fourcc),
-                    fps=fps,  # integer required, floats produce error in MP4 codec
-                    frameSize=(im.shape[1], im.shape[0]),  # (width, height)
+                self.vid_writer[save_path] = make_video_sink(
+                    self.args.video_writer, save_path, fps, (im.shape[1], im.shape[0])  # (width, height)
                 )
 
             # Save video
@@ -184,6 +184,37 @@ class BaseTensor(SimpleClass):
         return self.__class__(self.data[idx], self.orig_shape)
 
 
+def columnize(names, cls, conf, coords, ids=None, decimals=None):
+    """
+    Builds columnar detection lists from NumPy arrays with one bulk conversion per column.
+
+    Args:
+        names (Dict[int, str]): Class index to name mapping.
+        cls (np.ndarray): Class indices of shape (N,).
+        conf (np.ndarray): Confidence scores of shape (N,).
+        coords (np.ndarray): Box coordinates of shape (N, K).
+        ids (np.ndarray | None): Track IDs of shape (N,), or None when not tracking.
+        decimals (int | None): Number of decimal places to round confidences and coordinates to, None keeps full
+            precision.
+
+    Returns:
+        (Dict[str, List]): Lists 'names', 'classes', 'confidences', 'boxes' and, when tracking, 'track_ids', all indexed
+            by detection.
+    """
+    if decimals is not None:
+        conf, coords = conf.astype(np.float64).round(decimals), coords.astype(np.float64).round(decimals)
+    classes = cls.astype(int).tolist()
+    columns = {
+        "names": [names[c] for c in classes],
+        "classes": classes,
+        "confidences": conf.tolist(),
+        "boxes": coords.tolist(),
+    }
+    if ids is not None:
+        columns["track_ids"] = ids.astype(int).tolist()
+    return columns
+
+
 class Results(SimpleClass):
     """
     A class for storing and manipulating inference results.
@@ -897,12 +928,49 @@ class Results(SimpleClass):
         df = self.to_df(normalize=normalize, decimals=decimals)
         return '<?xml version="1.0" encoding="utf-8"?>\n<root></root>' if df.empty else df.to_xml(*args, **kwargs)
 
+    def to_columns(self, normalize=False, decimals=5):
+        """
+        Converts detection results to columnar lists.
+
+        Unlike summary(), which builds one dictionary per detection from per-row tensor slices, the boxes are moved to
+        NumPy once and every column is converted in bulk, which is much faster for images with hundreds of detections.
+
+        Args:
+            normalize (bool): Whether to normalize box coordinates by image dimensions. Defaults to False.
+            decimals (int | None): Number of decimal places to round the output values to, None keeps full precision.
+                Defaults to 5.
+
+        Returns:
+            (Dict[str, List]): Lists 'names', 'classes', 'confidences' and 'boxes' indexed by detection, plus
+                'track_ids' when tracking. Boxes are [x1, y1, x2, y2], or the 8 corner coordinates for OBB results. For
+                classification results the lists hold the top-1 class with an empty 'boxes' list.
+
+        Examples:
+            >>> results = model("image.jpg")
+            >>> columns = results[0].to_columns()
+            >>> for name, conf, box in zip(columns["names"], columns["confidences"], columns["boxes"]):
+            ...     print(name, conf, box)
+        """
+        if self.probs is not None:
+            class_id = self.probs.top1
+            conf = round(self.probs.top1conf.item(), decimals) if decimals is not None else self.probs.top1conf.item()
+            return {"names": [self.names[class_id]], "classes": [class_id], "confidences": [conf], "boxes": []}
+        if self.obb is not None:
+            obb = self.obb.cpu().numpy()
+            coords = obb.xyxyxyxy.reshape(-1, 8)
+            if normalize:
+                coords = coords / np.tile(self.orig_shape[::-1], 4)
+            return columnize(self.names, obb.cls, obb.conf, coords, obb.id if obb.is_track else None, decimals)
+        if self.boxes is None:
+            return {"names": [], "classes": [], "confidences": [], "boxes": []}
+        return self.boxes.columns(self.names, normalize=normalize, decimals=decimals)
+
     def tojson(self, normalize=False, decimals=5):
         """Deprecated version of to_json()."""
         LOGGER.warning("WARNING ⚠️ 'result.tojson()' is deprecated, replace with 'result.to_json()'.")
         return self.to_json(normalize, decimals)
 
-    def to_json(self, normalize=False, decimals=5):
+    def to_json(self, normalize=False, decimals=5, columns=False):
         """
         Converts detection results to JSON format.
 
@@ -914,6 +982,8 @@ class Results(SimpleClass):
             normalize (bool): Whether to normalize the bounding box coordinates by the image dimensions.
                 If True, coordinates will be returned as float values between 0 and 1. Defaults to False.
             decimals (int): Number of decimal places to round the output values to. Defaults to 5.
+            columns (bool): Whether to emit compact columnar JSON from to_columns() instead of an indented list of
+                per-detection objects. Masks and keypoints are not included in columnar output. Defaults to False.
 
         Returns:
             (str): A JSON string containing the serialized detection results.
@@ -933,6 +1003,8 @@ class Results(SimpleClass):
         """
         import json
 
+        if columns:
+            return json.dumps(self.to_columns(normalize=normalize, decimals=decimals), separators=(",", ":"))
         return json.dumps(self.summary(normalize=normalize, decimals=decimals), indent=2)
 
 
@@ -1153,6 +1225,34 @@ class Boxes(BaseTensor):
         xywh[..., [1, 3]] /= self.orig_shape[0]
         return xywh
 
+    def columns(self, names, normalize=False, decimals=None):
+        """
+        Returns all boxes as columnar Python lists, converting the data to NumPy once.
+
+        Iterating over Boxes creates a new Boxes object and several tensor slices per detection; this method instead
+        converts whole columns with a single tolist() call each.
+
+        Args:
+            names (Dict[int, str]): Class index to name mapping, usually Results.names.
+            normalize (bool): Whether to return xyxy coordinates normalized by orig_shape. Defaults to False.
+            decimals (int | None): Number of decimal places to round confidences and coordinates to, None keeps full
+                precision. Defaults to None.
+
+        Returns:
+            (Dict[str, List]): Lists 'names', 'classes', 'confidences', 'boxes' ([x1, y1, x2, y2]) and, when tracking,
+                'track_ids', all indexed by detection.
+
+        Examples:
+            >>> boxes = Boxes(torch.tensor([[100, 50, 150, 100, 0.9, 0]]), orig_shape=(480, 640))
+            >>> boxes.columns({0: "crack"})
+            {'names': ['crack'], 'classes': [0], 'confidences': [0.8999999761581421], 'boxes': [[100.0, 50.0, 150.0, 100.0]]}
+        """
+        data = self.data.cpu().numpy() if isinstance(self.data, torch.Tensor) else self.data
+        coords = data[:, :4]
+        if normalize:
+            coords = coords / np.tile(self.orig_shape[::-1], 2)
+        return columnize(names, data[:, -1], data[:, -2], coords, data[:, -3] if self.is_track else None, decimals)
+
 
 class Masks(BaseTensor):
     """
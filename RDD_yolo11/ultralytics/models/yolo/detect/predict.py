@@ -1,5 +1,7 @@
 # Ultralytics YOLO 🚀, AGPL-3.0 license
 
+import torch
+
 from ultralytics.engine.predictor import BasePredictor
 from ultralytics.engine.results import Results
 from ultralytics.utils import ops
@@ -39,3 +41,113 @@ class DetectionPredictor(BasePredictor):
             pred[:, :4] = ops.scale_boxes(img.shape[2:], pred[:, :4], orig_img.shape)
             results.append(Results(orig_img, path=img_path, names=self.model.names, boxes=pred))
         return results
+
+    def tiled(self, im0s):
+        """Returns True if 'tile' is set and the batch holds an image larger than one slice."""
+        return (
+            self.args.tile > 0
+            and self.args.task == "detect"  # masks, keypoints and rotated boxes are not merged across slices
+            and not self.args.embed
+            and isinstance(im0s, list)
+            and any(max(im0.shape[:2]) > self.args.tile for im0 in im0s)
+        )
+
+    @staticmethod
+    def slice_origins(shape, tile, overlap):
+        """
+        Returns the top-left (x, y) corners of overlapping slices covering an image.
+
+        Args:
+            shape (tuple): Image (height, width).
+            tile (int): Slice size in pixels, slices are clipped to the image when it is smaller.
+            overlap (float): Overlap of neighbouring slices as a fraction of the slice size.
+
+        Returns:
+            (List[Tuple[int, int]]): Slice corners, the last slice of each row and column is aligned to the image edge.
+        """
+        stride = max(int(tile * (1 - overlap)), 1)
+        starts = []
+        for size in shape:
+            last = max(size - tile, 0)
+            starts.append(sorted(set(range(0, last, stride)) | {last}))
+        return [(x, y) for y in starts[0] for x in starts[1]]
+
+    def infer_slices(self, crops, offsets, profilers):
+        """Infers a batch of same-sized crops and returns their NMS detections shifted to image coordinates."""
+        with profilers[0]:
+            im = self.preprocess(crops)
+        with profilers[1]:
+            preds = self.inference(im)
+        with profilers[2]:
+            preds = ops.non_max_suppression(
+                preds,
+                self.args.conf,
+                self.args.iou,
+                agnostic=self.args.agnostic_nms,
+                max_det=self.args.max_det,
+                classes=self.args.classes,
+            )
+            for pred, crop, (x, y) in zip(preds, crops, offsets):
+                pred[:, :4] = ops.scale_boxes(im.shape[2:], pred[:, :4], crop.shape)
+                pred[:, [0, 2]] += x
+                pred[:, [1, 3]] += y
+        return preds
+
+    def merge_slices(self, dets, shape):
+        """
+        Merges detections of overlapping slices with class-aware NMS.
+
+        Args:
+            dets (torch.Tensor): Detections (n, 6) as x1, y1, x2, y2, conf, cls in image coordinates.
+            shape (tuple): Image (height, width), used to keep the class offsets of batched NMS apart.
+
+        Returns:
+            (torch.Tensor): Kept detections (m, 6) sorted by confidence.
+        """
+        if not len(dets):
+            return dets
+        # Rebuild the (1, 4 + nc, n) raw prediction layout with each box scoring only its own class
+        scores = torch.zeros((len(dets), len(self.model.names)), device=dets.device, dtype=dets.dtype)
+        scores[torch.arange(len(dets), device=dets.device), dets[:, 5].long()] = dets[:, 4]
+        pred = torch.cat((ops.xyxy2xywh(dets[:, :4]), scores), 1).T[None]
+        return ops.non_max_suppression(
+            pred,
+            self.args.conf,
+            self.args.iou,
+            agnostic=self.args.agnostic_nms,
+            max_det=self.args.max_det,
+            max_wh=max(7680, *shape),
+        )[0]
+
+    def tiled_inference(self, paths, im0s, profilers):
+        """
+        Runs sliced inference so that small objects in high-resolution images keep their native resolution.
+
+        Every image is cut into overlapping 'tile' x 'tile' slices that are letterboxed to 'imgsz' and inferred
+        'tile_batch' at a time, letting the backend spread each forward pass over all CPU threads or the GPU. Slice
+        detections are shifted to image coordinates and merged with class-aware NMS, together with the detections of a
+        coarse full-image pass when 'tile_coarse' is set, which finds objects larger than a slice.
+
+        Args:
+            paths (List[str]): Image paths of the batch.
+            im0s (List[np.ndarray]): Original BGR images of the batch.
+            profilers (tuple): Preprocess, inference and postprocess profilers accumulating the time of all slices.
+
+        Returns:
+            (List[Results]): One result per image.
+        """
+        results = []
+        for path, im0 in zip(paths, im0s):
+            tile = self.args.tile
+            origins = self.slice_origins(im0.shape[:2], tile, self.args.tile_overlap)
+            dets = []
+            for i in range(0, len(origins), self.args.tile_batch):
+                offsets = origins[i : i + self.args.tile_batch]
+                crops = [im0[y : y + tile, x : x + tile] for x, y in offsets]
+                dets.extend(self.infer_slices(crops, offsets, profilers))
+            if self.args.tile_coarse:
+                dets.extend(self.infer_slices([im0], [(0, 0)], profilers))
+            with profilers[2]:
+                boxes = self.merge_slices(torch.cat(dets), im0.shape[:2])
+            results.append(Results(im0, path=path, names=self.model.names, boxes=boxes))
+        return results
@@ -33,6 +33,7 @@ class BOTrack(STrack):
         re_activate(new_track, frame_id, new_id): Reactivates a track with updated features and optionally new ID.
         update(new_track, frame_id): Update the YOLOv8 instance with new track and frame ID.
         tlwh: Property that gets the current position in tlwh format `(top left x, top left y, width, height)`.
+        mean_to_tlwh(mean): Converts stacked xywh state means to tlwh format.
         multi_predict(stracks): Predicts the mean and covariance of multiple object tracks using shared Kalman filter.
         convert_coords(tlwh): Converts tlwh bounding box coordinates to xywh format.
         tlwh_to_xywh(tlwh): Convert bounding box to xywh format `(center x, center y, width, height)`.
@@ -46,6 +47,7 @@ class BOTrack(STrack):
     """
 
     shared_kalman = KalmanFilterXYWH()
+    lost_velocity = [6, 7]
 
     def __init__(self, tlwh, score, cls, feat=None, feat_history=50):
         """
@@ -116,6 +118,13 @@ class BOTrack(STrack):
         ret[:2] -= ret[2:] / 2
         return ret
 
+    @staticmethod
+    def mean_to_tlwh(mean):
+        """Converts (N, 8) xywh state means to (N, 4) tlwh boxes, the vectorized form of the `tlwh` property."""
+        ret = mean[:, :4].copy()
+        ret[:, :2] -= ret[:, 2:] / 2
+        return ret
+
     @staticmethod
     def multi_predict(stracks):
         """Predicts the mean and covariance for multiple object tracks using a shared Kalman filter."""
@@ -138,9 +147,9 @@ class BOTrack(STrack):
 
     @staticmethod
     def tlwh_to_xywh(tlwh):
-        """Convert bounding box from tlwh (top-left-width-height) to xywh (center-x-center-y-width-height) format."""
+        """Convert tlwh (top-left-width-height) boxes, single or (N, 4), to xywh (center-x-center-y-width-height)."""
         ret = np.asarray(tlwh).copy()
-        ret[:2] += ret[2:] / 2
+        ret[..., :2] += ret[..., 2:] / 2
         return ret
 
 
@@ -158,19 +167,20 @@ class BOTSORT(BYTETracker):
     Methods:
         get_kalmanfilter(): Returns an instance of KalmanFilterXYWH for object tracking.
         init_track(dets, scores, cls, img): Initialize track with detections, scores, and classes.
-        get_dists(tracks, detections): Get distances between tracks and detections using IoU and (optionally) ReID.
-        multi_predict(tracks): Predict and track multiple objects with YOLOv8 model.
+        get_dists(rows, detections): Get distances between table rows and detections using IoU and (optionally) ReID.
 
     Examples:
         Initialize BOTSORT and process detections
         >>> bot_sort = BOTSORT(args, frame_rate=30)
         >>> bot_sort.init_track(dets, scores, cls, img)
-        >>> bot_sort.multi_predict(tracks)
+        >>> bot_sort.multi_predict(rows)
 
     Note:
         The class is designed to work with the YOLOv8 object detection model and supports ReID only if enabled via args.
     """
 
+    track_class = BOTrack
+
     def __init__(self, args, frame_rate=30):
         """
         Initialize YOLOv8 object with ReID module and GMC algorithm.
@@ -208,25 +218,21 @@ class BOTSORT(BYTETracker):
         else:
             return [BOTrack(xyxy, s, c) for (xyxy, s, c) in zip(dets, scores, cls)]  # detections
 
-    def get_dists(self, tracks, detections):
-        """Calculates distances between tracks and detections using IoU and optionally ReID embeddings."""
-        dists = matching.iou_distance(tracks, detections)
+    def get_dists(self, rows, detections):
+        """Calculates distances between table rows and detections using IoU and optionally ReID embeddings."""
+        dists = matching.iou_distance(self.table.boxes(rows), self.detection_boxes(detections))
         dists_mask = dists > self.proximity_thresh
 
         if self.args.fuse_score:
             dists = matching.fuse_score(dists, detections)
 
         if self.args.with_reid and self.encoder is not None:
-            emb_dists = matching.embedding_distance(tracks, detections) / 2.0
+            emb_dists = matching.embedding_distance(self.table.tracks[rows], detections) / 2.0
             emb_dists[emb_dists > self.appearance_thresh] = 1.0
             emb_dists[dists_mask] = 1.0
             dists = np.minimum(dists, emb_dists)
         return dists
 
-    def multi_predict(self, tracks):
-        """Predicts the mean and covariance of multiple object tracks using a shared Kalman filter."""
-        BOTrack.multi_predict(tracks)
-
     def reset(self):
         """Resets the BOTSORT tracker to its initial state, clearing all tracked objects and internal states."""
         super().reset()
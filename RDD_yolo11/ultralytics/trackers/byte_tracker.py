@@ -5,6 +5,7 @@ import numpy as np
 from ..utils import LOGGER
 from ..utils.ops import xywh2ltwh
 from .basetrack import BaseTrack, TrackState
+from .track_table import TrackTable, join_rows, sub_rows
 from .utils import matching
 from .utils.kalman_filter import KalmanFilterXYAH
 
@@ -29,6 +30,11 @@ class STrack(BaseTrack):
         idx (int): Index or identifier for the object.
         frame_id (int): Current frame ID.
         start_frame (int): Frame where the object was first detected.
+        lost_velocity (List[int]): State dimensions whose velocity is reset before predicting a track that is not
+            tracked.
+
+    Once activated, the track's state is stored in a row of the tracker's TrackTable and its attributes read and
+    write that row.
 
     Methods:
         predict(): Predict the next state of the object using Kalman filter.
@@ -39,6 +45,7 @@ class STrack(BaseTrack):
         update(new_track, frame_id): Update the state of a matched track.
         convert_coords(tlwh): Convert bounding box to x-y-aspect-height format.
         tlwh_to_xyah(tlwh): Convert tlwh bounding box to xyah format.
+        mean_to_tlwh(mean): Convert stacked state means to tlwh bounding boxes.
 
     Examples:
         Initialize and activate a new track
@@ -47,6 +54,7 @@ class STrack(BaseTrack):
     """
 
     shared_kalman = KalmanFilterXYAH()
+    lost_velocity = [7]
 
     def __init__(self, xywh, score, cls):
         """
@@ -191,6 +199,14 @@ class STrack(BaseTrack):
         ret[:2] -= ret[2:] / 2
         return ret
 
+    @staticmethod
+    def mean_to_tlwh(mean):
+        """Converts (N, 8) xyah state means to (N, 4) tlwh boxes, the vectorized form of the `tlwh` property."""
+        ret = mean[:, :4].copy()
+        ret[:, 2] *= ret[:, 3]
+        ret[:, :2] -= ret[:, 2:] / 2
+        return ret
+
     @property
     def xyxy(self):
         """Converts bounding box from (top left x, top left y, width, height) to (min x, min y, max x, max y) format."""
@@ -200,10 +216,10 @@ class STrack(BaseTrack):
 
     @staticmethod
     def tlwh_to_xyah(tlwh):
-        """Convert bounding box from tlwh format to center-x-center-y-aspect-height (xyah) format."""
+        """Convert bounding box from tlwh format to center-x-center-y-aspect-height (xyah) format, also for (N, 4)."""
         ret = np.asarray(tlwh).copy()
-        ret[:2] += ret[2:] / 2
-        ret[2] /= ret[3]
+        ret[..., :2] += ret[..., 2:] / 2
+        ret[..., 2] /= ret[..., 3]
         return ret
 
     @property
@@ -240,25 +256,33 @@ class BYTETracker:
     It maintains the state of tracked, lost, and removed tracks over frames, utilizes Kalman filtering for predicting
     the new object locations, and performs data association.
 
+    Live tracks are stored in a TrackTable (structure of arrays); the tracked and lost sets are arrays of table rows,
+    so prediction, set operations, duplicate removal and result assembly are vectorized over all tracks.
+
     Attributes:
+        table (TrackTable): Contiguous state of all tracked and lost tracks.
+        tracked (np.ndarray): Table rows of the tracked tracks, including unconfirmed ones.
+        lost (np.ndarray): Table rows of the lost tracks.
         tracked_stracks (List[STrack]): List of successfully activated tracks.
         lost_stracks (List[STrack]): List of lost tracks.
         removed_stracks (List[STrack]): List of removed tracks.
+        removed_ids (np.ndarray): Track IDs of removed_stracks.
         frame_id (int): The current frame ID.
         args (Namespace): Command-line arguments.
         max_time_lost (int): The maximum frames for a track to be considered as 'lost'.
         kalman_filter (KalmanFilterXYAH): Kalman Filter object.
+        track_class (type): Track class created by init_track().
 
     Methods:
         update(results, img=None): Updates object tracker with new detections.
+        propagate(): Advances tracks by one frame without detections.
         get_kalmanfilter(): Returns a Kalman filter object for tracking bounding boxes.
         init_track(dets, scores, cls, img=None): Initialize object tracking with detections.
-        get_dists(tracks, detections): Calculates the distance between tracks and detections.
-        multi_predict(tracks): Predicts the location of tracks.
+        get_dists(rows, detections): Calculates the distance between table rows and detections.
+        multi_predict(rows): Predicts the location of table rows.
         reset_id(): Resets the ID counter of STrack.
-        joint_stracks(tlista, tlistb): Combines two lists of stracks.
-        sub_stracks(tlista, tlistb): Filters out the stracks present in the second list from the first list.
-        remove_duplicate_stracks(stracksa, stracksb): Removes duplicate stracks based on IoU.
+        detection_boxes(detections): Returns the boxes of detections for IoU matching.
+        remove_duplicate_rows(rowsa, rowsb): Removes duplicate rows based on IoU.
 
     Examples:
         Initialize BYTETracker and update with detection results
@@ -267,6 +291,8 @@ class BYTETracker:
         >>> tracked_objects = tracker.update(results)
     """
 
+    track_class = STrack
+
     def __init__(self, args, frame_rate=30):
         """
         Initialize a BYTETracker instance for object tracking.
@@ -280,9 +306,11 @@ class BYTETracker:
             >>> args = Namespace(track_buffer=30)
             >>> tracker = BYTETracker(args, frame_rate=30)
         """
-        self.tracked_stracks = []  # type: list[STrack]
-        self.lost_stracks = []  # type: list[STrack]
+        self.table = TrackTable(self.track_class)
+        self.tracked = np.empty(0, dtype=int)
+        self.lost = np.empty(0, dtype=int)
         self.removed_stracks = []  # type: list[STrack]
+        self.removed_ids = np.empty(0, dtype=int)
 
         self.frame_id = 0
         self.args = args
@@ -290,13 +318,22 @@ class BYTETracker:
         self.kalman_filter = self.get_kalmanfilter()
         self.reset_id()
 
+    @property
+    def tracked_stracks(self):
+        """Returns the tracked tracks, including unconfirmed ones, as a list of track objects."""
+        return self.table.tracks[self.tracked].tolist()
+
+    @property
+    def lost_stracks(self):
+        """Returns the lost tracks as a list of track objects."""
+        return self.table.tracks[self.lost].tolist()
+
     def update(self, results, img=None):
         """Updates the tracker with new detections and returns the current list of tracked objects."""
         self.frame_id += 1
-        activated_stracks = []
-        refind_stracks = []
-        lost_stracks = []
-        removed_stracks = []
+        table = self.table
+        activated = []
+        refind = []
 
         scores = results.conf
         bboxes = results.xywhr if hasattr(results, "xywhr") else results.xywh
@@ -318,91 +355,92 @@ class BYTETracker:
 
         detections = self.init_track(dets, scores_keep, cls_keep, img)
         # Add newly detected tracklets to tracked_stracks
-        unconfirmed = []
-        tracked_stracks = []  # type: list[STrack]
-        for track in self.tracked_stracks:
-            if not track.is_activated:
-                unconfirmed.append(track)
-            else:
-                tracked_stracks.append(track)
+        confirmed = table.is_activated[self.tracked]
+        unconfirmed = self.tracked[~confirmed]
         # Step 2: First association, with high score detection boxes
-        strack_pool = self.joint_stracks(tracked_stracks, self.lost_stracks)
+        strack_pool = join_rows(self.tracked[confirmed], self.lost)
         # Predict the current location with KF
         self.multi_predict(strack_pool)
         if hasattr(self, "gmc") and img is not None:
             warp = self.gmc.apply(img, dets)
-            STrack.multi_gmc(strack_pool, warp)
-            STrack.multi_gmc(unconfirmed, warp)
+            table.gmc(strack_pool, warp)
+            table.gmc(unconfirmed, warp)
 
         dists = self.get_dists(strack_pool, detections)
         matches, u_track, u_detection = matching.linear_assignment(dists, thresh=self.args.match_thresh)
-
-        for itracked, idet in matches:
-            track = strack_pool[itracked]
-            det = detections[idet]
-            if track.state == TrackState.Tracked:
-                track.update(det, self.frame_id)
-                activated_stracks.append(track)
-            else:
-                track.re_activate(det, self.frame_id, new_id=False)
-                refind_stracks.append(track)
+        self.apply_matches(strack_pool, detections, matches, activated, refind)
         # Step 3: Second association, with low score detection boxes association the untrack to the low score detections
         detections_second = self.init_track(dets_second, scores_second, cls_second, img)
-        r_tracked_stracks = [strack_pool[i] for i in u_track if strack_pool[i].state == TrackState.Tracked]
+        r_tracked = strack_pool[np.asarray(u_track, dtype=int)]
+        r_tracked = r_tracked[table.state[r_tracked] == TrackState.Tracked]
         # TODO
-        dists = matching.iou_distance(r_tracked_stracks, detections_second)
+        dists = matching.iou_distance(table.boxes(r_tracked), self.detection_boxes(detections_second))
         matches, u_track, u_detection_second = matching.linear_assignment(dists, thresh=0.5)
-        for itracked, idet in matches:
-            track = r_tracked_stracks[itracked]
-            det = detections_second[idet]
-            if track.state == TrackState.Tracked:
-                track.update(det, self.frame_id)
-                activated_stracks.append(track)
-            else:
-                track.re_activate(det, self.frame_id, new_id=False)
-                refind_stracks.append(track)
-
-        for it in u_track:
-            track = r_tracked_stracks[it]
-            if track.state != TrackState.Lost:
-                track.mark_lost()
-                lost_stracks.append(track)
+        self.apply_matches(r_tracked, detections_second, matches, activated, refind)
+
+        lost = r_tracked[np.asarray(u_track, dtype=int)]
+        lost = lost[table.state[lost] != TrackState.Lost]
+        table.state[lost] = TrackState.Lost
         # Deal with unconfirmed tracks, usually tracks with only one beginning frame
         detections = [detections[i] for i in u_detection]
         dists = self.get_dists(unconfirmed, detections)
         matches, u_unconfirmed, u_detection = matching.linear_assignment(dists, thresh=0.7)
-        for itracked, idet in matches:
-            unconfirmed[itracked].update(detections[idet], self.frame_id)
-            activated_stracks.append(unconfirmed[itracked])
-        for it in u_unconfirmed:
-            track = unconfirmed[it]
-            track.mark_removed()
-            removed_stracks.append(track)
+        self.apply_matches(unconfirmed, detections, matches, activated, refind)
+        removed = unconfirmed[np.asarray(u_unconfirmed, dtype=int)]
         # Step 4: Init new stracks
-        for inew in u_detection:
-            track = detections[inew]
-            if track.score < self.args.new_track_thresh:
-                continue
-            track.activate(self.kalman_filter, self.frame_id)
-            activated_stracks.append(track)
+        new = [detections[i] for i in u_detection if detections[i].score >= self.args.new_track_thresh]
+        activated.extend(table.activate(new, self.kalman_filter, self.frame_id))
         # Step 5: Update state
-        for track in self.lost_stracks:
-            if self.frame_id - track.end_frame > self.max_time_lost:
-                track.mark_removed()
-                removed_stracks.append(track)
-
-        self.tracked_stracks = [t for t in self.tracked_stracks if t.state == TrackState.Tracked]
-        self.tracked_stracks = self.joint_stracks(self.tracked_stracks, activated_stracks)
-        self.tracked_stracks = self.joint_stracks(self.tracked_stracks, refind_stracks)
-        self.lost_stracks = self.sub_stracks(self.lost_stracks, self.tracked_stracks)
-        self.lost_stracks.extend(lost_stracks)
-        self.lost_stracks = self.sub_stracks(self.lost_stracks, self.removed_stracks)
-        self.tracked_stracks, self.lost_stracks = self.remove_duplicate_stracks(self.tracked_stracks, self.lost_stracks)
-        self.removed_stracks.extend(removed_stracks)
+        expired = self.lost[self.frame_id - table.frame_id[self.lost] > self.max_time_lost]
+        removed = np.concatenate((removed, expired))
+        table.state[removed] = TrackState.Removed
+
+        tracked = self.tracked[table.state[self.tracked] == TrackState.Tracked]
+        tracked = join_rows(tracked, np.asarray(activated, dtype=int))
+        tracked = join_rows(tracked, np.asarray(refind, dtype=int))
+        lost = np.concatenate((sub_rows(self.lost, tracked), lost))
+        # Only tracks removed in earlier frames are dropped, tracks removed now stay lost until the next frame
+        lost = lost[~np.isin(table.track_id[lost], self.removed_ids)]
+        self.tracked, self.lost = self.remove_duplicate_rows(tracked, lost)
+        self.removed_stracks.extend(table.tracks[removed])
+        self.removed_ids = np.concatenate((self.removed_ids, table.track_id[removed]))
         if len(self.removed_stracks) > 1000:
             self.removed_stracks = self.removed_stracks[-999:]  # clip remove stracks to 1000 maximum
+            self.removed_ids = self.removed_ids[-999:]
+
+        # Tracks that left both sets become plain objects again and free their rows
+        stale = table.used.copy()
+        stale[self.tracked] = False
+        stale[self.lost] = False
+        table.release(np.flatnonzero(stale))
 
-        return np.asarray([x.result for x in self.tracked_stracks if x.is_activated], dtype=np.float32)
+        return table.results(self.tracked[table.is_activated[self.tracked]])
+
+    def apply_matches(self, rows, detections, matches, activated, refind):
+        """Updates all matched rows with their detections in one batch and collects them as activated or refound."""
+        if not len(matches):
+            return
+        matches = np.asarray(matches)
+        rows = rows[matches[:, 0]]
+        lost = self.table.state[rows] != TrackState.Tracked
+        self.table.update(rows, [detections[i] for i in matches[:, 1]], self.frame_id, refind=lost)
+        activated.extend(rows[~lost])
+        refind.extend(rows[lost])
+
+    def propagate(self):
+        """
+        Advances the tracker by one frame without detections, e.g. for a video frame skipped by adaptive sampling.
+
+        Tracked and lost tracks are moved by the Kalman filter prediction only, their states are unchanged, so the
+        next update() associates detections with the propagated positions.
+
+        Returns:
+            (np.ndarray): Activated tracks in the same format as update().
+        """
+        self.frame_id += 1
+        confirmed = self.tracked[self.table.is_activated[self.tracked]]
+        self.multi_predict(join_rows(confirmed, self.lost))
+        return self.table.results(confirmed)
 
     def get_kalmanfilter(self):
         """Returns a Kalman filter object for tracking bounding boxes using KalmanFilterXYAH."""
@@ -412,16 +450,27 @@ class BYTETracker:
         """Initializes object tracking with given detections, scores, and class labels using the STrack algorithm."""
         return [STrack(xyxy, s, c) for (xyxy, s, c) in zip(dets, scores, cls)] if len(dets) else []  # detections
 
-    def get_dists(self, tracks, detections):
-        """Calculates the distance between tracks and detections using IoU and optionally fuses scores."""
-        dists = matching.iou_distance(tracks, detections)
+    @staticmethod
+    def detection_boxes(detections):
+        """Returns the xyxy (or xywha for oriented boxes) boxes of detections that are not in the table yet."""
+        if not detections:
+            return np.empty((0, 4), dtype=np.float32)
+        if detections[0].angle is not None:
+            return np.asarray([det.xywha for det in detections])
+        tlwh = np.asarray([det._tlwh for det in detections])
+        tlwh[:, 2:] += tlwh[:, :2]
+        return tlwh
+
+    def get_dists(self, rows, detections):
+        """Calculates the distance between table rows and detections using IoU and optionally fuses scores."""
+        dists = matching.iou_distance(self.table.boxes(rows), self.detection_boxes(detections))
         if self.args.fuse_score:
             dists = matching.fuse_score(dists, detections)
         return dists
 
-    def multi_predict(self, tracks):
-        """Predict the next states for multiple tracks using Kalman filter."""
-        STrack.multi_predict(tracks)
+    def multi_predict(self, rows):
+        """Predict the next states for multiple table rows using Kalman filter."""
+        self.table.predict(rows)
 
     @staticmethod
     def reset_id():
@@ -430,47 +479,23 @@ class BYTETracker:
 
     def reset(self):
         """Resets the tracker by clearing all tracked, lost, and removed tracks and reinitializing the Kalman filter."""
-        self.tracked_stracks = []  # type: list[STrack]
-        self.lost_stracks = []  # type: list[STrack]
+        self.table = TrackTable(self.track_class)
+        self.tracked = np.empty(0, dtype=int)
+        self.lost = np.empty(0, dtype=int)
         self.removed_stracks = []  # type: list[STrack]
+        self.removed_ids = np.empty(0, dtype=int)
         self.frame_id = 0
         self.kalman_filter = self.get_kalmanfilter()
         self.reset_id()
 
-    @staticmethod
-    def joint_stracks(tlista, tlistb):
-        """Combines two lists of STrack objects into a single list, ensuring no duplicates based on track IDs."""
-        exists = {}
-        res = []
-        for t in tlista:
-            exists[t.track_id] = 1
-            res.append(t)
-        for t in tlistb:
-            tid = t.track_id
-            if not exists.get(tid, 0):
-                exists[tid] = 1
-                res.append(t)
-        return res
-
-    @staticmethod
-    def sub_stracks(tlista, tlistb):
-        """Filters out the stracks present in the second list from the first list."""
-        track_ids_b = {t.track_id for t in tlistb}
-        return [t for t in tlista if t.track_id not in track_ids_b]
-
-    @staticmethod
-    def remove_duplicate_stracks(stracksa, stracksb):
-        """Removes duplicate stracks from two lists based on Intersection over Union (IoU) distance."""
-        pdist = matching.iou_distance(stracksa, stracksb)
-        pairs = np.where(pdist < 0.15)
-        dupa, dupb = [], []
-        for p, q in zip(*pairs):
-            timep = stracksa[p].frame_id - stracksa[p].start_frame
-            timeq = stracksb[q].frame_id - stracksb[q].start_frame
-            if timep > timeq:
-                dupb.append(q)
-            else:
-                dupa.append(p)
-        resa = [t for i, t in enumerate(stracksa) if i not in dupa]
-        resb = [t for i, t in enumerate(stracksb) if i not in dupb]
-        return resa, resb
+    def remove_duplicate_rows(self, rowsa, rowsb):
+        """Removes duplicate rows from two row arrays based on IoU distance, keeping the longer-lived track."""
+        pdist = matching.iou_distance(self.table.boxes(rowsa), self.table.boxes(rowsb))
+        p, q = np.where(pdist < 0.15)
+        age = self.table.frame_id - self.table.start_frame
+        older = age[rowsa[p]] > age[rowsb[q]]
+        keepa = np.ones(len(rowsa), dtype=bool)
+        keepb = np.ones(len(rowsb), dtype=bool)
+        keepa[p[~older]] = False
+        keepb[q[older]] = False
+        return rowsa[keepa], rowsb[keepb]
@@ -74,6 +74,12 @@ def on_predict_postprocess_end(predictor: object, persist: bool = False) -> None
             tracker.reset()
             predictor.vid_path[i if is_stream else 0] = vid_path
 
+        if not predictor.keyframes[i]:
+            # Frame skipped by adaptive sampling: replace the held detections with the Kalman-propagated tracks
+            tracks = tracker.propagate()
+            boxes = torch.as_tensor(tracks[:, :-1]) if len(tracks) else torch.zeros((0, 8 if is_obb else 7))
+            predictor.results[i].update(**{"obb" if is_obb else "boxes": boxes})
+            continue
         det = (predictor.results[i].obb if is_obb else predictor.results[i].boxes).cpu().numpy()
         if len(det) == 0:
             continue
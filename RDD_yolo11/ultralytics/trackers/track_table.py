@@ -0,0 +1,365 @@
+# Ultralytics YOLO 🚀, AGPL-3.0 license
+"""Structure-of-arrays storage for the live tracks of a tracker."""
+
+import numpy as np
+
+from .basetrack import TrackState
+
+
+class TableColumn:
+    """
+    Data descriptor that reads and writes a track attribute in the TrackTable row of the track.
+
+    The descriptors are only defined on the row-backed subclass that `TrackTable.add` switches a track to (see
+    `row_class`), so detections and released tracks keep plain instance attributes with no lookup overhead.
+
+    Examples:
+        >>> Row = type("Row", (STrack,), {"score": TableColumn("score")})
+    """
+
+    def __init__(self, name):
+        """Binds the descriptor to the table column `name`."""
+        self.name = name
+
+    def __get__(self, track, owner=None):
+        """Returns the value stored in the table row of the track."""
+        if track is None:
+            return self
+        return track._table.get(self.name, track._row)
+
+    def __set__(self, track, value):
+        """Writes the value to the table row of the track."""
+        track._table.set(self.name, track._row, value)
+
+
+_row_classes = {}
+
+
+def row_class(track_class):
+    """Returns the cached subclass of `track_class` whose table attributes are TableColumn descriptors."""
+    if track_class not in _row_classes:
+        namespace = {name: TableColumn(name) for name in TrackTable.COLUMNS}
+        namespace.update(__doc__=track_class.__doc__, __module__=track_class.__module__, _base_class=track_class)
+        _row_classes[track_class] = type(track_class.__name__, (track_class,), namespace)
+    return _row_classes[track_class]
+
+
+class TrackTable:
+    """
+    Contiguous per-track state of all live tracks of one tracker, one row per track.
+
+    Kalman state, covariance, score, class, detection index, angle, ids, states and frame counters are kept in NumPy
+    arrays so that prediction, camera motion compensation, updates, activation, box conversion and result assembly run
+    as array operations on row indices instead of Python loops over track objects. The track objects remain as handles:
+    while a track is in the table its class is switched to `row_class(track_class)`, whose attributes read and write
+    the row, so per-object methods such as `STrack.mark_lost` keep working.
+
+    Kalman filters return float32 states from `initiate()` until the first predict or update. Those rows are flagged
+    and computed in float32 as the per-object code would. Matched rows are corrected together with
+    `KalmanFilterXYAH.multi_update`, which agrees with per-track `update` calls up to floating point rounding.
+
+    Attributes:
+        track_class (type): Track class stored in the table, provides `mean_to_tlwh`, `lost_velocity` and
+            `shared_kalman`.
+        columns (dict): Column name to array with one entry per row, also available as attributes, e.g. `table.mean`.
+        single (dict): Per-row flags of the state columns that hold float32 values.
+        tracks (np.ndarray): Object array with the track handle of each used row, None for free rows.
+        used (np.ndarray): Boolean mask of the rows that hold a track.
+
+    Methods:
+        add(track): Moves the attributes of a track into a free row.
+        activate(tracks, kalman_filter, frame_id): Starts new tracks from detections and adds them.
+        release(rows): Copies the rows back into their track objects and frees them.
+        update(rows, detections, frame_id, refind): Updates matched rows with their detections.
+        predict(rows): Kalman prediction of the given rows in one batch.
+        gmc(rows, H): Applies a homography to the state of the given rows.
+        boxes(rows): Returns xyxy (or xywha) boxes of the given rows.
+        results(rows): Returns tracker output rows `[coords..., track_id, score, cls, idx]`.
+
+    Examples:
+        >>> table = TrackTable(STrack)
+        >>> rows = table.activate(detections, KalmanFilterXYAH(), frame_id=1)
+        >>> table.predict(rows)
+    """
+
+    COLUMNS = {
+        "mean": (np.float64, (8,)),
+        "covariance": (np.float64, (8, 8)),
+        "track_id": (np.int64, ()),
+        "state": (np.int64, ()),
+        "is_activated": (np.bool_, ()),
+        "score": (np.float64, ()),
+        "cls": (np.float64, ()),
+        "idx": (np.float64, ()),
+        "angle": (np.float64, ()),
+        "frame_id": (np.int64, ()),
+        "start_frame": (np.int64, ()),
+        "tracklet_len": (np.int64, ()),
+    }
+    STATE_COLUMNS = ("mean", "covariance")  # columns that may hold float32 values returned by initiate()
+
+    def __init__(self, track_class, capacity=64):
+        """Creates an empty table for tracks of `track_class` with room for `capacity` rows before it grows."""
+        self.track_class = track_class
+        self.capacity = 0
+        self.columns = {name: np.zeros((0, *shape), dtype=dtype) for name, (dtype, shape) in self.COLUMNS.items()}
+        self.single = {name: np.zeros(0, dtype=bool) for name in self.STATE_COLUMNS}
+        self.tracks = np.empty(0, dtype=object)
+        self.used = np.zeros(0, dtype=bool)
+        self._free = []
+        self._grow(capacity)
+
+    def __getattr__(self, name):
+        """Exposes the columns as attributes, e.g. `table.mean`."""
+        columns = self.__dict__.get("columns")
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def __len__(self):
+        """Returns the number of used rows."""
+        return self.capacity - len(self._free)
+
+    def _grow(self, capacity):
+        """Reallocates all columns with at least `capacity` rows."""
+        capacity = max(capacity, 2 * self.capacity, 1)
+        old = self.capacity
+        for name, column in self.columns.items():
+            grown = np.zeros((capacity, *column.shape[1:]), dtype=column.dtype)
+            grown[:old] = column
+            self.columns[name] = grown
+        for name, flags in self.single.items():
+            self.single[name] = np.concatenate((flags, np.zeros(capacity - old, dtype=bool)))
+        self.tracks = np.concatenate((self.tracks, np.empty(capacity - old, dtype=object)))
+        self.used = np.concatenate((self.used, np.zeros(capacity - old, dtype=bool)))
+        self._free.extend(range(capacity - 1, old - 1, -1))  # pop() hands out the lowest row first
+        self.capacity = capacity
+
+    def _allocate(self, count):
+        """Returns `count` free rows, growing the table if needed."""
+        if len(self._free) < count:
+            self._grow(self.capacity + count)
+        rows = np.asarray([self._free.pop() for _ in range(count)], dtype=int)
+        self.used[rows] = True
+        return rows
+
+    def get(self, name, row):
+        """Returns one value of a row, state arrays in the dtype they were written with."""
+        value = self.columns[name][row]
+        if name in self.single and self.single[name][row]:
+            return value.astype(np.float32)
+        if name == "angle":
+            return None if np.isnan(value) else value
+        return value
+
+    def set(self, name, row, value):
+        """Writes one value of a row."""
+        if name in self.single:
+            self.single[name][row] = value.dtype == np.float32
+        elif name == "angle" and value is None:
+            value = np.nan
+        self.columns[name][row] = value
+
+    def _attach(self, track, row):
+        """Switches `track` to its row-backed class so that its table attributes read and write `row`."""
+        for name in self.COLUMNS:
+            track.__dict__.pop(name, None)
+        track._table, track._row = self, row
+        track.__class__ = row_class(type(track))
+        self.tracks[row] = track
+
+    def add(self, track):
+        """Moves the table attributes of `track` into a free row and returns the row index."""
+        row = self._allocate(1)[0]
+        values = track.__dict__
+        for name in self.COLUMNS:
+            self.set(name, row, values[name])
+        self._attach(track, row)
+        return row
+
+    def activate(self, tracks, kalman_filter, frame_id):
+        """
+        Starts new tracks from unmatched detections, the batched form of `STrack.activate` followed by `add`.
+
+        Returns:
+            (np.ndarray): Rows of the new tracks, in the order of `tracks`.
+        """
+        rows = self._allocate(len(tracks))
+        if not len(tracks):
+            return rows
+        columns = self.columns
+        states = [kalman_filter.initiate(m) for m in tracks[0].convert_coords(detection_tlwh(tracks))]
+        for name, state in zip(self.STATE_COLUMNS, zip(*states)):
+            columns[name][rows] = state
+            self.single[name][rows] = state[0].dtype == np.float32
+        columns["track_id"][rows] = [track.next_id() for track in tracks]
+        columns["state"][rows] = TrackState.Tracked
+        columns["is_activated"][rows] = frame_id == 1
+        columns["frame_id"][rows] = frame_id
+        columns["start_frame"][rows] = frame_id
+        columns["tracklet_len"][rows] = 0
+        self._set_detection(rows, tracks)
+        for track, row in zip(tracks, rows):
+            track.kalman_filter = kalman_filter
+            self._attach(track, row)
+        return rows
+
+    def update(self, rows, detections, frame_id, refind):
+        """
+        Updates matched rows with their detections, the batched form of `STrack.update` and `STrack.re_activate`.
+
+        All Kalman corrections run in one `multi_update` call, split only by the float32 flag of the row means.
+
+        Args:
+            rows (np.ndarray): Matched table rows.
+            detections (List[STrack]): Detection matched to each row.
+            frame_id (int): The ID of the current frame.
+            refind (np.ndarray): Boolean mask of the rows that are re-activated instead of updated.
+        """
+        if not len(rows):
+            return
+        for row, detection in zip(rows, detections):
+            feat = getattr(detection, "curr_feat", None)
+            if feat is not None:
+                self.tracks[row].update_features(feat)
+        measurements = self.tracks[rows[0]].convert_coords(detection_tlwh(detections))
+        single = self.single["mean"][rows]
+        for group in (~single, single):  # rows with float32 states are projected in float32 like per-track updates
+            if group.any():
+                mean, covariance = self.stack(rows[group])
+                mean, covariance = self.track_class.shared_kalman.multi_update(mean, covariance, measurements[group])
+                self._set_state(rows[group], mean, covariance)
+        columns = self.columns
+        columns["tracklet_len"][rows] = np.where(refind, 0, columns["tracklet_len"][rows] + 1)
+        columns["state"][rows] = TrackState.Tracked
+        columns["is_activated"][rows] = True
+        columns["frame_id"][rows] = frame_id
+        self._set_detection(rows, detections)
+
+    def _set_detection(self, rows, detections):
+        """Copies score, class, angle and detection index of the detections into the given rows."""
+        columns = self.columns
+        columns["score"][rows] = [det.score for det in detections]
+        columns["cls"][rows] = [det.cls for det in detections]
+        columns["idx"][rows] = [det.idx for det in detections]
+        columns["angle"][rows] = [np.nan if det.angle is None else det.angle for det in detections]
+
+    def release(self, rows):
+        """Copies the given rows back into their track objects, frees the rows and returns the tracks."""
+        tracks = []
+        for row in rows:
+            track = self.tracks[row]
+            for name in self.COLUMNS:
+                value = self.get(name, row)
+                track.__dict__[name] = value.copy() if isinstance(value, np.ndarray) else value
+            track.__class__ = track._base_class
+            track._table, track._row = None, None
+            self.tracks[row] = None
+            tracks.append(track)
+        self.used[rows] = False
+        self._free.extend(int(row) for row in rows)
+        return tracks
+
+    def predict(self, rows):
+        """Runs the Kalman prediction for all given rows in one batch, freezing the velocity of non-tracked rows."""
+        if len(rows) == 0:
+            return
+        mean, covariance = self.stack(rows)
+        mean[np.ix_(self.columns["state"][rows] != TrackState.Tracked, self.track_class.lost_velocity)] = 0
+        mean, covariance = self.track_class.shared_kalman.multi_predict(mean, covariance)
+        self._set_state(rows, mean, covariance)
+
+    def stack(self, rows):
+        """
+        Returns copies of the state mean and covariance of the given rows.
+
+        Like `np.asarray` over the per-track arrays, the stack is float32 only when all rows hold float32 values.
+        """
+        states = []
+        for name in self.STATE_COLUMNS:
+            state = self.columns[name][rows]
+            states.append(state.astype(np.float32) if self.single[name][rows].all() else state)
+        return states
+
+    def gmc(self, rows, H=np.eye(2, 3)):
+        """Applies the camera motion homography `H` to the state mean and covariance of the given rows."""
+        if len(rows) == 0:
+            return
+        R8x8 = np.kron(np.eye(4, dtype=float), H[:2, :2])
+        mean = (R8x8 @ self.columns["mean"][rows, :, None])[..., 0]  # same products as R8x8.dot(mean) per track
+        mean[:, :2] += H[:2, 2]
+        covariance = R8x8 @ self.columns["covariance"][rows] @ R8x8.T
+        self._set_state(rows, mean, covariance)
+
+    def _set_state(self, rows, mean, covariance):
+        """Writes float64 Kalman states of the given rows."""
+        self.columns["mean"][rows] = mean
+        self.columns["covariance"][rows] = covariance
+        for flags in self.single.values():
+            flags[rows] = False
+
+    def tlwh(self, rows):
+        """Returns the tlwh boxes of the given rows, rows still holding float32 states are converted in float32."""
+        mean = self.columns["mean"][rows]
+        tlwh = self.track_class.mean_to_tlwh(mean)
+        single = self.single["mean"][rows]
+        if single.any():
+            tlwh[single] = self.track_class.mean_to_tlwh(mean[single].astype(np.float32))
+        return tlwh, single
+
+    def boxes(self, rows):
+        """Returns xyxy boxes of the given rows, or xywha boxes for oriented tracks, as used for IoU matching."""
+        tlwh, single = self.tlwh(rows)
+        angle = self.columns["angle"][rows]
+        if len(rows) and not np.isnan(angle).any():
+            return np.concatenate((tlwh_to_xywh(tlwh, single), angle[:, None]), axis=1)
+        return tlwh_to_xyxy(tlwh, single)
+
+    def results(self, rows):
+        """Returns the tracker output `[x1, y1, x2, y2 (or xywha), track_id, score, cls, idx]` of the given rows."""
+        if len(rows) == 0:
+            return np.asarray([], dtype=np.float32)
+        columns = self.columns
+        coords = self.boxes(rows)
+        extra = [columns[name][rows, None] for name in ("track_id", "score", "cls", "idx")]
+        return np.concatenate([coords, *extra], axis=1, dtype=np.float64).astype(np.float32)
+
+
+def tlwh_to_xyxy(tlwh, single=None):
+    """Converts (N, 4) tlwh boxes to xyxy, rows flagged in `single` are added in float32 like the per-track code."""
+    ret = tlwh.copy()
+    ret[:, 2:] += ret[:, :2]
+    if single is not None and single.any():
+        ret32 = tlwh[single].astype(np.float32)
+        ret32[:, 2:] += ret32[:, :2]
+        ret[single] = ret32
+    return ret
+
+
+def tlwh_to_xywh(tlwh, single=None):
+    """Converts (N, 4) tlwh boxes to center xywh, rows flagged in `single` are computed in float32."""
+    ret = tlwh.copy()
+    ret[:, :2] += ret[:, 2:] / 2
+    if single is not None and single.any():
+        ret32 = tlwh[single].astype(np.float32)
+        ret32[:, :2] += ret32[:, 2:] / 2
+        ret[single] = ret32
+    return ret
+
+
+def detection_tlwh(detections):
+    """Stacks the tlwh boxes of detections that have no Kalman state yet into an (N, 4) float32 array."""
+    return np.asarray([det._tlwh for det in detections])
+
+
+def join_rows(a, b):
+    """Rows of `a` followed by the rows of `b` that are not in `a`, keeping order and dropping duplicates."""
+    if len(b) == 0:
+        return a
+    b = b[np.sort(np.unique(b, return_index=True)[1])]
+    return np.concatenate((a, b[~np.isin(b, a)]))
+
+
+def sub_rows(a, b):
+    """Rows of `a` that are not in `b`, keeping order."""
+    return a[~np.isin(a, b)] if len(a) and len(b) else a
@@ -24,7 +24,9 @@ class KalmanFilterXYAH:
         predict: Runs the Kalman filter prediction step.
         project: Projects the state distribution to measurement space.
         multi_predict: Runs the Kalman filter prediction step (vectorized version).
+        multi_project: Projects multiple state distributions to measurement space (vectorized version).
         update: Runs the Kalman filter correction step.
+        multi_update: Runs the Kalman filter correction step for multiple states (vectorized version).
         gating_distance: Computes the gating distance between state distribution and measurements.
 
     Examples:
@@ -203,6 +205,36 @@ class KalmanFilterXYAH:
 
         return mean, covariance
 
+    def multi_project(self, mean: np.ndarray, covariance: np.ndarray) -> tuple:
+        """
+        Project multiple state distributions to measurement space (Vectorized version).
+
+        Args:
+            mean (ndarray): The Nx8 dimensional mean matrix of the object states.
+            covariance (ndarray): The Nx8x8 covariance matrix of the object states.
+
+        Returns:
+            (tuple[ndarray, ndarray]): Returns the projected mean matrix of shape (N, 4) and covariance matrix of
+                shape (N, 4, 4).
+
+        Examples:
+            >>> kf = KalmanFilterXYAH()
+            >>> mean = np.random.rand(10, 8)  # 10 object states
+            >>> covariance = np.tile(np.eye(8), (10, 1, 1))
+            >>> projected_mean, projected_covariance = kf.multi_project(mean, covariance)
+        """
+        std = [
+            self._std_weight_position * mean[:, 3],
+            self._std_weight_position * mean[:, 3],
+            np.full(len(mean), 1e-1),
+            self._std_weight_position * mean[:, 3],
+        ]
+        innovation_cov = np.square(np.r_[std]).T[:, :, None] * np.eye(4)
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = self._update_mat @ covariance @ self._update_mat.T
+        return mean, covariance + innovation_cov
+
     def update(self, mean: np.ndarray, covariance: np.ndarray, measurement: np.ndarray) -> tuple:
         """
         Run Kalman filter correction step.
@@ -235,6 +267,43 @@ class KalmanFilterXYAH:
         new_covariance = covariance - np.linalg.multi_dot((kalman_gain, projected_cov, kalman_gain.T))
         return new_mean, new_covariance
 
+    def multi_update(self, mean: np.ndarray, covariance: np.ndarray, measurement: np.ndarray) -> tuple:
+        """
+        Run Kalman filter correction step for multiple object states (Vectorized version).
+
+        Uses batched Cholesky factorizations of the projected covariances instead of one `scipy.linalg.cho_factor`
+        call per track, the results match `update` applied to each state up to floating point rounding.
+
+        Args:
+            mean (ndarray): The Nx8 dimensional mean matrix of the predicted object states.
+            covariance (ndarray): The Nx8x8 covariance matrix of the predicted object states.
+            measurement (ndarray): The Nx4 dimensional measurement matrix, one measurement in the format of `update`
+                for each state.
+
+        Returns:
+            (tuple[ndarray, ndarray]): Returns the measurement-corrected mean matrix (N, 8) and covariance matrix
+                (N, 8, 8).
+
+        Examples:
+            >>> kf = KalmanFilterXYAH()
+            >>> mean = np.tile([0, 0, 1, 1, 0, 0, 0, 0], (3, 1))
+            >>> covariance = np.tile(np.eye(8), (3, 1, 1))
+            >>> measurement = np.ones((3, 4))
+            >>> new_mean, new_covariance = kf.multi_update(mean, covariance, measurement)
+        """
+        projected_mean, projected_cov = self.multi_project(mean, covariance)
+
+        # Solve projected_cov @ kalman_gain.T = (covariance @ update_mat.T).T with projected_cov = L @ L.T
+        chol_factor = np.linalg.cholesky(projected_cov)
+        cross_cov = np.swapaxes(covariance @ self._update_mat.T, 1, 2)
+        kalman_gain = np.linalg.solve(np.swapaxes(chol_factor, 1, 2), np.linalg.solve(chol_factor, cross_cov))
+        kalman_gain = np.swapaxes(kalman_gain, 1, 2)
+        innovation = measurement - projected_mean
+
+        new_mean = mean + (kalman_gain @ innovation[..., None])[..., 0]
+        new_covariance = covariance - kalman_gain @ projected_cov @ np.swapaxes(kalman_gain, 1, 2)
+        return new_mean, new_covariance
+
     def gating_distance(
         self,
         mean: np.ndarray,
@@ -306,7 +375,9 @@ class KalmanFilterXYWH(KalmanFilterXYAH):
         predict: Runs the Kalman filter prediction step.
         project: Projects the state distribution to measurement space.
         multi_predict: Runs the Kalman filter prediction step in a vectorized manner.
+        multi_project: Projects multiple state distributions to measurement space in a vectorized manner.
         update: Runs the Kalman filter correction step.
+        multi_update: Runs the Kalman filter correction step for multiple states in a vectorized manner.
 
     Examples:
         Create a Kalman filter and initialize a track
@@ -468,6 +539,36 @@ class KalmanFilterXYWH(KalmanFilterXYAH):
 
         return mean, covariance
 
+    def multi_project(self, mean, covariance) -> tuple:
+        """
+        Project multiple state distributions to measurement space (Vectorized version).
+
+        Args:
+            mean (ndarray): The Nx8 dimensional mean matrix of the object states.
+            covariance (ndarray): The Nx8x8 covariance matrix of the object states.
+
+        Returns:
+            (tuple[ndarray, ndarray]): Returns the projected mean matrix of shape (N, 4) and covariance matrix of
+                shape (N, 4, 4).
+
+        Examples:
+            >>> kf = KalmanFilterXYWH()
+            >>> mean = np.random.rand(5, 8)  # 5 objects with 8-dimensional state vectors
+            >>> covariance = np.tile(np.eye(8), (5, 1, 1))
+            >>> projected_mean, projected_cov = kf.multi_project(mean, covariance)
+        """
+        std = [
+            self._std_weight_position * mean[:, 2],
+            self._std_weight_position * mean[:, 3],
+            self._std_weight_position * mean[:, 2],
+            self._std_weight_position * mean[:, 3],
+        ]
+        innovation_cov = np.square(np.r_[std]).T[:, :, None] * np.eye(4)
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = self._update_mat @ covariance @ self._update_mat.T
+        return mean, covariance + innovation_cov
+
     def update(self, mean, covariance, measurement) -> tuple:
         """
         Run Kalman filter correction step.
@@ -67,8 +67,10 @@ def iou_distance(atracks: list, btracks: list) -> np.ndarray:
     Compute cost based on Intersection over Union (IoU) between tracks.
 
     Args:
-        atracks (list[STrack] | list[np.ndarray]): List of tracks 'a' or bounding boxes.
-        btracks (list[STrack] | list[np.ndarray]): List of tracks 'b' or bounding boxes.
+        atracks (list[STrack] | list[np.ndarray] | np.ndarray): List of tracks 'a' or bounding boxes, or an (N, 4)
+            or (N, 5) array of stacked boxes.
+        btracks (list[STrack] | list[np.ndarray] | np.ndarray): List of tracks 'b' or bounding boxes, or an (M, 4)
+            or (M, 5) array of stacked boxes.
 
     Returns:
         (np.ndarray): Cost matrix computed based on IoU.
@@ -79,7 +81,10 @@ def iou_distance(atracks: list, btracks: list) -> np.ndarray:
         >>> btracks = [np.array([5, 5, 15, 15]), np.array([25, 25, 35, 35])]
         >>> cost_matrix = iou_distance(atracks, btracks)
     """
-    if atracks and isinstance(atracks[0], np.ndarray) or btracks and isinstance(btracks[0], np.ndarray):
+    if isinstance(atracks, np.ndarray) or isinstance(btracks, np.ndarray):
+        atlbrs = atracks
+        btlbrs = btracks
+    elif atracks and isinstance(atracks[0], np.ndarray) or btracks and isinstance(btracks[0], np.ndarray):
         atlbrs = atracks
         btlbrs = btracks
     else:
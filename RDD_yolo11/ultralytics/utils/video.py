@@ -0,0 +1,125 @@
+# Ultralytics YOLO 🚀, AGPL-3.0 license
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import cv2
+
+from ultralytics.utils import LOGGER, MACOS, WINDOWS
+
+VIDEO_WRITERS = {"opencv", "ffmpeg"}  # accepted values of the 'video_writer' argument
+
+
+class OpenCVVideoSink:
+    """
+    Video sink writing annotated frames with cv2.VideoWriter.
+
+    Uses the platform default container and codec: MP4/avc1 on macOS, AVI/WMV2 on Windows and AVI/MJPG elsewhere. The
+    AVI outputs are not playable in browsers and need a separate transcode.
+
+    Attributes:
+        path (str): Path of the written video file.
+        writer (cv2.VideoWriter): Underlying OpenCV writer.
+    """
+
+    def __init__(self, save_path, fps, size):
+        """Opens a cv2.VideoWriter for frames of the given (width, height) size."""
+        suffix, fourcc = (".mp4", "avc1") if MACOS else (".avi", "WMV2") if WINDOWS else (".avi", "MJPG")
+        self.path = str(Path(save_path).with_suffix(suffix))
+        self.writer = cv2.VideoWriter(
+            filename=self.path,
+            fourcc=cv2.VideoWriter_fourcc(*fourcc),
+            fps=fps,  # integer required, floats produce error in MP4 codec
+            frameSize=size,  # (width, height)
+        )
+
+    def write(self, im):
+        """Writes one BGR frame."""
+        self.writer.write(im)
+
+    def release(self):
+        """Flushes and closes the video file."""
+        self.writer.release()
+
+
+class FFmpegVideoSink:
+    """
+    Video sink piping raw BGR frames into an ffmpeg process that encodes browser-playable H.264 MP4.
+
+    Frames are encoded by ffmpeg concurrently with inference, so the video is ready as soon as the last frame is
+    written and no separate decode/encode pass is needed. The output is named '<stem>_h264.mp4'.
+
+    Attributes:
+        path (str): Path of the written video file.
+        process (subprocess.Popen): The ffmpeg encoder process.
+    """
+
+    def __init__(self, save_path, fps, size, ffmpeg="ffmpeg"):
+        """Starts an ffmpeg libx264 encoder reading frames of the given (width, height) size from stdin."""
+        save_path = Path(save_path)
+        self.path = str(save_path.with_name(f"{save_path.stem}_h264.mp4"))
+        self.broken = False
+        cmd = [
+            ffmpeg,
+            "-y",
+            "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{size[0]}x{size[1]}",
+            "-r", str(fps),
+            "-i", "-",
+            "-an",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",  # yuv420p requires even dimensions
+            "-c:v", "libx264",
+            "-preset", "fast",
+            "-crf", "23",
+            "-profile:v", "baseline",
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            self.path,
+        ]  # fmt: skip
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def write(self, im):
+        """Writes one BGR frame to the encoder, frames after an encoder failure are dropped."""
+        if self.broken:
+            return
+        try:
+            self.process.stdin.write(im.tobytes())
+        except (BrokenPipeError, OSError):
+            self.broken = True
+            LOGGER.warning(f"WARNING ⚠️ ffmpeg encoder for {self.path} exited early, remaining frames are dropped")
+
+    def release(self):
+        """Closes the encoder input and waits for ffmpeg to finish the MP4 file."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        err = self.process.stderr.read()
+        if self.process.wait() != 0:
+            LOGGER.warning(f"WARNING ⚠️ ffmpeg encoder failed for {self.path}: {err.decode(errors='ignore').strip()}")
+
+
+def make_video_sink(kind, save_path, fps, size):
+    """
+    Creates the video sink selected by the 'video_writer' argument.
+
+    Args:
+        kind (str): 'opencv' for cv2.VideoWriter or 'ffmpeg' for piped H.264 encoding.
+        save_path (str): Output path, the suffix is chosen by the sink.
+        fps (int): Output frame rate.
+        size (tuple): Frame (width, height).
+
+    Returns:
+        (OpenCVVideoSink | FFmpegVideoSink): The sink, falling back to OpenCV when ffmpeg is not installed.
+    """
+    if kind not in VIDEO_WRITERS:
+        raise ValueError(f"Invalid video_writer '{kind}', valid values are {sorted(VIDEO_WRITERS)}")
+    if kind == "ffmpeg":
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg:
+            return FFmpegVideoSink(save_path, fps, size, ffmpeg)
+        LOGGER.warning("WARNING ⚠️ video_writer='ffmpeg' requires ffmpeg on PATH, falling back to OpenCV")
+    return OpenCVVideoSink(save_path, fps, size)
@@ -0,0 +1,136 @@
+"""YOLO推理请求的动态批处理调度器
+
+并发到达的请求先进入有界队列，调度线程取出第一个请求后最多再等待 max_delay_ms，
+期间到达的请求（最多 max_batch_size 个）合并为一个batch做一次前向推理，再把结果
+按顺序分发给各个调用方。模型只在调度线程中使用，因此不需要额外的推理锁。
+"""
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+
+class SchedulerBusy(Exception):
+    """等待队列已满，调用方应返回503并提示稍后重试"""
+
+    def __init__(self, pending, capacity):
+        super().__init__(f"推理队列已满: {pending}/{capacity}")
+        self.pending = pending
+        self.capacity = capacity
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))]
+
+
+class BatchScheduler:
+    """动态批处理调度器
+
+    run_batch(items) 接收一批请求，返回与之等长、顺序一致的结果列表。
+    整批失败时逐个重新执行，单个无法处理的请求不会连累同批的其他请求。
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_delay_ms=10, max_queue=64, window=1000,
+                 name='yolo-batch'):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._latencies = deque(maxlen=window)  # 最近请求的端到端延迟（秒）
+        self._waits = deque(maxlen=window)  # 最近请求在队列中等待的时间（秒）
+        self._requests = 0
+        self._errors = 0
+        self._inference_time = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """提交一个请求，返回 Future；队列已满时抛出 SchedulerBusy"""
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except queue.Full:
+            raise SchedulerBusy(self._queue.qsize(), self._queue.maxsize)
+        return future
+
+    def _collect(self):
+        """等待第一个请求，再在 max_delay 内收集后续请求直到凑满一批"""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _execute(self, batch):
+        items = [item for item, _, _ in batch]
+        try:
+            return [(result, None) for result in self.run_batch(items)]
+        except Exception as e:
+            if len(items) == 1:
+                return [(None, e)]
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((self.run_batch([item])[0], None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            outcomes = self._execute(batch)
+            finished = time.perf_counter()
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._inference_time += finished - started
+                for (_, _, enqueued), (_, error) in zip(batch, outcomes):
+                    self._requests += 1
+                    self._errors += error is not None
+                    self._waits.append(started - enqueued)
+                    self._latencies.append(finished - enqueued)
+            for (_, future, _), (result, error) in zip(batch, outcomes):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            latencies, waits = list(self._latencies), list(self._waits)
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_queue': self._queue.maxsize,
+                'max_batch_size': self.max_batch_size,
+                'max_delay_ms': round(self.max_delay * 1000, 2),
+                'requests': self._requests,
+                'errors': self._errors,
+                'batches': batches,
+                'avg_batch_size': round(self._requests / batches, 2) if batches else 0,
+                'batch_sizes': {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                'avg_batch_inference_ms': round(self._inference_time / batches * 1000, 2) if batches else 0,
+                'latency_ms': {f'p{q}': round(percentile(latencies, q) * 1000, 2) for q in (50, 90, 99)},
+                'queue_wait_ms': {f'p{q}': round(percentile(waits, q) * 1000, 2) for q in (50, 90, 99)}
+            }
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        self._thread.join(timeout)
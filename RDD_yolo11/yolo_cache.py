@@ -0,0 +1,225 @@
+"""按内容寻址的YOLO检测结果缓存
+
+缓存键由 (图片内容哈希, 权重文件哈希, conf/iou/imgsz 等推理参数) 计算得到，
+同一张图片用同一模型和参数重复提交时直接返回缓存的检测JSON和标注结果图，
+不再推理和重新绘制。缓存总大小超过上限时按最近最少使用(LRU)顺序淘汰。
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """文件内容的SHA-256十六进制摘要"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_upload(upload_dir, data, name):
+    """以内容哈希命名保存上传的图片，相同内容只保存一份，返回保存路径"""
+    ext = os.path.splitext(os.path.basename(name))[1].lower() or '.jpg'
+    path = os.path.join(upload_dir, hashlib.sha256(data).hexdigest() + ext)
+    if not os.path.exists(path):
+        os.makedirs(upload_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
+
+
+class ResultCache:
+    """检测结果缓存
+
+    每个缓存项在 root 目录下保存 <键>.json（检测结果）和 <键>.image（标注结果图副本）。
+    同一张图片的结果图文件名固定，并发的推理随时可能覆盖 runs/detect/predict 中的同名文件，
+    因此命中时把缓存副本复制为带缓存键的独立文件名（见 cached_image_path），返回的
+    image_path 指向这个文件，不改写共享的结果图。副本必须是独立的文件而不是硬链接：
+    ultralytics 保存结果图时会原地覆盖同名文件，硬链接的副本会被一起改写。
+    这个副本计入缓存项的占用字节数，缓存项被淘汰时一并删除。
+    """
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 -> 占用字节数，按最近使用顺序排列
+        self._bytes = 0
+        self._hashes = {}  # 权重文件绝对路径 -> (mtime, size, 哈希)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load()
+
+    def _load(self):
+        """启动时按文件修改时间恢复LRU顺序"""
+        if not os.path.isdir(self.root):
+            return
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith('.json'):
+                key = name[:-len('.json')]
+                json_path, image_copy = self._paths(key)
+                size = os.path.getsize(json_path)
+                for path in (image_copy, self._served_image_path(key)):
+                    if path and os.path.exists(path):
+                        size += os.path.getsize(path)
+                entries.append((os.path.getmtime(json_path), key, size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._bytes += size
+
+    def _paths(self, key):
+        """缓存项的 (结果JSON, 标注图副本) 路径"""
+        return os.path.join(self.root, key + '.json'), os.path.join(self.root, key + '.image')
+
+    def weights_hash(self, weights_path):
+        """权重文件哈希，按 (mtime, size) 缓存，避免每次请求都读取整个权重文件"""
+        stat = os.stat(weights_path)
+        cached = self._hashes.get(weights_path)
+        if cached is None or cached[:2] != (stat.st_mtime, stat.st_size):
+            cached = (stat.st_mtime, stat.st_size, file_hash(weights_path))
+            self._hashes[weights_path] = cached
+        return cached[2]
+
+    @staticmethod
+    def cached_image_path(image_path, key):
+        """命中时返回给调用方的结果图路径：与原结果图同目录，文件名带缓存键前缀以免与推理输出冲突"""
+        stem, ext = os.path.splitext(os.path.basename(image_path))
+        return os.path.join(os.path.dirname(image_path), f'{stem}.{key[:16]}{ext}')
+
+    def _served_image_path(self, key):
+        """缓存项命中时复制出的结果图路径，缓存JSON不存在或没有结果图时返回None"""
+        try:
+            with open(self._paths(key)[0], encoding='utf-8') as f:
+                image_path = json.load(f).get('image_path')
+        except (OSError, ValueError):
+            return None
+        return self.cached_image_path(image_path, key) if image_path else None
+
+    def key(self, source_path, weights_path, options=None):
+        parts = [file_hash(source_path), self.weights_hash(weights_path), sorted((options or {}).items())]
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """返回缓存的检测结果，未命中时返回None"""
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        json_path, image_copy = self._paths(key)
+        copied = None
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                result = json.load(f)
+            image_path = result.get('image_path')
+            if image_path and os.path.exists(image_copy):
+                image_path = self.cached_image_path(image_path, key)
+                if not os.path.exists(image_path):
+                    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+                    tmp_path = f'{image_path}.{threading.get_ident()}.tmp'
+                    shutil.copyfile(image_copy, tmp_path)
+                    os.replace(tmp_path, image_path)
+                    copied = image_path
+                result['image_path'] = image_path
+            os.utime(json_path)
+        except (OSError, ValueError):
+            # 缓存文件被外部删除或损坏，当作未命中
+            self._discard(key)
+            with self._lock:
+                self._hits -= 1
+                self._misses += 1
+            return None
+        if copied:
+            self._grow(key, copied)
+        return dict(result, cached=True)
+
+    def put(self, key, result):
+        """保存检测结果及其标注图，然后按LRU淘汰超出容量的缓存项"""
+        os.makedirs(self.root, exist_ok=True)
+        json_path, image_copy = self._paths(key)
+        served = self._served_image_path(key)
+        if served:  # 覆盖已有的缓存项时删除旧结果图的副本，新缓存项的大小不包含它
+            try:
+                os.remove(served)
+            except FileNotFoundError:
+                pass
+        size = 0
+        image_path = result.get('image_path')
+        if image_path and os.path.exists(image_path):
+            shutil.copyfile(image_path, image_copy)
+            size += os.path.getsize(image_copy)
+        tmp_path = f'{json_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, json_path)
+        size += os.path.getsize(json_path)
+
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            evicted = self._evict()
+        for old_key in evicted:
+            self._remove_files(old_key)
+
+    def _grow(self, key, image_path):
+        """命中时复制出的结果图计入缓存项大小，超出容量时同样按LRU淘汰"""
+        size = os.path.getsize(image_path)
+        with self._lock:
+            cached = key in self._entries
+            if cached:
+                self._entries[key] += size
+                self._bytes += size
+                evicted = self._evict()
+        if not cached:  # 复制期间缓存项已被淘汰，删除它的文件时没有删到这个副本
+            os.remove(image_path)
+            return
+        for old_key in evicted:
+            self._remove_files(old_key)
+
+    def _evict(self):
+        """在持有锁时按LRU顺序移出超出容量的缓存项，返回需要删除文件的键"""
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_size = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self._evictions += 1
+            evicted.append(old_key)
+        return evicted
+
+    def _discard(self, key):
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+        self._remove_files(key)
+
+    def _remove_files(self, key):
+        # 先删除命中时复制出的结果图，它的路径要从缓存JSON中得出
+        served = self._served_image_path(key)
+        for path in ((served,) if served else ()) + self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0,
+                'evictions': self._evictions
+            }
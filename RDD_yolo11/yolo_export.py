@@ -0,0 +1,227 @@
+"""YOLO权重的CPU推理后端导出与自动选择
+
+把 best.pt 用 ultralytics 的导出器转换为 ONNX / OpenVINO（FP32 和 INT8），INT8 的校准图片
+取自上传目录 upload。导出结果按权重文件哈希缓存在 exports/<哈希>/ 下，权重不变时只导出一次。
+选择后端时在本机对每个可用后端做一次简短的推理计时，并与 PyTorch 模型在校准图片上的
+检测结果比较（同类别且 IoU>=0.5 视为一致），在一致率不低于 min_agreement 的后端中
+选择最快的一个，结果写入 exports/<哈希>/selection.json 供 yolov11_predict.py 本地推理使用。
+
+用法: python yolo_export.py --weights best.pt --upload-dir upload
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import time
+
+import numpy as np
+
+import yolov11_predict
+from yolo_cache import file_hash
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EXPORT_DIR = os.path.join(BASE_DIR, 'exports')
+IMAGE_SUFFIXES = {'.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff', '.webp'}
+
+# 后端名 -> (ultralytics导出参数, 导出结果相对权重文件名的路径模板, 运行所需的包)
+BACKENDS = {
+    'pytorch': (None, '{stem}.pt', 'torch'),
+    'onnx': ({'format': 'onnx', 'dynamic': True, 'simplify': True}, '{stem}.onnx', 'onnxruntime'),
+    'onnx-int8': ({'format': 'onnx', 'dynamic': True, 'int8': True}, '{stem}_int8.onnx', 'onnxruntime'),
+    'openvino': ({'format': 'openvino', 'dynamic': True}, '{stem}_openvino_model', 'openvino'),
+    'openvino-int8': ({'format': 'openvino', 'dynamic': True, 'int8': True}, '{stem}_int8_openvino_model',
+                      'openvino'),
+}
+
+
+def available_backends():
+    """本机已安装运行时的后端"""
+    import importlib.util
+    return [name for name, (_, _, package) in BACKENDS.items() if importlib.util.find_spec(package) is not None]
+
+
+def export_dir(weights_path, root=DEFAULT_EXPORT_DIR):
+    """权重对应的导出缓存目录，以权重内容哈希命名"""
+    return os.path.join(os.path.abspath(root), file_hash(weights_path)[:16])
+
+
+def calibration_images(upload_dir, limit=None, seed=0):
+    """上传目录中的图片（不含视频），按文件名排序后随机抽取 limit 张"""
+    if not os.path.isdir(upload_dir):
+        return []
+    images = sorted(os.path.join(upload_dir, name) for name in os.listdir(upload_dir)
+                    if os.path.splitext(name)[1].lower() in IMAGE_SUFFIXES)
+    if limit is not None and len(images) > limit:
+        images = sorted(random.Random(seed).sample(images, limit))
+    return images
+
+
+def prepare_calibration(weights_path, directory, upload_dir, limit=300):
+    """把抽样的上传图片链接到导出目录下的校准集，返回数据集YAML路径；没有图片时返回None
+
+    校准集单独存放，导出器生成的标签缓存文件不会写进上传目录。
+    """
+    images = calibration_images(upload_dir, limit)
+    if not images:
+        return None
+    image_dir = os.path.join(directory, 'calibration', 'images')
+    os.makedirs(image_dir, exist_ok=True)
+    for path in images:
+        target = os.path.join(image_dir, os.path.basename(path))
+        if not os.path.exists(target):
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copyfile(path, target)
+
+    model = yolov11_predict.load_model(weights_path)
+    data_path = os.path.join(directory, 'calibration', 'data.yaml')
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump({  # JSON是合法的YAML
+            'path': os.path.join(directory, 'calibration'),
+            'train': 'images',
+            'val': 'images',
+            'names': {int(k): v for k, v in model.names.items()}
+        }, f, ensure_ascii=False)
+    return data_path
+
+
+def export_backend(weights_path, backend, root=DEFAULT_EXPORT_DIR, upload_dir=None, imgsz=640):
+    """导出一个后端并返回模型路径，已导出过的直接返回缓存；INT8缺少校准图片时返回None"""
+    args, template, _ = BACKENDS[backend]
+    if args is None:
+        return os.path.abspath(weights_path)
+    directory = export_dir(weights_path, root)
+    weights_copy = os.path.join(directory, 'best.pt')
+    path = os.path.join(directory, template.format(stem='best'))
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.exists(weights_copy):
+        shutil.copyfile(weights_path, weights_copy)
+    args = dict(args, imgsz=imgsz)
+    if args.get('int8'):
+        data = prepare_calibration(weights_path, directory, upload_dir or os.path.join(BASE_DIR, 'upload'))
+        if data is None:
+            print(f"上传目录中没有图片，无法校准 {backend}，已跳过")
+            return None
+        args['data'] = data
+    yolov11_predict.YOLO(weights_copy).export(**args)
+    return path if os.path.exists(path) else None
+
+
+def box_iou(a, b):
+    """(N, 4) 与 (M, 4) 的 xyxy 框两两之间的IoU"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def compare_detections(reference, results, iou_thresh=0.5):
+    """与参照结果比较，返回 (一致率F1, 匹配框的平均置信度差)；两边都没有检测框时一致率为1"""
+    matched = total = 0
+    conf_deltas = []
+    for ref, res in zip(reference, results):
+        ref, res = ref.boxes.cpu().numpy(), res.boxes.cpu().numpy()
+        total += len(ref) + len(res)
+        if not len(ref) or not len(res):
+            continue
+        iou = box_iou(ref.xyxy, res.xyxy)
+        iou[ref.cls[:, None] != res.cls[None, :]] = 0
+        used = set()
+        for i in np.argsort(-ref.conf):  # 按置信度从高到低贪心匹配
+            j = int(np.argmax(iou[i]))
+            if iou[i, j] >= iou_thresh and j not in used:
+                used.add(j)
+                matched += 1
+                conf_deltas.append(abs(float(ref.conf[i]) - float(res.conf[j])))
+    agreement = 2 * matched / total if total else 1.0
+    return agreement, statistics.mean(conf_deltas) if conf_deltas else 0.0
+
+
+def benchmark(model_path, images, imgsz=640, runs=10):
+    """返回 (每张图片推理耗时中位数ms, 各图片的检测结果)"""
+    model = yolov11_predict.YOLO(model_path, task='detect')
+    results = [model.predict(image, imgsz=imgsz, verbose=False)[0] for image in images]  # 预热并取检测结果
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        model.predict(images[i % len(images)], imgsz=imgsz, verbose=False)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), results
+
+
+def select_backend(weights_path, backends=None, root=DEFAULT_EXPORT_DIR, upload_dir=None, imgsz=640, runs=10,
+                   min_agreement=0.9):
+    """导出并计时各后端，返回 (选中的后端名, 模型路径, 各后端的测试报告)"""
+    upload_dir = upload_dir or os.path.join(BASE_DIR, 'upload')
+    backends = [b for b in (backends or list(BACKENDS)) if b in available_backends()]
+    images = calibration_images(upload_dir, limit=8) or [np.zeros((imgsz, imgsz, 3), dtype=np.uint8)]
+
+    report = []
+    reference = None
+    for backend in ['pytorch'] + [b for b in backends if b != 'pytorch']:
+        try:
+            path = export_backend(weights_path, backend, root, upload_dir, imgsz)
+            if path is None:
+                continue
+            latency, results = benchmark(path, images, imgsz, runs)
+        except Exception as e:
+            print(f"后端 {backend} 导出或推理失败，已跳过: {e}")
+            continue
+        if reference is None:
+            reference = results
+        agreement, conf_delta = compare_detections(reference, results)
+        report.append({'backend': backend, 'path': path, 'latency_ms': round(latency, 2),
+                       'agreement': round(agreement, 4), 'conf_delta': round(conf_delta, 4)})
+
+    eligible = [r for r in report if r['agreement'] >= min_agreement] or report[:1]
+    best = min(eligible, key=lambda r: r['latency_ms'])
+    directory = export_dir(weights_path, root)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'selection.json'), 'w', encoding='utf-8') as f:
+        json.dump({'backend': best['backend'], 'path': best['path'], 'imgsz': imgsz, 'report': report}, f,
+                  ensure_ascii=False, indent=2)
+    return best['backend'], best['path'], report
+
+
+def selected_weights(weights_path, root=DEFAULT_EXPORT_DIR):
+    """返回之前为该权重选出的后端模型路径，没有选择记录或导出文件已删除时返回原权重路径"""
+    try:
+        with open(os.path.join(export_dir(weights_path, root), 'selection.json'), encoding='utf-8') as f:
+            path = json.load(f)['path']
+    except (OSError, ValueError, KeyError):
+        return weights_path
+    return path if os.path.exists(path) else weights_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出YOLO权重的CPU推理后端并选择最快的一个')
+    parser.add_argument('--weights', default=os.path.join(BASE_DIR, 'best.pt'))
+    parser.add_argument('--upload-dir', default=os.path.join(BASE_DIR, 'upload'), help='INT8 calibration images')
+    parser.add_argument('--export-dir', default=DEFAULT_EXPORT_DIR)
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), help='backends to try, default all')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--min-agreement', type=float, default=0.9,
+                        help='min detection agreement with PyTorch for a backend to be selected')
+    args = parser.parse_args()
+
+    if not yolov11_predict.load_ultralytics():
+        return
+    backend, path, report = select_backend(args.weights, args.backends, args.export_dir, args.upload_dir,
+                                           args.imgsz, args.runs, args.min_agreement)
+    for r in report:
+        print(f"{r['backend']:<14} {r['latency_ms']:8.2f} ms/张 | 与PyTorch一致率 {r['agreement']:.4f} "
+              f"平均置信度差 {r['conf_delta']:.4f}")
+    print(f"选择后端: {backend} ({path})")
+
+
+if __name__ == '__main__':
+    main()
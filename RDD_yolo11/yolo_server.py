@@ -0,0 +1,294 @@
+"""常驻的YOLO路面病害推理服务
+
+启动时加载并预热一次模型，之后每个请求只做推理，不再为每张上传图片重新启动
+Python、导入torch/ultralytics和读取权重文件。返回结果与 yolov11_predict.py 的
+JSON输出完全一致，结果图片同样保存在 runs/detect/predict。
+并发请求由 BatchScheduler 合并为一个batch做一次前向推理（--max-batch / --max-delay-ms）；
+检测结果按 (图片内容, 权重, 推理参数) 缓存，重复提交的图片直接返回缓存结果（--cache-max-mb）。
+--backend auto 时启动时把权重导出为 ONNX / OpenVINO 并选择本机最快的后端（见 yolo_export.py）。
+--workers N 时改由 N 个各自持有模型、绑定独占CPU核的工作进程推理（见 yolo_workers.py），
+--workers auto 使用 bench_yolo_workers.py 为该权重测出的最优进程数和线程数。
+
+接口:
+  POST /predict  JSON {"source": 图片路径, "weights": 可选的权重路径, "conf"/"iou"/"imgsz"/"tile": 可选推理参数}
+                 weights 只能是 --weights 指定的权重或 --allow-weights-dir 目录下的文件，否则返回403
+                 （权重用torch反序列化加载，不能加载请求任意指定的文件）
+                 或直接以请求体上传图片字节（?name=文件名），图片以内容哈希命名保存到 upload 目录
+                 推理超过 --request-timeout 秒没有结果时返回504
+  GET  /health   服务状态、已处理请求数和平均推理耗时
+  GET  /metrics  批处理调度指标：队列深度、batch大小分布、请求延迟分位数
+
+用法: python yolo_server.py --weights best.pt --port 8765 --max-batch 8 --max-delay-ms 10 --backend auto
+      python yolo_server.py --weights best.pt --workers auto
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import yolo_export
+import yolov11_predict
+from yolo_batching import BatchScheduler, SchedulerBusy
+from yolo_cache import ResultCache, store_upload
+import yolo_workers
+from yolo_workers import DISPATCH_MODES, WorkerPool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PORT = int(os.environ.get('YOLO_SERVER_PORT', 8765))
+PREDICT_OPTIONS = {'conf': float, 'iou': float, 'imgsz': int, 'tile': int}  # 请求可以指定的推理参数
+
+
+class WeightsNotAllowed(PermissionError):
+    """请求指定的权重不是服务允许加载的文件"""
+
+
+class PredictService:
+    """持有已加载模型的推理服务
+
+    模型不是线程安全的，所有推理都由批处理调度线程执行：并发请求被合并为batch，
+    max_batch_size=1 时等价于逐个串行推理。workers > 0 时改由多进程工作池执行，
+    每个工作进程持有自己的模型，逐个处理分发给它的请求。
+    请求只能使用启动时指定的权重，或 allowed_weights_dirs 目录下的权重文件。
+    等待推理结果最多 request_timeout 秒，避免执行器出错时请求线程永远阻塞。
+    """
+
+    def __init__(self, weights_path, upload_dir, max_batch_size=8, max_delay_ms=10, max_queue=64, cache=None,
+                 model_path=None, backend='pytorch', workers=0, worker_threads=None, dispatch='least-loaded',
+                 allowed_weights_dirs=(), request_timeout=120):
+        self.weights_path = os.path.abspath(weights_path)
+        # 请求默认权重时实际加载的模型：PyTorch权重本身，或其导出的 ONNX / OpenVINO 模型
+        self.model_path = os.path.abspath(model_path or weights_path)
+        self.allowed_weights_dirs = [os.path.realpath(d) for d in allowed_weights_dirs]
+        self.backend = backend
+        self.request_timeout = request_timeout
+        self.upload_dir = upload_dir
+        self.started_at = time.time()
+        if workers > 0:
+            self.scheduler = WorkerPool(self.model_path, workers, worker_threads, dispatch, max_queue)
+        else:
+            self.scheduler = BatchScheduler(self._run_batch, max_batch_size, max_delay_ms, max_queue)
+        self.cache = cache
+
+    def warmup(self, imgsz=640):
+        """加载模型并用一张空白图推理一次，完成权重加载、算子初始化等一次性开销"""
+        if isinstance(self.scheduler, WorkerPool):  # 各工作进程启动时已自行加载并预热
+            return self.scheduler.wait_ready()
+        start = time.perf_counter()
+        model = yolov11_predict.load_model(self.model_path)
+        # 在接受请求之前执行，此时调度线程还不会使用模型
+        model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+        return time.perf_counter() - start
+
+    def save_upload(self, data, name):
+        """保存以字节上传的图片，与前端上传路由一样以内容哈希命名，相同图片只保存一份"""
+        return store_upload(self.upload_dir, data, name)
+
+    @staticmethod
+    def _run_batch(items):
+        """在调度线程中执行一批 (图片路径, 权重路径, 推理参数) 请求，权重和参数相同的图片一次前向推理"""
+        results = [None] * len(items)
+        groups = {}
+        for i, (source, weights, options) in enumerate(items):
+            groups.setdefault((weights, options), []).append(i)
+        for (weights, options), indexes in groups.items():
+            batch = yolov11_predict.detect_batch([items[i][0] for i in indexes], weights, **dict(options))
+            for i, result in zip(indexes, batch):
+                results[i] = result
+        return results
+
+    def check_weights(self, weights_path):
+        """返回请求权重的绝对路径，不是启动时的权重且不在允许的目录下时抛出 WeightsNotAllowed"""
+        weights_path = os.path.abspath(weights_path)
+        real_path = os.path.realpath(weights_path)
+        if real_path in (os.path.realpath(self.weights_path), os.path.realpath(self.model_path)):
+            return weights_path
+        if any(os.path.commonpath([real_path, d]) == d for d in self.allowed_weights_dirs):
+            return weights_path
+        raise WeightsNotAllowed(f'不允许加载的权重文件: {weights_path}')
+
+    def predict(self, source_path, weights_path=None, **options):
+        """检测一张图片，返回结果字典；失败时抛出异常，队列已满时抛出 SchedulerBusy，
+        请求的权重不允许加载时抛出 WeightsNotAllowed，超过 request_timeout 没有结果时抛出 TimeoutError"""
+        weights_path = self.check_weights(weights_path) if weights_path else self.weights_path
+        model_path = self.model_path if weights_path == self.weights_path else weights_path
+        # 补全默认值后，不指定参数与显式指定默认值的请求共用缓存和batch
+        options = yolov11_predict.predict_options(options)
+        # 导出后端的检测结果与PyTorch略有差异，缓存键中区分后端
+        key_options = options if model_path == weights_path else dict(options, backend=self.backend)
+        key = self.cache.key(source_path, weights_path, key_options) if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        future = self.scheduler.submit((source_path, model_path, tuple(sorted(options.items()))))
+        result = future.result(timeout=self.request_timeout)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def stats(self):
+        batching = self.scheduler.stats()
+        return {
+            'weights': self.weights_path,
+            'backend': self.backend,
+            'model': self.model_path,
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'requests': batching['requests'],
+            'errors': batching['errors'],
+            'queue_depth': batching['queue_depth'],
+            'avg_batch_size': batching['avg_batch_size'],
+            'workers': batching.get('workers', 0),
+            'cache': self.cache.stats() if self.cache else None
+        }
+
+
+class PredictHandler(BaseHTTPRequestHandler):
+    service = None  # 由 make_server 设置
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, dict(self.service.stats(), status='ok'))
+        elif path == '/metrics':
+            self._send_json(200, self.service.scheduler.stats())
+        else:
+            self._send_json(404, {'error': f'未知路径: {self.path}'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/predict':
+            self._send_json(404, {'error': f'未知路径: {self.path}'})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                params = json.loads(body or b'{}')
+                source, weights = params.get('source'), params.get('weights')
+            else:
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                source, weights = self.service.save_upload(body, params.get('name', 'image.jpg')) if body else None, None
+            options = {name: cast(params[name]) for name, cast in PREDICT_OPTIONS.items()
+                       if params.get(name) is not None}
+        except (ValueError, OSError) as e:
+            self._send_json(400, {'error': f'请求格式错误: {e}'})
+            return
+
+        if not source:
+            self._send_json(400, {'error': '缺少图片路径或图片数据'})
+            return
+        if not os.path.exists(source):
+            self._send_json(400, {'error': f'输入文件不存在: {source}'})
+            return
+        try:
+            self._send_json(200, self.service.predict(source, weights, **options))
+        except SchedulerBusy as e:
+            self._send_json(503, {'error': f'推理请求排队已满，请稍后重试 ({e.pending}/{e.capacity})'})
+        except WeightsNotAllowed as e:
+            self._send_json(403, {'error': str(e)})
+        except concurrent.futures.TimeoutError:  # Python < 3.11 不是内置的 TimeoutError
+            self._send_json(504, {'error': f'YOLO预测超时 ({self.service.request_timeout} 秒)'})
+        except Exception as e:
+            self._send_json(500, {'error': f'YOLO预测失败: {str(e)}'})
+
+    def log_message(self, format, *args):
+        # 只记录出错的请求，避免每次推理都输出访问日志
+        if len(args) > 1 and str(args[1]).startswith(('4', '5')):
+            super().log_message(format, *args)
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT):
+    handler = type('BoundPredictHandler', (PredictHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻的YOLO路面病害推理服务')
+    parser.add_argument('--weights', type=str, default=os.path.join(BASE_DIR, 'best.pt'), help='path to model weights')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--upload-dir', type=str, default=os.path.join(BASE_DIR, 'upload'),
+                        help='directory for images uploaded as bytes')
+    parser.add_argument('--no-warmup', action='store_true', help='load the model on the first request instead')
+    parser.add_argument('--max-batch', type=int, default=8, help='max requests merged into one forward pass')
+    parser.add_argument('--max-delay-ms', type=float, default=10, help='max time to wait for a batch to fill')
+    parser.add_argument('--max-queue', type=int, default=64, help='max queued requests before answering 503')
+    parser.add_argument('--cache-dir', type=str, default=os.path.join(BASE_DIR, 'cache'),
+                        help='directory of the detection result cache')
+    parser.add_argument('--cache-max-mb', type=float, default=512, help='result cache size limit, 0 disables it')
+    parser.add_argument('--backend', choices=['auto'] + list(yolo_export.BACKENDS), default='auto',
+                        help='inference backend, auto exports the weights and picks the fastest on this machine')
+    parser.add_argument('--export-dir', type=str, default=yolo_export.DEFAULT_EXPORT_DIR,
+                        help='cache directory of exported models')
+    parser.add_argument('--workers', type=str, default='0',
+                        help='inference worker processes, 0 runs in-process, auto uses bench_yolo_workers.py results')
+    parser.add_argument('--worker-threads', type=int, help='torch threads per worker, default cores / workers')
+    parser.add_argument('--dispatch', choices=DISPATCH_MODES, default='least-loaded',
+                        help='how requests are assigned to workers')
+    parser.add_argument('--allow-weights-dir', action='append', default=[],
+                        help='directory whose weights files requests may select, --weights is always allowed')
+    parser.add_argument('--request-timeout', type=float, default=120,
+                        help='seconds to wait for an inference result before answering 504')
+    args = parser.parse_args()
+
+    # 与 route.ts 调用脚本时的工作目录一致，结果图片保存在 RDD_yolo11/runs/detect/predict
+    weights, upload_dir = os.path.abspath(args.weights), os.path.abspath(args.upload_dir)
+    cache_dir, export_dir = os.path.abspath(args.cache_dir), os.path.abspath(args.export_dir)
+    os.chdir(BASE_DIR)
+    if not yolov11_predict.load_ultralytics():
+        print("错误: ultralytics不可用，无法启动推理服务", file=sys.stderr)
+        sys.exit(1)
+
+    backend, model_path = args.backend, weights
+    if backend == 'auto':
+        backend, model_path, report = yolo_export.select_backend(weights, root=export_dir, upload_dir=upload_dir)
+        for r in report:
+            print(f"后端 {r['backend']:<14} {r['latency_ms']:8.2f} ms/张 | 与PyTorch一致率 {r['agreement']:.4f}")
+    elif backend != 'pytorch':
+        model_path = yolo_export.export_backend(weights, backend, export_dir, upload_dir)
+        if model_path is None:
+            print(f"错误: 无法导出 {backend} 后端", file=sys.stderr)
+            sys.exit(1)
+    print(f"推理后端: {backend} ({model_path})")
+
+    workers, worker_threads = int(args.workers) if args.workers != 'auto' else 0, args.worker_threads
+    if args.workers == 'auto':
+        workers, worker_threads = yolo_workers.tuned_config(weights, export_dir) or (0, None)
+        if workers:
+            print(f"工作进程: {workers} 个，每个 {worker_threads} 线程（bench_yolo_workers.py 测试结果）")
+        else:
+            print("没有本机的工作进程测试结果，在服务进程内推理（可运行 bench_yolo_workers.py 测试）")
+
+    cache = ResultCache(cache_dir, int(args.cache_max_mb * 1024 * 1024)) if args.cache_max_mb > 0 else None
+    service = PredictService(weights, upload_dir, args.max_batch, args.max_delay_ms, args.max_queue, cache,
+                             model_path, backend, workers, worker_threads, args.dispatch, args.allow_weights_dir,
+                             args.request_timeout)
+    if not args.no_warmup:
+        print(f"模型预热完成，耗时 {service.warmup() * 1000:.0f} ms")
+    server = make_server(service, args.host, args.port)
+    print(f"YOLO推理服务已启动: http://{args.host}:{args.port} (权重 {weights})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
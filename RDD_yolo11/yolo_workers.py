@@ -0,0 +1,370 @@
+"""YOLO推理的多进程工作池
+
+单进程服务中所有推理都在一个调度线程里执行，PyTorch算子内部的线程并行在小batch上
+扩展性很差；Next.js回退到逐请求启动 yolov11_predict.py 时，每个进程又都按全部核数
+开线程，并发时严重超额订阅CPU。工作池改为启动 N 个进程，每个进程：
+  - 绑定到互不重叠的一组CPU核（os.sched_setaffinity，平台不支持时跳过），
+    torch.set_num_threads 设为分到的核数，OMP/MKL线程数同样设置；
+  - 持有一份私有的模型（启动时加载并预热），不与其他进程共享任何锁；
+  - 一次处理一个请求，与服务原来的 _run_batch 相同的方式推理并返回结果字典。
+请求按 dispatch 分发：round-robin 轮流发给各进程，least-loaded 发给在途请求最少的进程。
+每个工作进程通过自己的单向管道返回结果，不共用带跨进程写锁的 multiprocessing.Queue：
+工作进程在发送途中被杀死时不会留下被占用的锁、卡住其他进程。工作进程意外退出
+（崩溃、被OOM杀死）时，分发给它的在途请求立即失败，之后的请求只分发给仍在运行的进程。
+请求只把图片路径发给工作进程，由其自行读取和解码：服务收到的图片都已保存为文件（结果缓存
+按文件内容哈希，结果图按文件名保存），解码也随推理一起分摊到各工作进程并行执行。
+
+WorkerPool 与 BatchScheduler 接口一致（submit / stats / close），可直接作为 PredictService
+的执行器。最优的 (进程数, 每进程线程数) 与机器和模型有关，由 tune() 实测吞吐量选出并保存，
+见 bench_yolo_workers.py 和 yolo_server.py --workers auto。
+"""
+import itertools
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+import yolo_export
+from yolo_batching import SchedulerBusy, percentile
+
+DISPATCH_MODES = ('least-loaded', 'round-robin')
+THREAD_ENV = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def available_cores():
+    """当前进程可用的CPU核编号列表"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def candidate_configs(cores=None):
+    """待测的 (进程数, 每进程线程数) 组合：进程数取2的幂，线程数为平分后的核数，核数刚好用满"""
+    cores = cores or len(available_cores())
+    configs, workers = [], 1
+    while workers <= cores:
+        configs.append((workers, cores // workers))
+        workers *= 2
+    if configs[-1][0] != cores:
+        configs.append((cores, 1))
+    return configs
+
+
+def _worker_main(index, model_path, threads, cores, requests, results, imgsz):
+    """工作进程入口：设置线程数和CPU亲和性，加载并预热模型后循环处理请求"""
+    # spawn 启动的新解释器此时还没有导入torch，环境变量对OpenMP/MKL线程池生效
+    for name in THREAD_ENV:
+        os.environ[name] = str(threads)
+    if cores and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    import torch
+
+    import yolov11_predict
+    from yolo_server import PredictService
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    try:
+        if not yolov11_predict.load_ultralytics():
+            raise RuntimeError('ultralytics不可用')
+        model = yolov11_predict.load_model(model_path)
+        model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+    except Exception as e:
+        results.send(('failed', index, None, str(e)))
+        return
+    results.send(('ready', index, os.getpid(), None))
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, source, weights, options = request
+        try:
+            result = PredictService._run_batch([(source, weights, options)])[0]
+            results.send(('result', index, request_id, result))
+        except Exception as e:
+            results.send(('error', index, request_id, f'{type(e).__name__}: {e}'))
+
+
+class WorkerError(RuntimeError):
+    """工作进程中推理失败，异常信息为工作进程里的原始错误"""
+
+
+class WorkerPool:
+    """多进程推理工作池
+
+    submit((图片路径, 模型路径, 推理参数元组)) 返回 Future，
+    在途请求数达到 max_queue 时抛出 SchedulerBusy。
+    """
+
+    def __init__(self, model_path, workers=2, threads=None, dispatch='least-loaded', max_queue=64, imgsz=640,
+                 window=1000, pin=True):
+        if dispatch not in DISPATCH_MODES:
+            raise ValueError(f'未知的分发方式: {dispatch}')
+        cores = available_cores()
+        self.model_path = os.path.abspath(model_path)
+        self.workers = max(1, workers)
+        self.threads = threads or max(1, len(cores) // self.workers)
+        self.dispatch = dispatch
+        self.max_queue = max_queue
+        # 核数足够时每个进程绑定 threads 个独占的核，否则不绑定，交给系统调度
+        pin = pin and self.workers * self.threads <= len(cores)
+        self.cores = [cores[i * self.threads:(i + 1) * self.threads] if pin else None for i in range(self.workers)]
+
+        context = multiprocessing.get_context('spawn')  # fork 会继承主进程已初始化的torch线程池
+        self._requests = [context.Queue() for _ in range(self.workers)]
+        pipes = [context.Pipe(duplex=False) for _ in range(self.workers)]  # (读端, 写端)
+        self._results = [reader for reader, _ in pipes]
+        self._processes = [
+            context.Process(target=_worker_main, name=f'yolo-worker-{i}', daemon=True,
+                            args=(i, self.model_path, self.threads, self.cores[i], self._requests[i],
+                                  pipes[i][1], imgsz))
+            for i in range(self.workers)
+        ]
+        self._lock = threading.Lock()
+        self._pending = {}  # 请求编号 -> (Future, 工作进程序号, 提交时间)
+        self._in_flight = [0] * self.workers
+        self._served = [0] * self.workers
+        self._pids = [None] * self.workers
+        self._reported = set()  # 已报告启动结果（或启动前就退出）的工作进程序号
+        self._dead = set()  # 已退出、不再分发请求的工作进程序号
+        self._ready = threading.Event()
+        self._closing = threading.Event()
+        self._started = 0
+        self._failure = None
+        self._ids = itertools.count()
+        self._next = itertools.cycle(range(self.workers))
+        self._latencies = deque(maxlen=window)
+        self._request_count = 0
+        self._errors = 0
+        for process, (_, writer) in zip(self._processes, pipes):
+            process.start()
+            writer.close()  # 只有工作进程持有写端，进程退出后读端收到EOF
+        self._thread = threading.Thread(target=self._collect, name='yolo-workers', daemon=True)
+        self._thread.start()
+
+    def wait_ready(self, timeout=None):
+        """等待所有工作进程加载并预热模型，返回耗时（秒）；有进程启动失败时抛出 WorkerError"""
+        start = time.perf_counter()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f'工作进程启动超时: {self._started}/{self.workers}')
+        if self._failure:
+            raise WorkerError(f'工作进程启动失败: {self._failure}')
+        return time.perf_counter() - start
+
+    def _choose(self):
+        """选择接收请求的工作进程，跳过已退出的进程；全部退出时抛出 WorkerError"""
+        if len(self._dead) == self.workers:
+            raise WorkerError('所有工作进程已退出')
+        if self.dispatch == 'round-robin':
+            return next(i for i in self._next if i not in self._dead)
+        return min((i for i in range(self.workers) if i not in self._dead),
+                   key=lambda i: (self._in_flight[i], self._served[i]))
+
+    def submit(self, item):
+        """提交一个请求，返回 Future；在途请求已满时抛出 SchedulerBusy"""
+        source, weights, options = item
+        future = Future()
+        with self._lock:
+            if len(self._pending) >= self.max_queue:
+                raise SchedulerBusy(len(self._pending), self.max_queue)
+            request_id, index = next(self._ids), self._choose()
+            self._pending[request_id] = (future, index, time.perf_counter())
+            self._in_flight[index] += 1
+        self._requests[index].put((request_id, source, weights, options))
+        return future
+
+    def _collect(self):
+        """接收工作进程的消息，完成对应的 Future
+
+        管道收到EOF时该工作进程已退出；另外每 0.5 秒检查一次各进程是否仍在运行。
+        """
+        readers = {reader: i for i, reader in enumerate(self._results)}
+        checked = time.perf_counter()
+        while readers and not self._closing.is_set():
+            exited = []
+            for reader in multiprocessing.connection.wait(list(readers), timeout=0.5):
+                try:
+                    self._handle(*reader.recv())
+                except (EOFError, OSError):
+                    exited.append(readers.pop(reader))
+            if exited or time.perf_counter() - checked >= 0.5:
+                checked = time.perf_counter()
+                self._reap(exited)
+
+    def _handle(self, kind, index, request_id, payload):
+        if kind in ('ready', 'failed'):
+            with self._lock:
+                self._pids[index] = request_id
+                if kind == 'failed':
+                    self._failure = payload
+                self._report_started(index)
+            return
+        with self._lock:
+            if request_id not in self._pending:  # 已随工作进程退出被判定失败
+                return
+            future, index, submitted = self._pending.pop(request_id)
+            self._in_flight[index] -= 1
+            self._served[index] += 1
+            self._request_count += 1
+            self._errors += kind == 'error'
+            self._latencies.append(time.perf_counter() - submitted)
+        if kind == 'error':
+            future.set_exception(WorkerError(payload))
+        else:
+            future.set_result(payload)
+
+    def _report_started(self, index):
+        """记录一个工作进程的启动结果，全部进程都有结果后 wait_ready 返回（调用时需持有锁）"""
+        if index not in self._reported:
+            self._reported.add(index)
+            self._started += 1
+            if self._started == self.workers:
+                self._ready.set()
+
+    def _reap(self, exited=()):
+        """把已退出的工作进程（exited 为管道已EOF的进程序号）标记为不可用，
+        分发给它们的在途请求以 WorkerError 失败
+
+        启动阶段就退出（没有发出 ready/failed）的进程按启动失败处理。
+        """
+        for i in exited:
+            self._processes[i].join(1)  # 管道EOF时进程正在退出，等待取得退出码
+        exited = [i for i, p in enumerate(self._processes) if i not in self._dead and not p.is_alive()]
+        if not exited:
+            return
+        failed = []
+        with self._lock:
+            for i in exited:
+                self._dead.add(i)
+                if i not in self._reported:
+                    self._failure = f'工作进程 {i} 退出 (exitcode {self._processes[i].exitcode})'
+                    self._report_started(i)
+            for request_id, (future, index, _) in list(self._pending.items()):
+                if index in self._dead:
+                    del self._pending[request_id]
+                    self._in_flight[index] -= 1
+                    self._request_count += 1
+                    self._errors += 1
+                    failed.append((future, index))
+        for future, index in failed:
+            future.set_exception(WorkerError(f'工作进程 {index} 已退出 (exitcode {self._processes[index].exitcode})'))
+
+    def _fail_pending(self, message):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _, _ in pending.values():
+            future.set_exception(WorkerError(message))
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                'workers': self.workers,
+                'threads_per_worker': self.threads,
+                'dispatch': self.dispatch,
+                'queue_depth': len(self._pending),
+                'max_queue': self.max_queue,
+                'requests': self._request_count,
+                'errors': self._errors,
+                'avg_batch_size': 1 if self._request_count else 0,
+                'latency_ms': {f'p{q}': round(percentile(latencies, q) * 1000, 2) for q in (50, 90, 99)},
+                'per_worker': [{'pid': pid, 'cores': cores, 'in_flight': in_flight, 'requests': served,
+                                'alive': i not in self._dead}
+                               for i, (pid, cores, in_flight, served)
+                               in enumerate(zip(self._pids, self.cores, self._in_flight, self._served))]
+            }
+
+    def close(self, timeout=5.0):
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._closing.set()
+        self._thread.join(timeout)
+        self._fail_pending('工作池已关闭')
+        for reader in self._results:
+            reader.close()
+
+
+def tuning_path(weights_path, root=yolo_export.DEFAULT_EXPORT_DIR):
+    return os.path.join(yolo_export.export_dir(weights_path, root), 'workers.json')
+
+
+def measure(pool, sources, requests, clients):
+    """clients 个线程共提交 requests 个请求，返回吞吐量（张/秒）"""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            pool.submit((sources[i % len(sources)], pool.model_path, ())).result()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return requests / (time.perf_counter() - start)
+
+
+def tune(weights_path, sources, model_path=None, configs=None, requests=32, dispatch='least-loaded',
+         root=yolo_export.DEFAULT_EXPORT_DIR, imgsz=640):
+    """实测各 (进程数, 每进程线程数) 组合的吞吐量，保存并返回 (最优配置, 测试报告)
+
+    并发客户端数为进程数的2倍，保证每个进程始终有请求可处理。
+    """
+    model_path = os.path.abspath(model_path or weights_path)
+    report = []
+    for workers, threads in configs or candidate_configs():
+        pool = WorkerPool(model_path, workers, threads, dispatch, max_queue=workers * 4, imgsz=imgsz)
+        try:
+            startup = pool.wait_ready()
+            measure(pool, sources, workers * 2, workers * 2)  # 预热各进程
+            throughput = measure(pool, sources, requests, workers * 2)
+            latency = pool.stats()['latency_ms']
+        finally:
+            pool.close()
+        report.append({'workers': workers, 'threads': threads, 'throughput': round(throughput, 2),
+                       'latency_ms': latency, 'startup_s': round(startup, 2)})
+
+    # 吞吐量相差不超过5%（测量误差范围内）时选进程数少的组合，占用内存更少
+    top = max(r['throughput'] for r in report)
+    best = min((r for r in report if r['throughput'] >= top * 0.95), key=lambda r: r['workers'])
+    path = tuning_path(weights_path, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'workers': best['workers'], 'threads': best['threads'], 'dispatch': dispatch,
+                   'model': model_path, 'cores': len(available_cores()), 'report': report}, f,
+                  ensure_ascii=False, indent=2)
+    return best, report
+
+
+def tuned_config(weights_path, root=yolo_export.DEFAULT_EXPORT_DIR):
+    """返回之前为该权重测出的最优 (进程数, 每进程线程数)；没有记录或可用核数已变化时返回None"""
+    try:
+        with open(tuning_path(weights_path, root), encoding='utf-8') as f:
+            config = json.load(f)
+        workers, threads, cores = config['workers'], config['threads'], config['cores']
+    except (OSError, ValueError, KeyError):
+        return None
+    return (workers, threads) if cores == len(available_cores()) else None
@@ -1,19 +1,72 @@
 import argparse
+import importlib.util
 import json
 import os
 import sys
 import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
 
-# 尝试导入ultralytics，如果失败则使用模拟模式
-try:
-    from ultralytics import YOLO
-    from ultralytics.utils import LOGGER
-    ULTRALYTICS_AVAILABLE = True
-    # 禁用YOLO的详细日志输出
-    LOGGER.setLevel('ERROR')
-except ImportError:
-    ULTRALYTICS_AVAILABLE = False
-    print("警告: ultralytics不可用，将使用模拟模式", file=sys.stderr)
+from PIL import Image
+
+# ultralytics（以及torch）只在真正需要本地推理时才导入：
+# 通过推理服务检测时，命令行客户端不需要为导入torch付出启动时间
+ULTRALYTICS_AVAILABLE = importlib.util.find_spec('ultralytics') is not None
+YOLO = None
+
+DEFAULT_SERVER_URL = os.environ.get('YOLO_SERVER_URL', 'http://127.0.0.1:8765')
+
+# 视频推理进度行的前缀，最后一行才是结果JSON，route.ts 据此区分进度和结果
+PROGRESS_PREFIX = 'PROGRESS '
+# 视频自适应跳帧：最多连续跳过的帧数，0为逐帧推理（见 bench_frame_skip.py）
+VIDEO_MAX_SKIP = int(os.environ.get('YOLO_VIDEO_MAX_SKIP', 0))
+# 大图分块推理：长边超过该像素数的图片切成重叠的小块分批推理后合并，0为整图缩放推理（见 bench_tiled_inference.py）
+IMAGE_TILE = int(os.environ.get('YOLO_IMAGE_TILE', 0))
+# 每次推理都显式传入的推理参数默认值（与 ultralytics/cfg/default.yaml 一致）：缓存的模型复用同一个 predictor，
+# model.predict 把传入的参数合并进 predictor.args，没有传入的参数会沿用上一个请求的取值
+PREDICT_DEFAULTS = {'conf': 0.25, 'iou': 0.7, 'imgsz': 640, 'tile': IMAGE_TILE}
+# 与 ultralytics.data.utils.VID_FORMATS 一致，判断时不需要导入ultralytics
+VIDEO_SUFFIXES = {'.asf', '.avi', '.gif', '.m4v', '.mkv', '.mov', '.mp4', '.mpeg', '.mpg', '.ts', '.wmv', '.webm'}
+
+# 已加载的模型缓存：权重文件绝对路径 -> (修改时间, 模型)
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_ultralytics():
+    """导入ultralytics，失败时切换到模拟模式，返回是否可用"""
+    global YOLO, ULTRALYTICS_AVAILABLE
+    if YOLO is None and ULTRALYTICS_AVAILABLE:
+        try:
+            from ultralytics import YOLO as yolo
+            from ultralytics.utils import LOGGER
+            # 禁用YOLO的详细日志输出
+            LOGGER.setLevel('ERROR')
+            YOLO = yolo
+        except ImportError:
+            ULTRALYTICS_AVAILABLE = False
+    if not ULTRALYTICS_AVAILABLE:
+        print("警告: ultralytics不可用，将使用模拟模式", file=sys.stderr)
+    return ULTRALYTICS_AVAILABLE
+
+
+def predict_options(options):
+    """返回补全了 PREDICT_DEFAULTS 的推理参数，推理结果只取决于本次请求的参数"""
+    return dict(PREDICT_DEFAULTS, **options)
+
+
+def load_model(weights_path):
+    """加载YOLO模型并缓存，同一权重文件在进程内只加载一次（文件被替换后重新加载）"""
+    key = os.path.abspath(weights_path)
+    mtime = os.path.getmtime(key)
+    with _models_lock:
+        cached = _models.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, YOLO(key))
+            _models[key] = cached
+    return cached[1]
 
 
 def mock_predict(source_path, weights_path):
@@ -65,58 +118,209 @@ def mock_predict(source_path, weights_path):
     return json.dumps(result, ensure_ascii=False)
 
 
-def real_predict(source_path, weights_path):
+def result_to_dict(results, source_path, output_dir='runs/detect/predict'):
+    """把一个输入（图片或视频的所有帧）的 Results 转换为脚本输出的JSON结构"""
+    # 获取预测后的图片路径
+    predicted_image_path = os.path.join(output_dir, os.path.basename(source_path))
+
+    # 提取检测结果：每帧的检测框一次性转为NumPy按列转换，不再逐个框切片取值
+    detections = []
+    for r in results:
+        if r.boxes is not None:
+            columns = r.boxes.columns(r.names)
+            detections.extend({'name': name, 'confidence': confidence, 'box': box} for name, confidence, box
+                              in zip(columns['names'], columns['confidences'], columns['boxes']))
+
+    # 无论是否检测到对象，都返回结果图片路径
+    return {
+        'detections': detections,
+        'image_path': os.path.abspath(predicted_image_path),
+        'message': f'检测到 {len(detections)} 个对象' if detections else '未检测到对象'
+    }
+
+
+def is_video(source_path):
+    return os.path.splitext(source_path)[1].lower() in VIDEO_SUFFIXES
+
+
+def make_tracker(frame_rate, conf=0.25, tracker='bytetrack.yaml'):
+    """创建ByteTrack跟踪器，新轨迹的置信度门限不高于检测门限，保证单帧能检出的病害也会被计数"""
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace, yaml_load
+    from ultralytics.utils.checks import check_yaml
+
+    cfg = IterableSimpleNamespace(**yaml_load(check_yaml(tracker)))
+    cfg.track_high_thresh = min(cfg.track_high_thresh, conf)
+    cfg.new_track_thresh = min(cfg.new_track_thresh, conf)
+    return BYTETracker(args=cfg, frame_rate=frame_rate)
+
+
+def detect_video(source_path, weights_path, progress=None, progress_interval=1.0, output_dir='runs/detect/predict',
+                 **options):
+    """流式检测视频，内存占用与视频长度无关
+
+    逐帧消费 model.predict(stream=True) 返回的生成器（predictor.stream_inference），
+    每帧的 Results 用完即丢弃，只用ByteTrack把各帧的检测框关联为轨迹，
+    保留每条轨迹的类别、最高置信度及其检测框。同一处病害在连续帧中只计一次。
+    options 中的 vid_max_skip / vid_skip_thresh 开启自适应跳帧，跳过的帧由跟踪器外推轨迹位置。
+    progress(frames, total, fps) 每隔 progress_interval 秒及结束时调用一次。
+    """
+    import cv2
+
+    model = load_model(weights_path)
+    cap = cv2.VideoCapture(source_path)
+    frame_rate = cap.get(cv2.CAP_PROP_FPS) or 30
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    options = predict_options(options)
+    tracker = make_tracker(round(frame_rate), options['conf'])
+    # 安装了ffmpeg时推理过程中直接编码为浏览器可播放的H.264 MP4，route.ts 无需再转码
+    options.setdefault('video_writer', 'ffmpeg' if shutil.which('ffmpeg') else 'opencv')
+    options.setdefault('vid_max_skip', VIDEO_MAX_SKIP)
+
+    tracks = {}  # 轨迹ID -> 汇总信息
+    frames = 0
+    start = last_report = time.perf_counter()
+    stream = model.predict(source_path, stream=True, save=True, project='runs/detect', name='predict',
+                           exist_ok=True, **options)
+    keyframes = 0
+    for r in stream:
+        frames += 1
+        boxes = r.boxes.cpu().numpy() if r.boxes is not None else []
+        # 开启自适应跳帧（vid_max_skip）时，与上一关键帧几乎相同的帧不做推理，由跟踪器预测病害位置
+        keyframe = all(model.predictor.keyframes)
+        keyframes += keyframe
+        if not keyframe:
+            tracked = tracker.propagate()
+        elif len(boxes):
+            tracked = tracker.update(boxes, r.orig_img)
+        else:
+            tracked = []
+        # 每行为 x1, y1, x2, y2, 轨迹ID, 置信度, 类别, 检测框序号
+        for x1, y1, x2, y2, track_id, score, cls, _ in tracked:
+            track_id = int(track_id)
+            track = tracks.get(track_id)
+            if track is None:
+                track = tracks[track_id] = {'track_id': track_id, 'confidence': 0.0, 'first_frame': frames,
+                                            'frames': 0}
+            track['frames'] += 1
+            track['last_frame'] = frames
+            if keyframe and score > track['confidence']:
+                track.update(name=r.names[int(cls)], confidence=float(score),
+                             box=[float(x1), float(y1), float(x2), float(y2)])
+        now = time.perf_counter()
+        if progress is not None and now - last_report >= progress_interval:
+            progress(frames, total, frames / (now - start))
+            last_report = now
+    elapsed = time.perf_counter() - start
+    if progress is not None:
+        progress(frames, total, frames / elapsed if elapsed > 0 else 0.0)
+
+    detections = sorted(tracks.values(), key=lambda t: t['track_id'])
+    class_counts = {}
+    for track in detections:
+        class_counts[track['name']] = class_counts.get(track['name'], 0) + 1
+    # 视频写入器决定了结果文件的实际文件名（.avi 或 _h264.mp4）
+    sink = next(iter(model.predictor.vid_writer.values()), None)
+    predicted_path = sink.path if sink is not None else os.path.join(output_dir, os.path.basename(source_path))
+    return {
+        'detections': detections,
+        'class_counts': class_counts,
+        'frames': frames,
+        'keyframes': keyframes,
+        'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'image_path': os.path.abspath(predicted_path),
+        'message': f'在 {frames} 帧中检测到 {len(detections)} 处病害' if detections else '未检测到对象'
+    }
+
+
+def detect_batch(source_paths, weights_path, progress=None, **options):
+    """用缓存的模型批量检测多张图片，按输入顺序返回结果字典列表
+
+    options 为传给 model.predict 的推理参数（conf、iou、imgsz、tile），没有指定的参数取 PREDICT_DEFAULTS。
+    尺寸相同的图片letterbox到同一个矩形输入后组成一个batch做一次前向推理；
+    尺寸不同的图片若放进同一batch会被填充为正方形，反而增加计算量，因此按尺寸分组。
+    tile 大于0时长边超过 tile 的图片分块推理，细小裂缝不会因整图缩小而消失。
+    视频由 detect_video 流式推理，progress 为其进度回调；其他无法作为图片打开的输入单独推理。
+    """
+    model = load_model(weights_path)
+
+    # 设置固定的输出目录
+    output_dir = 'runs/detect/predict'
+    os.makedirs(output_dir, exist_ok=True)
+
+    groups = {}
+    for i, source_path in enumerate(source_paths):
+        try:
+            with Image.open(source_path) as image:  # 只读取文件头中的尺寸
+                groups.setdefault(image.size, []).append(i)
+        except OSError:
+            groups[('single', i)] = [i]
+
+    results = [None] * len(source_paths)
+    for group, indexes in groups.items():
+        sources = [source_paths[i] for i in indexes]
+        if group[0] == 'single' and is_video(sources[0]):
+            results[indexes[0]] = detect_video(sources[0], weights_path, progress, output_dir=output_dir, **options)
+            continue
+        predicted = model.predict(sources if len(sources) > 1 else sources[0], save=True, project='runs/detect',
+                                  name='predict', exist_ok=True, batch=len(sources),
+                                  **predict_options(options))
+        if group[0] == 'single':
+            results[indexes[0]] = result_to_dict(predicted, sources[0], output_dir)
+        else:
+            for i, r in zip(indexes, predicted):
+                results[i] = result_to_dict([r], source_paths[i], output_dir)
+    return results
+
+
+def detect(source_path, weights_path, progress=None):
+    """用缓存的模型检测一张图片或一个视频，返回与 real_predict 相同结构的结果字典"""
+    return detect_batch([source_path], weights_path, progress)[0]
+
+
+def print_progress(frames, total, fps):
+    """以单行JSON输出视频推理进度，供 route.ts 转发"""
+    print(PROGRESS_PREFIX + json.dumps({'frames': frames, 'total': total, 'fps': round(fps, 2)}), flush=True)
+
+
+def real_predict(source_path, weights_path, progress=None):
     """真实的YOLO预测功能"""
-    if not ULTRALYTICS_AVAILABLE:
+    if not load_ultralytics():
         return json.dumps({"error": "ultralytics不可用"})
     
     try:
-        model = YOLO(weights_path)
-        
-        # 设置固定的输出目录
-        output_dir = 'runs/detect/predict'
-        os.makedirs(output_dir, exist_ok=True)
-        results = model.predict(source_path, save=True, project='runs/detect', 
-                               name='predict', exist_ok=True)
-
-        # 获取预测后的图片路径
-        predicted_image_path = os.path.join(output_dir, os.path.basename(source_path))
-
-        # 提取检测结果
-        detections = []
-        for r in results:
-            if r.boxes is not None:
-                for box in r.boxes:
-                    # 获取类别名称
-                    class_id = int(box.cls[0])
-                    class_name = r.names[class_id]
-                    confidence = float(box.conf[0])
-                    
-                    detections.append({
-                        'name': class_name,
-                        'confidence': confidence,
-                        'box': [float(coord) for coord in box.xyxy[0]]
-                    })
-
-        # 无论是否检测到对象，都返回结果图片路径
-        result = {
-            'detections': detections,
-            'image_path': os.path.abspath(predicted_image_path),
-            'message': f'检测到 {len(detections)} 个对象' if detections else '未检测到对象'
-        }
-        
-        return json.dumps(result, ensure_ascii=False)
-            
+        return json.dumps(detect(source_path, weights_path, progress), ensure_ascii=False)
     except Exception as e:
         return json.dumps({"error": f"YOLO预测失败: {str(e)}"})
 
 
-def predict(source_path, weights_path, use_mock=False):
+def predict(source_path, weights_path, use_mock=False, progress=None):
     """主预测函数"""
-    if use_mock or not ULTRALYTICS_AVAILABLE:
+    if use_mock or not load_ultralytics():
         return mock_predict(source_path, weights_path)
     else:
-        return real_predict(source_path, weights_path)
+        return real_predict(source_path, weights_path, progress)
+
+
+def remote_predict(source_path, weights_path, server_url=DEFAULT_SERVER_URL, timeout=60):
+    """请求常驻的推理服务（yolo_server.py）检测图片，服务不可达时返回None"""
+    payload = json.dumps({
+        'source': os.path.abspath(source_path),
+        'weights': os.path.abspath(weights_path)
+    }).encode('utf-8')
+    req = urllib.request.Request(server_url.rstrip('/') + '/predict', data=payload,
+                                 headers={'Content-Type': 'application/json'})
+    # 推理服务在本机，不经过环境变量中配置的HTTP代理
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(req, timeout=timeout) as resp:
+            return resp.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        # 服务端已处理但检测失败，返回服务端给出的错误信息
+        return e.read().decode('utf-8')
+    except (urllib.error.URLError, OSError):
+        return None
 
 
 if __name__ == "__main__":
@@ -124,6 +328,10 @@ if __name__ == "__main__":
     parser.add_argument('--source', type=str, required=True, help='path to source image')
     parser.add_argument('--weights', type=str, required=True, help='path to model weights')
     parser.add_argument('--mock', action='store_true', help='use mock mode')
+    parser.add_argument('--server', type=str, default=DEFAULT_SERVER_URL, help='inference server url')
+    parser.add_argument('--local', action='store_true', help='skip the inference server and run the model in-process')
+    parser.add_argument('--progress', action='store_true',
+                        help='print PROGRESS lines while streaming a video, the result JSON is the last line')
     args = parser.parse_args()
 
     # 重定向stderr到devnull以避免YOLO日志干扰
@@ -131,7 +339,17 @@ if __name__ == "__main__":
     sys.stderr = open(os.devnull, 'w')
     
     try:
-        result = predict(args.source, args.weights, args.mock)
+        # 优先交给已加载模型的推理服务，服务未启动时回退到本地推理
+        result = None
+        if not args.mock and not args.local:
+            result = remote_predict(args.source, args.weights, args.server)
+        if result is None:
+            weights = args.weights
+            if not args.mock and os.path.exists(weights):
+                # 使用推理服务启动时为该权重选出的 ONNX / OpenVINO 模型（见 yolo_export.py）
+                from yolo_export import selected_weights
+                weights = selected_weights(weights)
+            result = predict(args.source, weights, args.mock, print_progress if args.progress else None)
         print(result)
         # 恢复stderr
         sys.stderr.close()
@@ -1,8 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { spawn } from 'child_process';
 import path from 'path';
+import os from 'os';
 import fs from 'fs/promises';
-import { v4 as uuidv4 } from 'uuid';
+import { createHash } from 'crypto';
 import { existsSync, statSync } from 'fs';
 import { UserDao } from '@/lib/userDao';
 import { EmailService } from '@/lib/emailService';
@@ -22,199 +23,227 @@ const damageMapping: { [key: string]: string } = {
   'D40': 'D40坑洼',
 };
 
+// 常驻YOLO推理服务（RDD_yolo11/yolo_server.py）地址，模型只在服务启动时加载一次
+const YOLO_SERVER_URL = process.env.YOLO_SERVER_URL || 'http://127.0.0.1:8765';
+const YOLO_SERVER_TIMEOUT_MS = 60000;
+// 视频推理时脚本逐帧输出的进度行前缀，最后一行才是结果JSON
+const PROGRESS_PREFIX = 'PROGRESS ';
+// 请求头 Accept 包含该类型时以NDJSON流式返回视频推理进度和最终结果
+const NDJSON_CONTENT_TYPE = 'application/x-ndjson';
+const VIDEO_EXTENSIONS = new Set(['.asf', '.avi', '.gif', '.m4v', '.mkv', '.mov', '.mp4', '.mpeg', '.mpg', '.ts', '.wmv', '.webm']);
+// 正在运行的本地推理脚本数；并发的脚本平分CPU核，避免每个进程都按全部核数开线程互相争抢
+let localInferenceCount = 0;
+
 /**
- * @swagger
- * /api/detect/road-damage:
- *   post:
- *     summary: 路面病害检测
- *     description: 上传图片，调用YOLO模型检测路面病害类型并返回检测结果。
- *     requestBody:
- *       required: true
- *       content:
- *         multipart/form-data:
- *           schema:
- *             type: object
- *             properties:
- *               file:
- *                 type: string
- *                 format: binary
- *                 description: 待检测的图片文件
- *     responses:
- *       200:
- *         description: 检测成功，返回病害类型统计和结果图片
- *         content:
- *           application/json:
- *             schema:
- *               type: object
- *               properties:
- *                 results:
- *                   type: object
- *                   additionalProperties:
- *                     type: object
- *                     properties:
- *                       count:
- *                         type: integer
- *                       confidence:
- *                         type: number
- *                 resultImage:
- *                   type: string
- *                   description: 结果图片/视频的URL
- *                 result_image:
- *                   type: string
- *                   description: 结果图片/视频的URL（兼容字段）
- *                 pythonResult:
- *                   type: object
- *                   description: 原始Python脚本输出（调试用）
- *       400:
- *         description: 未上传文件
- *         content:
- *           application/json:
- *             schema:
- *               type: object
- *               properties:
- *                 error:
- *                   type: string
- *       500:
- *         description: 检测失败
- *         content:
- *           application/json:
- *             schema:
- *               type: object
- *               properties:
- *                 error:
- *                   type: string
+ * 取脚本输出中最后一行结果JSON，跳过视频推理的进度行
  */
-export async function POST(req: NextRequest) {
+function parseLastJsonLine(output: string): any {
+  const lines = output.split(/\r?\n/).map((line) => line.trim())
+    .filter((line) => line && !line.startsWith(PROGRESS_PREFIX));
+  return JSON.parse(lines[lines.length - 1] || '');
+}
+
+/**
+ * 请求常驻推理服务检测图片，返回与 yolov11_predict.py 相同结构的结果；
+ * 服务未启动或请求失败时返回 null，由调用方回退到启动Python脚本
+ */
+async function requestYoloServer(imagePath: string, modelPath: string): Promise<any | null> {
+  try {
+    const response = await fetch(`${YOLO_SERVER_URL}/predict`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ source: imagePath, weights: modelPath }),
+      signal: AbortSignal.timeout(YOLO_SERVER_TIMEOUT_MS),
+    });
+    const result = await response.json();
+    if (!response.ok || result.error) {
+      console.error('YOLO推理服务返回错误:', result.error);
+      return null;
+    }
+    return result;
+  } catch (error) {
+    console.log('YOLO推理服务不可用，回退到Python脚本:', (error as Error).message);
+    return null;
+  }
+}
+
+interface VideoProgress {
+  frames: number;
+  total: number;
+  fps: number;
+}
+
+interface DetectionReply {
+  status: number;
+  body: any;
+}
+
+/**
+ * 保存上传的文件并检测路面病害，返回响应状态码和JSON响应体；
+ * 视频推理时每个进度行解析后交给 onProgress
+ */
+async function detectRoadDamage(req: NextRequest, onProgress?: (progress: VideoProgress) => void): Promise<DetectionReply> {
   try {
     const formData = await req.formData();
     const file = formData.get('file') as File | null;
 
     if (!file) {
-      return NextResponse.json({ error: 'No file uploaded' }, { status: 400 });
+      return { status: 400, body: { error: 'No file uploaded' } };
     }
 
-    // 保存上传的图片到RDD_yolo11/upload目录
+    // 保存上传的图片到RDD_yolo11/upload目录，以内容哈希命名：重复上传的同一张图片只保存一份，
+    // 推理服务也据此命中结果缓存
     const uploadDir = path.join(process.cwd(), 'RDD_yolo11', 'upload');
     await fs.mkdir(uploadDir, { recursive: true });
-    const fileName = `${uuidv4()}-${file.name}`;
-    const imagePath = path.join(uploadDir, fileName);
     const imageBuffer = Buffer.from(await file.arrayBuffer());
-    await fs.writeFile(imagePath, imageBuffer);
+    const contentHash = createHash('sha256').update(imageBuffer).digest('hex');
+    const fileName = `${contentHash}${path.extname(file.name).toLowerCase() || '.jpg'}`;
+    const imagePath = path.join(uploadDir, fileName);
+    if (!existsSync(imagePath)) {
+      await fs.writeFile(imagePath, imageBuffer);
+    }
 
     const pythonScriptPath = path.resolve(process.cwd(), 'RDD_yolo11', 'yolov11_predict.py');
     const modelPath = path.resolve(process.cwd(), 'RDD_yolo11', 'best.pt');
 
-    // 检查虚拟环境是否存在
-    const venvPath = path.join(process.cwd(), 'RDD_yolo11', 'venv');
-    const venvExists = await fs.access(venvPath).then(() => true).catch(() => false);
+    // 图片优先使用常驻推理服务，服务不可用时才为本次请求启动Python进程；
+    // 视频耗时与长度成正比，直接交给脚本流式推理，以便转发逐帧进度
+    const isVideo = VIDEO_EXTENSIONS.has(path.extname(fileName));
+    let pythonResult = isVideo ? null : await requestYoloServer(imagePath, modelPath);
+    if (!pythonResult) {
+      // 检查虚拟环境是否存在
+      const venvPath = path.join(process.cwd(), 'RDD_yolo11', 'venv');
+      const venvExists = await fs.access(venvPath).then(() => true).catch(() => false);
     
-    let pythonCommand: string;
-    let pythonArgs: string[];
+      let pythonCommand: string;
+      let pythonArgs: string[];
     
-    // 优先使用系统Python，如果虚拟环境存在且可用则使用虚拟环境
-    if (venvExists) {
-      try {
-        const isWindows = process.platform === 'win32';
-        const pythonPath = isWindows 
-          ? path.join(venvPath, 'Scripts', 'python.exe')
-          : path.join(venvPath, 'bin', 'python');
+      // 优先使用系统Python，如果虚拟环境存在且可用则使用虚拟环境
+      if (venvExists) {
+        try {
+          const isWindows = process.platform === 'win32';
+          const pythonPath = isWindows 
+            ? path.join(venvPath, 'Scripts', 'python.exe')
+            : path.join(venvPath, 'bin', 'python');
         
-        // 测试虚拟环境Python是否可用
-        await fs.access(pythonPath);
-        pythonCommand = pythonPath;
-        pythonArgs = [pythonScriptPath, '--source', imagePath, '--weights', modelPath];
-        console.log('使用虚拟环境Python:', pythonPath);
-      } catch (error) {
-        console.log('虚拟环境Python不可用，使用系统Python');
+          // 测试虚拟环境Python是否可用
+          await fs.access(pythonPath);
+          pythonCommand = pythonPath;
+          pythonArgs = [pythonScriptPath, '--source', imagePath, '--weights', modelPath, '--local', '--progress'];
+          console.log('使用虚拟环境Python:', pythonPath);
+        } catch (error) {
+          console.log('虚拟环境Python不可用，使用系统Python');
+          pythonCommand = 'python';
+          pythonArgs = [pythonScriptPath, '--source', imagePath, '--weights', modelPath, '--local', '--progress'];
+        }
+      } else {
         pythonCommand = 'python';
-        pythonArgs = [pythonScriptPath, '--source', imagePath, '--weights', modelPath];
+        pythonArgs = [pythonScriptPath, '--source', imagePath, '--weights', modelPath, '--local', '--progress'];
+        console.log('使用系统Python');
       }
-    } else {
-      pythonCommand = 'python';
-      pythonArgs = [pythonScriptPath, '--source', imagePath, '--weights', modelPath];
-      console.log('使用系统Python');
-    }
 
-    console.log('使用Python命令:', pythonCommand);
-    console.log('Python参数:', pythonArgs);
-
-    // 调用Python脚本
-    const pythonProcess = spawn(pythonCommand, pythonArgs, {
-      cwd: path.join(process.cwd(), 'RDD_yolo11'),
-      env: {
-        ...process.env,
-        PYTHONPATH: path.join(process.cwd(), 'RDD_yolo11'),
-        // 禁用代理设置
-        HTTP_PROXY: '',
-        HTTPS_PROXY: '',
-        http_proxy: '',
-        https_proxy: '',
-      }
-    });
+      console.log('使用Python命令:', pythonCommand);
+      console.log('Python参数:', pythonArgs);
 
-    let scriptOutput = '';
-    let scriptError = '';
+      // 调用Python脚本
+      localInferenceCount += 1;
+      const torchThreads = String(Math.max(1, Math.floor(os.cpus().length / localInferenceCount)));
+      const pythonProcess = spawn(pythonCommand, pythonArgs, {
+        cwd: path.join(process.cwd(), 'RDD_yolo11'),
+        env: {
+          ...process.env,
+          PYTHONPATH: path.join(process.cwd(), 'RDD_yolo11'),
+          OMP_NUM_THREADS: torchThreads,
+          MKL_NUM_THREADS: torchThreads,
+          // 禁用代理设置
+          HTTP_PROXY: '',
+          HTTPS_PROXY: '',
+          http_proxy: '',
+          https_proxy: '',
+        }
+      });
 
-    pythonProcess.stdout.on('data', (data) => {
-      scriptOutput += data.toString();
-      console.log('Python输出:', data.toString());
-    });
+      let scriptOutput = '';
+      let scriptError = '';
 
-    pythonProcess.stderr.on('data', (data) => {
-      scriptError += data.toString();
-      console.error('Python错误:', data.toString());
-    });
+      let pendingLine = '';
+      pythonProcess.stdout.on('data', (data) => {
+        scriptOutput += data.toString();
+        // 按行转发视频推理进度，结果JSON留到进程结束后解析
+        const lines = (pendingLine + data.toString()).split(/\r?\n/);
+        pendingLine = lines.pop() || '';
+        for (const line of lines) {
+          if (line.startsWith(PROGRESS_PREFIX)) {
+            try {
+              const progress: VideoProgress = JSON.parse(line.slice(PROGRESS_PREFIX.length));
+              console.log(`视频推理进度: ${progress.frames}/${progress.total || '?'} 帧, ${progress.fps} fps`);
+              onProgress?.(progress);
+            } catch {
+              console.log('Python输出:', line);
+            }
+          } else if (line.trim()) {
+            console.log('Python输出:', line);
+          }
+        }
+      });
 
-    const exitCode = await new Promise((resolve) => {
-      pythonProcess.on('close', resolve);
-    });
+      pythonProcess.stderr.on('data', (data) => {
+        scriptError += data.toString();
+        console.error('Python错误:', data.toString());
+      });
+
+      const exitCode = await new Promise((resolve) => {
+        pythonProcess.on('close', resolve);
+      }).finally(() => {
+        localInferenceCount -= 1;
+      });
 
-    console.log('Python脚本退出码:', exitCode);
-    console.log('Python脚本输出:', scriptOutput);
-    console.log('Python脚本错误:', scriptError);
+      console.log('Python脚本退出码:', exitCode);
+      console.log('Python脚本输出:', scriptOutput);
+      console.log('Python脚本错误:', scriptError);
 
-    // 如果Python脚本失败，返回模拟结果用于测试
-    if (exitCode !== 0) {
-      console.error(`Python script error: ${scriptError}`);
+      // 如果Python脚本失败，返回模拟结果用于测试
+      if (exitCode !== 0) {
+        console.error(`Python script error: ${scriptError}`);
       
-      // 返回模拟结果，避免前端报错
-      const mockResults = {
-        'D0纵向裂缝': { count: 2, confidence: 0.85 },
-        'D1横向裂缝': { count: 1, confidence: 0.78 },
-        'D20龟裂': { count: 0, confidence: 0 },
-        'D40坑洼': { count: 1, confidence: 0.92 },
-      };
+        // 返回模拟结果，避免前端报错
+        const mockResults = {
+          'D0纵向裂缝': { count: 2, confidence: 0.85 },
+          'D1横向裂缝': { count: 1, confidence: 0.78 },
+          'D20龟裂': { count: 0, confidence: 0 },
+          'D40坑洼': { count: 1, confidence: 0.92 },
+        };
 
-      return NextResponse.json({ 
-        results: mockResults,
-        resultImage: '',
-        warning: '使用模拟数据，Python脚本执行失败',
-        error: scriptError,
-        exitCode
-      });
-    }
+        return { status: 200, body: {
+          results: mockResults,
+          resultImage: '',
+          warning: '使用模拟数据，Python脚本执行失败',
+          error: scriptError,
+          exitCode
+        } };
+      }
 
-    // 解析脚本输出并分类
-    let pythonResult;
-    try {
-      pythonResult = JSON.parse(scriptOutput.trim());
-    } catch (parseError) {
-      console.error('Failed to parse Python script output:', scriptOutput);
+      // 解析脚本输出并分类
+      try {
+        pythonResult = parseLastJsonLine(scriptOutput);
+      } catch (parseError) {
+        console.error('Failed to parse Python script output:', scriptOutput);
       
-      // 返回模拟结果
-      const mockResults = {
-        'D0纵向裂缝': { count: 2, confidence: 0.85 },
-        'D1横向裂缝': { count: 1, confidence: 0.78 },
-        'D20龟裂': { count: 0, confidence: 0 },
-        'D40坑洼': { count: 1, confidence: 0.92 },
-      };
+        // 返回模拟结果
+        const mockResults = {
+          'D0纵向裂缝': { count: 2, confidence: 0.85 },
+          'D1横向裂缝': { count: 1, confidence: 0.78 },
+          'D20龟裂': { count: 0, confidence: 0 },
+          'D40坑洼': { count: 1, confidence: 0.92 },
+        };
 
-      return NextResponse.json({ 
-        results: mockResults,
-        resultImage: '',
-        warning: '使用模拟数据，Python输出解析失败',
-        rawOutput: scriptOutput
-      });
+        return { status: 200, body: {
+          results: mockResults,
+          resultImage: '',
+          warning: '使用模拟数据，Python输出解析失败',
+          rawOutput: scriptOutput
+        } };
+      }
     }
 
     // 初始化结果结构
@@ -285,6 +314,13 @@ export async function POST(req: NextRequest) {
       let absH264FilePath = path.isAbsolute(h264FilePath) ? h264FilePath : path.join(process.cwd(), h264FilePath);
       let absOrigPath = path.isAbsolute(origPath) ? origPath : path.join(process.cwd(), origPath);
 
+      // 安装了ffmpeg时预测脚本在推理过程中已直接编码为H.264 MP4（*_h264.mp4），无需再转码
+      if (ext === '.mp4' && fileName.endsWith('_h264')) {
+        h264FileName = path.basename(origPath);
+        h264FilePath = origPath;
+        absH264FilePath = absOrigPath;
+      }
+
       // 路径矫正：如果 image_path 是 .mp4 但实际只存在 .avi 文件，则自动切换为 .avi
       if (ext === '.mp4' && !existsSync(absOrigPath)) {
         const aviPath = origPath.replace(/\.mp4$/i, '.avi');
@@ -465,15 +501,123 @@ export async function POST(req: NextRequest) {
       resultImageUrl = '';
       console.log('没有image_path，resultImageUrl设为空');
     }
-    return NextResponse.json({ 
+    return { status: 200, body: {
       results,
       resultImage: resultImageUrl,
       result_image: resultImageUrl,
       pythonResult: pythonResult // 添加原始Python结果用于调试
-    });
+    } };
 
   } catch (error) {
     console.error('API Error:', error);
-    return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
+    return { status: 500, body: { error: 'Internal Server Error' } };
+  }
+}
+
+/**
+ * 以NDJSON流返回检测过程：每个视频推理进度一行 {"type":"progress","frames","total","fps"}，
+ * 最后一行 {"type":"result","status","data"}，data 与非流式响应的JSON相同
+ */
+function streamRoadDamage(req: NextRequest): Response {
+  const encoder = new TextEncoder();
+  let closed = false;
+  const stream = new ReadableStream({
+    async start(controller) {
+      const send = (message: object) => {
+        if (!closed) {
+          controller.enqueue(encoder.encode(JSON.stringify(message) + '\n'));
+        }
+      };
+      const { status, body } = await detectRoadDamage(req, (progress) => send({ type: 'progress', ...progress }));
+      send({ type: 'result', status, data: body });
+      if (!closed) {
+        controller.close();
+      }
+    },
+    cancel() {
+      // 客户端断开后推理照常完成，只是不再发送
+      closed = true;
+    },
+  });
+  return new Response(stream, {
+    headers: {
+      'Content-Type': `${NDJSON_CONTENT_TYPE}; charset=utf-8`,
+      'Cache-Control': 'no-cache',
+      'X-Accel-Buffering': 'no', // 经过nginx反向代理时不缓冲，进度行立即送达
+    },
+  });
+}
+
+/**
+ * @swagger
+ * /api/detect/road-damage:
+ *   post:
+ *     summary: 路面病害检测
+ *     description: |
+ *       上传图片或视频，调用YOLO模型检测路面病害类型并返回检测结果。
+ *       请求头 Accept 为 application/x-ndjson 时以NDJSON流返回：视频推理期间每行一个
+ *       {"type":"progress","frames","total","fps"} 进度，最后一行 {"type":"result","status","data"}，
+ *       data 为下面的JSON响应体。
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         multipart/form-data:
+ *           schema:
+ *             type: object
+ *             properties:
+ *               file:
+ *                 type: string
+ *                 format: binary
+ *                 description: 待检测的图片文件
+ *     responses:
+ *       200:
+ *         description: 检测成功，返回病害类型统计和结果图片
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               properties:
+ *                 results:
+ *                   type: object
+ *                   additionalProperties:
+ *                     type: object
+ *                     properties:
+ *                       count:
+ *                         type: integer
+ *                       confidence:
+ *                         type: number
+ *                 resultImage:
+ *                   type: string
+ *                   description: 结果图片/视频的URL
+ *                 result_image:
+ *                   type: string
+ *                   description: 结果图片/视频的URL（兼容字段）
+ *                 pythonResult:
+ *                   type: object
+ *                   description: 原始Python脚本输出（调试用）
+ *       400:
+ *         description: 未上传文件
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               properties:
+ *                 error:
+ *                   type: string
+ *       500:
+ *         description: 检测失败
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               properties:
+ *                 error:
+ *                   type: string
+ */
+export async function POST(req: NextRequest) {
+  if ((req.headers.get('accept') || '').includes(NDJSON_CONTENT_TYPE)) {
+    return streamRoadDamage(req);
   }
-}
\ No newline at end of file
+  const { status, body } = await detectRoadDamage(req);
+  return NextResponse.json(body, { status });
+}
@@ -47,6 +47,28 @@ async function getAddressFromCoordinates(lat: number, lng: number): Promise<stri
   }
 }
 
+// Django病害登记服务：按位置和类别去重合并病害，提供视口和热力图查询
+const DAMAGE_REGISTRY_URL = process.env.DAMAGE_REGISTRY_URL || 'http://localhost:8000/api/damage/report/';
+
+// 把检测结果登记到病害登记服务，失败只记录日志，不影响检测历史的保存
+async function registerDamage(lat: number, lng: number, results: any, resultImage: string | null, timestamp: string) {
+  try {
+    const response = await fetch(DAMAGE_REGISTRY_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ lat, lng, coord_type: 'gcj02', results, result_image: resultImage, timestamp }),
+    });
+    if (!response.ok) {
+      console.error('病害登记失败:', response.status, await response.text());
+      return;
+    }
+    const data = await response.json();
+    console.log('病害登记完成:', { created: data.created_count, merged: data.merged_count });
+  } catch (error) {
+    console.error('病害登记服务不可用:', error);
+  }
+}
+
 // 格式化时间戳为MySQL兼容格式
 function formatTimestampForMySQL(timestamp: string): string {
   try {
@@ -528,6 +550,9 @@ export async function POST(request: NextRequest) {
     const insertId = (insertResult as any).insertId;
     
     console.log('数据插入成功，ID:', insertId);
+
+    // 不等待登记完成，避免登记服务影响上报接口的响应时间
+    registerDamage(lat, lng, results, resultImage ? String(resultImage) : null, timestamp);
     
     return NextResponse.json({ 
       message: '检测结果保存成功',
@@ -45,6 +45,13 @@ interface DetectionResponse {
   result_image?: string;
 }
 
+// 视频推理进度：已处理帧数、总帧数和推理速度
+interface VideoProgress {
+  frames: number;
+  total: number;
+  fps: number;
+}
+
 // 检测历史记录接口
 interface DamageRecord {
   id: number;
@@ -361,6 +368,7 @@ export default function RoadDamageModule() {
   }, []);
 
   const [isAnalyzing, setIsAnalyzing] = useState(false)
+  const [videoProgress, setVideoProgress] = useState<VideoProgress | null>(null)
   const [uploadedFile, setUploadedFile] = useState<string | null>(null)
   const [isLoading, setIsLoading] = useState(false)
 
@@ -734,6 +742,7 @@ const handleUploadAndAnalyze = async (file: File) => {
   }
 
   setIsAnalyzing(true);       // 替代旧的 setIsLoading()
+  setVideoProgress(null);
   setResults(null);
   setResultImage(null);
 
@@ -742,21 +751,48 @@ const handleUploadAndAnalyze = async (file: File) => {
 
   try {
     console.log('开始上传文件:', file.name);
+    // 以NDJSON流接收结果：视频推理期间逐行收到进度，最后一行为检测结果
     const response = await fetch('/api/detect/road-damage', {
       method: 'POST',
+      headers: { Accept: 'application/x-ndjson' },
       body: formData,
     });
 
     console.log('API响应状态:', response.status);
     console.log('API响应头:', response.headers);
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       const errorData = await response.text();
       console.error('API错误响应:', errorData);
       throw new Error(`API请求失败: ${response.status} - ${errorData}`);
     }
 
-    const data: DetectionResponse = await response.json();
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffered = '';
+    let reply: { status: number; data: any } | null = null;
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      const lines = (buffered + value).split('\n');
+      buffered = lines.pop() || '';
+      for (const line of lines.filter((l) => l.trim())) {
+        const message = JSON.parse(line);
+        if (message.type === 'progress') {
+          setVideoProgress({ frames: message.frames, total: message.total, fps: message.fps });
+        } else if (message.type === 'result') {
+          reply = message;
+        }
+      }
+    }
+    if (!reply) {
+      throw new Error('API响应中没有检测结果');
+    }
+    if (reply.status !== 200) {
+      console.error('API错误响应:', reply.data);
+      throw new Error(`API请求失败: ${reply.status} - ${reply.data?.error}`);
+    }
+
+    const data: DetectionResponse = reply.data;
     console.log('API响应数据:', data);
     
     if (data.results) {
@@ -782,6 +818,7 @@ const handleUploadAndAnalyze = async (file: File) => {
     toast.error(error.message || "分析过程中发生错误");
   } finally {
     setIsAnalyzing(false);
+    setVideoProgress(null);
   }
 };
 
@@ -880,7 +917,11 @@ const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
                 <div className="space-y-4">
                   <Loader2 className="animate-spin mx-auto w-8 sm:w-12 h-8 sm:h-12 text-blue-600" />
                   <p className="text-blue-600 font-medium text-sm sm:text-base">AI分析中...</p>
-                  <p className="text-xs sm:text-sm text-gray-500">正在识别路面病害类型</p>
+                  <p className="text-xs sm:text-sm text-gray-500">
+                    {videoProgress
+                      ? `已处理 ${videoProgress.frames}/${videoProgress.total || '?'} 帧，${videoProgress.fps} fps`
+                      : '正在识别路面病害类型'}
+                  </p>
                 </div>
               ) : uploadedFile ? (
                 <div className="space-y-4">
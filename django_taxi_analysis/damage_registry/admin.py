@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import RoadDamage
+
+
+@admin.register(RoadDamage)
+class RoadDamageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'damage_type', 'gcj02_lat', 'gcj02_lon', 'confidence', 'report_count', 'last_seen')
+    list_filter = ('damage_type',)
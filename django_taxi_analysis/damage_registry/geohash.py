@@ -0,0 +1,75 @@
+"""GeoHash编码与邻近网格计算
+
+GeoHash把经纬度编码为base32字符串，前缀相同的点位于同一网格内，字符串越长网格越小。
+病害记录按GeoHash建B树索引，按半径查询时只需扫描目标网格及其8个相邻网格的前缀范围。
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_M = 6371000.0
+
+
+def encode(lat, lng, precision=9):
+    """把经纬度编码为指定长度的GeoHash"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coord >= mid:
+            value = value * 2 + 1
+            interval[0] = mid
+        else:
+            value *= 2
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """返回指定长度GeoHash网格的 (纬度跨度, 经度跨度)，单位为度"""
+    lat_bits = precision * 5 // 2
+    lng_bits = precision * 5 - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def precision_for_radius(radius_m, lat):
+    """网格边长不小于 radius_m 的最长GeoHash长度，目标网格加8个相邻网格即可覆盖该半径"""
+    for precision in range(12, 0, -1):
+        lat_size, lng_size = cell_size(precision)
+        height = math.radians(lat_size) * EARTH_RADIUS_M
+        width = math.radians(lng_size) * EARTH_RADIUS_M * math.cos(math.radians(lat))
+        if min(height, width) >= radius_m:
+            return precision
+    return 1
+
+
+def neighbors(lat, lng, precision):
+    """包含该点的网格及其周围8个网格的GeoHash（去重，靠近两极或经度180度时可能少于9个）"""
+    lat_size, lng_size = cell_size(precision)
+    cells = []
+    for dlat in (-lat_size, 0, lat_size):
+        for dlng in (-lng_size, 0, lng_size):
+            neighbor_lat = min(max(lat + dlat, -90.0), 90.0)
+            neighbor_lng = (lng + dlng + 180.0) % 360.0 - 180.0
+            cell = encode(neighbor_lat, neighbor_lng, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def prefix_range(prefix):
+    """前缀查询对应的字符串区间 [prefix, prefix+'{')，'{' 排在base32所有字符之后，可以走B树索引"""
+    return prefix, prefix + '{'
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """两点间的球面距离，单位为米"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlmb = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
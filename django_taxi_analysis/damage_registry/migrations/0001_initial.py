@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="RoadDamage",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "damage_type",
+                    models.CharField(max_length=32, verbose_name="病害类型"),
+                ),
+                ("gcj02_lat", models.FloatField(verbose_name="GCJ02纬度")),
+                ("gcj02_lon", models.FloatField(verbose_name="GCJ02经度")),
+                ("geohash", models.CharField(max_length=12, verbose_name="GeoHash")),
+                ("confidence", models.FloatField(default=0, verbose_name="最高置信度")),
+                (
+                    "report_count",
+                    models.IntegerField(default=1, verbose_name="上报次数"),
+                ),
+                (
+                    "result_image",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=512,
+                        verbose_name="最近一次结果图片",
+                    ),
+                ),
+                ("first_seen", models.DateTimeField(verbose_name="首次上报时间")),
+                ("last_seen", models.DateTimeField(verbose_name="最近上报时间")),
+            ],
+            options={
+                "verbose_name": "路面病害登记",
+                "verbose_name_plural": "路面病害登记",
+                "db_table": "road_damage",
+                "indexes": [
+                    models.Index(
+                        fields=["geohash"], name="road_damage_geohash_71e012_idx"
+                    ),
+                    models.Index(
+                        fields=["gcj02_lat", "gcj02_lon"],
+                        name="road_damage_gcj02_l_7dfdef_idx",
+                    ),
+                    models.Index(
+                        fields=["damage_type"], name="road_damage_damage__b5aa00_idx"
+                    ),
+                    models.Index(
+                        fields=["last_seen"], name="road_damage_last_se_03bf36_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
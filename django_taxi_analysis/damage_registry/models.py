@@ -0,0 +1,30 @@
+from django.db import models
+
+# Create your models here.
+
+class RoadDamage(models.Model):
+    """路面病害登记模型，同一位置附近同一类别的多次上报合并为一条记录"""
+    id = models.BigAutoField(primary_key=True)
+    damage_type = models.CharField(max_length=32, verbose_name='病害类型')
+    gcj02_lat = models.FloatField(verbose_name='GCJ02纬度')
+    gcj02_lon = models.FloatField(verbose_name='GCJ02经度')
+    geohash = models.CharField(max_length=12, verbose_name='GeoHash')
+    confidence = models.FloatField(default=0, verbose_name='最高置信度')
+    report_count = models.IntegerField(default=1, verbose_name='上报次数')
+    result_image = models.CharField(max_length=512, blank=True, default='', verbose_name='最近一次结果图片')
+    first_seen = models.DateTimeField(verbose_name='首次上报时间')
+    last_seen = models.DateTimeField(verbose_name='最近上报时间')
+
+    class Meta:
+        db_table = 'road_damage'
+        verbose_name = '路面病害登记'
+        verbose_name_plural = '路面病害登记'
+        indexes = [
+            models.Index(fields=['geohash']),
+            models.Index(fields=['gcj02_lat', 'gcj02_lon']),
+            models.Index(fields=['damage_type']),
+            models.Index(fields=['last_seen']),
+        ]
+
+    def __str__(self):
+        return f"{self.damage_type} ({self.gcj02_lat:.6f}, {self.gcj02_lon:.6f}) x{self.report_count}"
@@ -0,0 +1,182 @@
+"""路面病害登记：坐标解析、半径内同类病害去重合并和GeoHash邻近查询"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import geohash
+from .models import RoadDamage
+
+# 同一类别病害在该半径（米）内的上报视为同一处病害
+DEDUP_RADIUS_M = getattr(settings, 'DAMAGE_DEDUP_RADIUS_M', 15.0)
+# 存储的GeoHash长度，9位约为 4.8m x 4.8m
+GEOHASH_PRECISION = 9
+# 与 app/api/detect/road-damage/route.ts 的 damageMapping 一致，YOLO类别名统一为报告中的病害类型
+DAMAGE_MAPPING = {
+    'longitudinal_crack': 'D0纵向裂缝',
+    'transverse_crack': 'D1横向裂缝',
+    'alligator_crack': 'D20龟裂',
+    'pothole': 'D40坑洼',
+    # 兼容旧的标签格式
+    'D00': 'D0纵向裂缝',
+    'D01': 'D0纵向裂缝',
+    'D10': 'D1横向裂缝',
+    'D11': 'D1横向裂缝',
+    'D20': 'D20龟裂',
+    'D40': 'D40坑洼',
+}
+
+
+def out_of_china(lat, lng):
+    """GCJ02偏移只适用于中国境内"""
+    return not (73.66 < lng < 135.05 and 3.86 < lat < 53.55)
+
+
+def wgs84_to_gcj02(lat, lng):
+    """把GPS/EXIF的WGS84坐标转换为高德地图和出租车数据使用的GCJ02坐标"""
+    if out_of_china(lat, lng):
+        return lat, lng
+    a, ee = 6378245.0, 0.00669342162296594323
+    x, y = lng - 105.0, lat - 35.0
+    dlat = (-100.0 + 2.0 * x + 3.0 * y + 0.2 * y * y + 0.1 * x * y + 0.2 * math.sqrt(abs(x))
+            + (20.0 * math.sin(6.0 * x * math.pi) + 20.0 * math.sin(2.0 * x * math.pi)) * 2.0 / 3.0
+            + (20.0 * math.sin(y * math.pi) + 40.0 * math.sin(y / 3.0 * math.pi)) * 2.0 / 3.0
+            + (160.0 * math.sin(y / 12.0 * math.pi) + 320 * math.sin(y * math.pi / 30.0)) * 2.0 / 3.0)
+    dlng = (300.0 + x + 2.0 * y + 0.1 * x * x + 0.1 * x * y + 0.1 * math.sqrt(abs(x))
+            + (20.0 * math.sin(6.0 * x * math.pi) + 20.0 * math.sin(2.0 * x * math.pi)) * 2.0 / 3.0
+            + (20.0 * math.sin(x * math.pi) + 40.0 * math.sin(x / 3.0 * math.pi)) * 2.0 / 3.0
+            + (150.0 * math.sin(x / 12.0 * math.pi) + 300.0 * math.sin(x / 30.0 * math.pi)) * 2.0 / 3.0)
+    rad_lat = lat / 180.0 * math.pi
+    magic = 1 - ee * math.sin(rad_lat) ** 2
+    sqrt_magic = math.sqrt(magic)
+    dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrt_magic) * math.pi)
+    dlng = (dlng * 180.0) / (a / sqrt_magic * math.cos(rad_lat) * math.pi)
+    return lat + dlat, lng + dlng
+
+
+def exif_location(image):
+    """从图片EXIF的GPS信息读取WGS84坐标 (lat, lng)，没有GPS信息时返回None
+
+    image 为文件路径或文件对象。
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(image) as im:
+            gps = im.getexif().get_ifd(0x8825)  # GPSInfo
+    except (OSError, ValueError):
+        return None
+    try:
+        lat = sum(float(v) / 60 ** i for i, v in enumerate(gps[2]))  # GPSLatitude 度分秒
+        lng = sum(float(v) / 60 ** i for i, v in enumerate(gps[4]))  # GPSLongitude
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    if gps.get(1) == 'S':
+        lat = -lat
+    if gps.get(3) == 'W':
+        lng = -lng
+    return lat, lng
+
+
+def candidates(damage_type, lat, lng, radius_m):
+    """按GeoHash前缀区间取出可能在半径内的同类病害，只扫描目标网格和相邻8个网格"""
+    precision = geohash.precision_for_radius(radius_m, lat)
+    query = Q()
+    for cell in geohash.neighbors(lat, lng, precision):
+        start, end = geohash.prefix_range(cell)
+        query |= Q(geohash__gte=start, geohash__lt=end)
+    records = RoadDamage.objects.filter(query)
+    return records.filter(damage_type=damage_type) if damage_type else records
+
+
+def nearby(lat, lng, radius_m, damage_type=None):
+    """半径内的病害记录，按距离从近到远排序，返回 [(距离米, 记录)]"""
+    found = []
+    for record in candidates(damage_type, lat, lng, radius_m):
+        distance = geohash.haversine(lat, lng, record.gcj02_lat, record.gcj02_lon)
+        if distance <= radius_m:
+            found.append((distance, record))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def register(damage_type, lat, lng, confidence=0.0, result_image='', reported_at=None, radius_m=DEDUP_RADIUS_M):
+    """登记一处病害（GCJ02坐标），半径内已有同类病害时合并到最近的一条记录
+
+    合并后的位置为各次上报位置按上报次数加权的平均值，置信度取最高值。
+    返回 (记录, 是否为合并)。
+    """
+    reported_at = reported_at or timezone.now()
+    with transaction.atomic():
+        # 锁住候选记录，避免并发上报同一处病害时重复创建或丢失计数
+        locked = list(candidates(damage_type, lat, lng, radius_m).select_for_update())
+        found = sorted((geohash.haversine(lat, lng, r.gcj02_lat, r.gcj02_lon), r.id, r) for r in locked)
+        if found and found[0][0] <= radius_m:
+            record = found[0][2]
+            n = record.report_count
+            record.gcj02_lat = (record.gcj02_lat * n + lat) / (n + 1)
+            record.gcj02_lon = (record.gcj02_lon * n + lng) / (n + 1)
+            record.geohash = geohash.encode(record.gcj02_lat, record.gcj02_lon, GEOHASH_PRECISION)
+            record.report_count = n + 1
+            record.confidence = max(record.confidence, confidence)
+            record.first_seen = min(record.first_seen, reported_at)
+            record.last_seen = max(record.last_seen, reported_at)
+            if result_image:
+                record.result_image = result_image
+            record.save()
+            return record, True
+        record = RoadDamage.objects.create(
+            damage_type=damage_type,
+            gcj02_lat=lat,
+            gcj02_lon=lng,
+            geohash=geohash.encode(lat, lng, GEOHASH_PRECISION),
+            confidence=confidence,
+            result_image=result_image or '',
+            first_seen=reported_at,
+            last_seen=reported_at,
+        )
+        return record, False
+
+
+def damage_types(detections=None, results=None):
+    """把检测结果整理为 {病害类型: 最高置信度}
+
+    detections 为 yolov11_predict.py 输出的检测框列表 [{name, confidence}]；results 为
+    /api/report/damage 保存的按类型汇总结果 {类型: {count, confidence}}，只取 count > 0 的类型。
+    同一张图片的检测框共用一个位置，同类检测框合并为一次上报。
+    """
+    types = {}
+    for detection in detections or []:
+        name = DAMAGE_MAPPING.get(detection.get('name'), detection.get('name'))
+        if name:
+            types[name] = max(types.get(name, 0.0), float(detection.get('confidence') or 0.0))
+    for name, summary in (results or {}).items():
+        if isinstance(summary, dict) and (summary.get('count') or 0) > 0:
+            name = DAMAGE_MAPPING.get(name, name)
+            types[name] = max(types.get(name, 0.0), float(summary.get('confidence') or 0.0))
+    return types
+
+
+def format_time(value):
+    """按本地时区格式化时间，USE_TZ=False（settings_sqlite）时数据库中为本地时间"""
+    return (timezone.localtime(value) if timezone.is_aware(value) else value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def to_dict(record, distance=None):
+    data = {
+        'id': record.id,
+        'damage_type': record.damage_type,
+        'lat': record.gcj02_lat,
+        'lng': record.gcj02_lon,
+        'geohash': record.geohash,
+        'confidence': round(record.confidence, 4),
+        'report_count': record.report_count,
+        'result_image': record.result_image,
+        'first_seen': format_time(record.first_seen),
+        'last_seen': format_time(record.last_seen),
+    }
+    if distance is not None:
+        data['distance'] = round(distance, 2)
+    return data
@@ -0,0 +1,14 @@
+from django.urls import path
+from .views import (
+    DamageReportView,
+    DamageViewportView,
+    DamageNearbyView,
+    DamageHeatmapView,
+)
+
+urlpatterns = [
+    path('report/', DamageReportView.as_view(), name='damage_report'),
+    path('viewport/', DamageViewportView.as_view(), name='damage_viewport'),
+    path('nearby/', DamageNearbyView.as_view(), name='damage_nearby'),
+    path('heatmap/', DamageHeatmapView.as_view(), name='damage_heatmap'),
+]
@@ -0,0 +1,297 @@
+from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from rest_framework.response import Response
+from rest_framework import status
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+import json
+import os
+
+from . import registry
+from .models import RoadDamage
+
+# 与出租车热力图一致的渐变色
+GRADIENT = {
+    0.4: "#e3eafd",
+    0.6: "cyan",
+    0.7: "lime",
+    0.8: "yellow",
+    1.0: "red"
+}
+
+
+def parse_bbox(params):
+    """读取视口范围参数，缺少任意一个时返回None"""
+    keys = ('min_lat', 'min_lng', 'max_lat', 'max_lng')
+    if not all(params.get(key) not in (None, '') for key in keys):
+        return None
+    return tuple(float(params.get(key)) for key in keys)
+
+
+def parse_reported_at(value):
+    """解析上报时间（ISO格式或 YYYY-MM-DD HH:MM:SS），无法解析时为当前时间"""
+    reported_at = parse_datetime(str(value)) if value else None
+    if reported_at is None:
+        return timezone.now()
+    if settings.USE_TZ and timezone.is_naive(reported_at):
+        reported_at = timezone.make_aware(reported_at)
+    elif not settings.USE_TZ and timezone.is_aware(reported_at):
+        reported_at = timezone.make_naive(reported_at)
+    return reported_at
+
+
+class DamageReportView(APIView):
+    """路面病害上报API视图"""
+    # 除JSON外接受带图片的multipart上传，用于读取EXIF GPS
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        operation_summary="上报路面病害检测结果",
+        operation_description="登记一张图片的检测结果。位置取自lat/lng参数，未提供时读取上传图片(image)或本地图片路径(source_path)的EXIF GPS信息。"
+                              "同一类别的病害在去重半径内已有记录时合并为一条记录并累加上报次数。",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'lat': openapi.Schema(type=openapi.TYPE_NUMBER, description="纬度"),
+                'lng': openapi.Schema(type=openapi.TYPE_NUMBER, description="经度"),
+                'coord_type': openapi.Schema(type=openapi.TYPE_STRING, description="坐标系(gcj02=高德/默认, wgs84=GPS)"),
+                'detections': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT),
+                                             description="YOLO检测框列表 [{name, confidence}]"),
+                'results': openapi.Schema(type=openapi.TYPE_OBJECT, description="按类型汇总的结果 {类型: {count, confidence}}"),
+                'result_image': openapi.Schema(type=openapi.TYPE_STRING, description="结果图片"),
+                'source_path': openapi.Schema(type=openapi.TYPE_STRING, description="原始图片本地路径，用于读取EXIF GPS"),
+                'timestamp': openapi.Schema(type=openapi.TYPE_STRING, description="上报时间"),
+                'radius': openapi.Schema(type=openapi.TYPE_NUMBER, description="去重半径(米)，默认15"),
+            }
+        ),
+        responses={
+            200: openapi.Response('成功', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            400: openapi.Response('参数错误', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            500: openapi.Response('服务器错误', schema=openapi.Schema(type=openapi.TYPE_OBJECT))
+        }
+    )
+    def post(self, request):
+        data = request.data
+        try:
+            detections = data.get('detections')
+            results = data.get('results')
+            # multipart 上传时JSON字段以字符串传递
+            if isinstance(detections, str):
+                detections = json.loads(detections)
+            if isinstance(results, str):
+                results = json.loads(results)
+            radius = float(data.get('radius') or registry.DEDUP_RADIUS_M)
+
+            if data.get('lat') not in (None, '') and data.get('lng') not in (None, ''):
+                lat, lng = float(data.get('lat')), float(data.get('lng'))
+                coord_type = data.get('coord_type', 'gcj02')
+            else:
+                image = request.FILES.get('image')
+                source_path = data.get('source_path')
+                if image is None and source_path and os.path.isfile(source_path):
+                    image = source_path
+                location = registry.exif_location(image) if image is not None else None
+                if location is None:
+                    return Response({'error': '缺少位置信息', 'message': '请提供lat/lng参数或带GPS信息的图片'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                lat, lng = location
+                coord_type = 'wgs84'
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e), 'message': '参数格式错误'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if coord_type == 'wgs84':
+            lat, lng = registry.wgs84_to_gcj02(lat, lng)
+        types = registry.damage_types(detections, results)
+        reported_at = parse_reported_at(data.get('timestamp'))
+
+        try:
+            records = []
+            for damage_type, confidence in types.items():
+                record, merged = registry.register(damage_type, lat, lng, confidence, data.get('result_image') or '',
+                                                   reported_at, radius)
+                records.append(dict(registry.to_dict(record), merged=merged))
+            return Response({
+                'lat': lat,
+                'lng': lng,
+                'records': records,
+                'merged_count': sum(r['merged'] for r in records),
+                'created_count': sum(not r['merged'] for r in records),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                'error': str(e),
+                'message': '登记病害时发生错误'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DamageViewportView(APIView):
+    """视口内病害列表API视图"""
+
+    @swagger_auto_schema(
+        operation_summary="获取地图视口内的路面病害",
+        operation_description="返回经纬度范围内的病害记录（已去重合并），按上报次数从多到少排序。",
+        manual_parameters=[
+            openapi.Parameter('min_lat', openapi.IN_QUERY, description="最小纬度", type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('min_lng', openapi.IN_QUERY, description="最小经度", type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('max_lat', openapi.IN_QUERY, description="最大纬度", type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('max_lng', openapi.IN_QUERY, description="最大经度", type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('damage_type', openapi.IN_QUERY, description="病害类型(如 D40坑洼)，默认全部", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="限制返回条数(默认500)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response('成功', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            400: openapi.Response('参数错误', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+        }
+    )
+    def get(self, request):
+        try:
+            bbox = parse_bbox(request.GET)
+            limit = int(request.GET.get('limit', 500))
+        except ValueError as e:
+            return Response({'error': str(e), 'message': '参数格式错误'}, status=status.HTTP_400_BAD_REQUEST)
+        if bbox is None:
+            return Response({'error': '缺少视口范围', 'message': '需要 min_lat、min_lng、max_lat、max_lng 参数'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        min_lat, min_lng, max_lat, max_lng = bbox
+        damage_type = request.GET.get('damage_type')
+
+        # 经纬度联合索引上的范围查询
+        records = RoadDamage.objects.filter(gcj02_lat__range=(min_lat, max_lat), gcj02_lon__range=(min_lng, max_lng))
+        if damage_type and damage_type != 'all':
+            records = records.filter(damage_type=damage_type)
+        records = list(records.order_by('-report_count', '-last_seen')[:limit])
+        return Response({
+            'damages': [registry.to_dict(record) for record in records],
+            'count': len(records),
+            'bbox': {'min_lat': min_lat, 'min_lng': min_lng, 'max_lat': max_lat, 'max_lng': max_lng},
+        }, status=status.HTTP_200_OK)
+
+
+class DamageNearbyView(APIView):
+    """附近病害查询API视图"""
+
+    @swagger_auto_schema(
+        operation_summary="查询某位置附近的路面病害",
+        operation_description="通过GeoHash索引查询半径内的病害记录，按距离从近到远排序。",
+        manual_parameters=[
+            openapi.Parameter('lat', openapi.IN_QUERY, description="纬度(GCJ02)", type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('lng', openapi.IN_QUERY, description="经度(GCJ02)", type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('radius', openapi.IN_QUERY, description="半径(米，默认100)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('damage_type', openapi.IN_QUERY, description="病害类型，默认全部", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response('成功', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            400: openapi.Response('参数错误', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+        }
+    )
+    def get(self, request):
+        try:
+            lat, lng = float(request.GET['lat']), float(request.GET['lng'])
+            radius = float(request.GET.get('radius', 100))
+        except (KeyError, ValueError) as e:
+            return Response({'error': str(e), 'message': '需要有效的 lat、lng 参数'}, status=status.HTTP_400_BAD_REQUEST)
+        damage_type = request.GET.get('damage_type')
+        if damage_type == 'all':
+            damage_type = None
+        found = registry.nearby(lat, lng, radius, damage_type)
+        return Response({
+            'damages': [registry.to_dict(record, distance) for distance, record in found],
+            'count': len(found),
+            'radius': radius,
+        }, status=status.HTTP_200_OK)
+
+
+class DamageHeatmapView(APIView):
+    """路面病害热力图API视图"""
+
+    @swagger_auto_schema(
+        operation_summary="获取路面病害热力图数据",
+        operation_description="与出租车上客热力图相同的网格聚合方式，按网格汇总病害的上报次数，可限定视口范围和病害类型。",
+        manual_parameters=[
+            openapi.Parameter('damage_type', openapi.IN_QUERY, description="病害类型，默认全部", type=openapi.TYPE_STRING),
+            openapi.Parameter('grid_size', openapi.IN_QUERY, description="网格大小(默认0.001度，约100米)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="限制返回点数(默认1000)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('min_lat', openapi.IN_QUERY, description="视口最小纬度", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('min_lng', openapi.IN_QUERY, description="视口最小经度", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('max_lat', openapi.IN_QUERY, description="视口最大纬度", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('max_lng', openapi.IN_QUERY, description="视口最大经度", type=openapi.TYPE_NUMBER),
+        ],
+        responses={
+            200: openapi.Response('成功', schema=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            500: openapi.Response('服务器错误', schema=openapi.Schema(type=openapi.TYPE_OBJECT))
+        }
+    )
+    def get(self, request):
+        """
+        获取路面病害热力图数据
+
+        参数:
+        - damage_type: 病害类型 (D0纵向裂缝、D1横向裂缝、D20龟裂、D40坑洼，默认全部)
+        - grid_size: 网格大小 (默认0.001度，约100米)
+        - limit: 限制返回点数 (默认1000)
+        - min_lat/min_lng/max_lat/max_lng: 视口范围，缺省时为全部区域
+        """
+        damage_type = request.GET.get('damage_type', 'all')
+        try:
+            grid_size = float(request.GET.get('grid_size', 0.001))
+            limit = int(request.GET.get('limit', 1000))
+            bbox = parse_bbox(request.GET)
+        except ValueError as e:
+            return Response({'error': str(e), 'message': '参数格式错误'}, status=status.HTTP_400_BAD_REQUEST)
+
+        where, params = [], [grid_size, grid_size, grid_size, grid_size]
+        if damage_type and damage_type != 'all':
+            where.append('damage_type = %s')
+            params.append(damage_type)
+        if bbox is not None:
+            where.append('gcj02_lat BETWEEN %s AND %s AND gcj02_lon BETWEEN %s AND %s')
+            params += [bbox[0], bbox[2], bbox[1], bbox[3]]
+        params.append(limit)
+
+        try:
+            with connection.cursor() as cursor:
+                # 按网格聚合，每条病害记录按上报次数加权
+                sql = f"""
+                SELECT
+                    ROUND(gcj02_lat / %s) * %s as lat,
+                    ROUND(gcj02_lon / %s) * %s as lng,
+                    SUM(report_count) as count,
+                    COUNT(*) as damage_count
+                FROM {RoadDamage._meta.db_table}
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+                GROUP BY lat, lng
+                ORDER BY count DESC
+                LIMIT %s
+                """
+                cursor.execute(sql, params)
+                results = cursor.fetchall()
+
+            points = []
+            total_count = 0
+            for lat, lng, count, damage_count in results:
+                total_count += int(count)
+                points.append({
+                    'lat': float(lat),
+                    'lng': float(lng),
+                    'count': int(count),
+                    'damage_count': int(damage_count)
+                })
+
+            return Response({
+                'points': points,
+                'total_count': total_count,
+                'damage_type': damage_type,
+                'grid_size': grid_size,
+                'point_count': len(points),
+                'gradient': GRADIENT
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                'error': str(e),
+                'message': '查询数据时发生错误'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'heatmap_api',
+    'damage_registry',
 ]
 
 MIDDLEWARE = [
@@ -136,6 +137,9 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# 路面病害登记：同一类别病害在该半径（米）内的上报合并为一条记录
+DAMAGE_DEDUP_RADIUS_M = 15.0
+
 # CORS设置
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -20,5 +20,6 @@ from cache_api.views import TaxiCacheView
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('heatmap_api.urls')),
+    path('api/damage/', include('damage_registry.urls')),
     path('api/cache/taxi/<str:module>/<str:span>.json', TaxiCacheView.as_view()),
 ]
@@ -39,6 +39,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     # 你的其他接口路由
     path('api/', include('heatmap_api.urls')),
+    path('api/damage/', include('damage_registry.urls')),
     # 添加缓存API路由
     path('api/cache/taxi/', include('cache_api.urls')),
     # 自定义缓存文件服务，带CORS头
@@ -0,0 +1,85 @@
+"""单帧解码开销基准测试
+
+对同一张JPEG分别测量：
+  1. 旧方式：base64 -> PIL.Image.open -> np.array -> RGB2BGR -> BGR2GRAY
+  2. base64 -> cv2.imdecode(IMREAD_GRAYSCALE)（JSON兼容路径）
+  3. 原始字节 -> cv2.imdecode(IMREAD_GRAYSCALE)（image/jpeg 请求体或 multipart）
+并给出每种上传方式的传输字节数；最后对比原图检测与缩小到 --max-side 后检测的耗时。
+
+用法: python bench_decode.py --image ../RDD_yolo11/ultralytics/assets/zidane.jpg --repeat 200
+"""
+import argparse
+import base64
+import io
+import os
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from face_decode import base64_to_bytes, decode_gray, downscale, scale_boxes
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'RDD_yolo11', 'ultralytics', 'assets', 'zidane.jpg')
+
+
+def decode_pil(base64_string):
+    image_data = base64.b64decode(base64_string.split(',')[1])
+    pil_image = Image.open(io.BytesIO(image_data))
+    cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    return cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+
+
+def decode_base64_gray(base64_string):
+    return decode_gray(base64_to_bytes(base64_string))
+
+
+def timeit(fn, arg, repeat):
+    fn(arg)  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='人脸接口单帧解码基准测试')
+    parser.add_argument('--image', default=DEFAULT_IMAGE, help='测试用JPEG图像')
+    parser.add_argument('--repeat', type=int, default=200, help='每种方式的重复次数')
+    parser.add_argument('--max-side', type=int, default=640, help='检测前缩放的最长边')
+    args = parser.parse_args()
+
+    with open(args.image, 'rb') as f:
+        jpeg = f.read()
+    data_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+
+    # 各方式解码尺寸应一致；libjpeg 直接输出亮度通道，与PIL先转RGB再转灰度有少量像素差异
+    reference = decode_pil(data_url)
+    gray = decode_gray(jpeg)
+    assert reference.shape == gray.shape, (reference.shape, gray.shape)
+    print(f"图像: {args.image} {gray.shape[1]}x{gray.shape[0]}，"
+          f"与PIL解码的最大像素差 {int(np.abs(reference.astype(np.int16) - gray).max())}")
+
+    cases = [
+        ('base64 + PIL + cvtColor (旧)', decode_pil, data_url, len(data_url)),
+        ('base64 + imdecode灰度', decode_base64_gray, data_url, len(data_url)),
+        ('原始字节 + imdecode灰度', decode_gray, jpeg, len(jpeg)),
+    ]
+    baseline = None
+    for name, fn, payload, size in cases:
+        ms = timeit(fn, payload, args.repeat)
+        baseline = baseline or ms
+        print(f"{name:<36} {ms:7.2f} ms/帧 | 加速 {baseline / ms:5.2f}x | 传输 {size / 1024:7.1f} KB")
+
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+    def detect(max_side):
+        small, scale = downscale(gray, max_side)
+        return scale_boxes(cascade.detectMultiScale(small, 1.1, 3), scale, gray.shape)
+
+    full_ms = timeit(detect, 0, max(1, args.repeat // 10))
+    small_ms = timeit(detect, args.max_side, max(1, args.repeat // 10))
+    print(f"{'检测（原图）':<36} {full_ms:7.2f} ms/帧 | 人脸 {len(detect(0))}")
+    print(f"{f'检测（最长边缩小到{args.max_side}）':<36} {small_ms:7.2f} ms/帧 | 人脸 {len(detect(args.max_side))} | "
+          f"加速 {full_ms / small_ms:5.2f}x")
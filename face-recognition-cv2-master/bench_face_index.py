@@ -0,0 +1,72 @@
+"""身份索引基准测试
+
+用随机生成的合成人脸为 N 个用户各训练一个LBPH模型，对比：
+  1. 旧方式：逐个模型调用 model.predict
+  2. 新方式：FaceIndex 一次向量化查询
+并校验两者得到的最佳匹配和距离一致。
+
+用法: python bench_face_index.py --users 10 100 1000 --samples 5 --probes 20
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from face_index import FaceIndex, HistogramExtractor
+
+
+def build_users(num_users, samples, size, rng):
+    models = {}
+    index = FaceIndex()
+    for user_id in range(num_users):
+        faces = [rng.integers(0, 256, (size, size), dtype=np.uint8) for _ in range(samples)]
+        model = cv2.face.LBPHFaceRecognizer_create()
+        model.train(faces, np.array([user_id] * samples))
+        models[user_id] = model
+        index.add(user_id, model.getHistograms())
+    return models, index
+
+
+def loop_predict(models, face):
+    best_id, lowest = -1, float('inf')
+    for user_id, model in models.items():
+        _, confidence = model.predict(face)
+        if confidence < lowest:
+            best_id, lowest = user_id, confidence
+    return best_id, lowest
+
+
+def run(num_users, samples, probes, size, rng):
+    models, index = build_users(num_users, samples, size, rng)
+    extractor = HistogramExtractor()
+    faces = [rng.integers(0, 256, (size, size), dtype=np.uint8) for _ in range(probes)]
+
+    start = time.perf_counter()
+    expected = [loop_predict(models, face) for face in faces]
+    loop_ms = (time.perf_counter() - start) * 1000 / probes
+
+    start = time.perf_counter()
+    actual = [index.search(extractor.extract(face)) for face in faces]
+    index_ms = (time.perf_counter() - start) * 1000 / probes
+
+    for (e_id, e_dist), (a_id, a_dist) in zip(expected, actual):
+        assert e_id == a_id and abs(e_dist - a_dist) < 1e-3 * max(1.0, e_dist), (e_id, e_dist, a_id, a_dist)
+
+    stats = index.stats()
+    print(f"{num_users:>6} 用户 | {stats['samples']:>7} 样本 | 逐模型 {loop_ms:9.2f} ms/次 | "
+          f"索引 {index_ms:8.2f} ms/次 | 加速 {loop_ms / index_ms:6.1f}x | "
+          f"索引内存 {stats['memory_bytes'] / 1024 / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LBPH身份索引基准测试')
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--samples', type=int, default=5, help='每个用户的样本数')
+    parser.add_argument('--probes', type=int, default=20, help='查询次数')
+    parser.add_argument('--size', type=int, default=100, help='合成人脸边长')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for num_users in args.users:
+        run(num_users, args.samples, args.probes, args.size, rng)
@@ -1,25 +1,38 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import cv2
 import numpy as np
 import os
-import shutil
-import base64
-from PIL import Image
-import io
-import mysql.connector
 from datetime import datetime
 import time
 import sys
+import threading
+import uuid
 import argparse
 import json
 import atexit
 import signal
 from flasgger import Swagger
+from face_audit import AuditWriter
+from face_decode import base64_to_bytes, decode_gray, iter_length_prefixed
+from face_detector import PROFILES, FaceDetector
+from face_enrollment import EnrollmentBuffer
+from face_index import HistogramExtractor
+from face_registry import ModelRegistry
+from face_samples import SampleStore, normalize_face
+from face_tracker import FaceTracker, link_faces
+from face_training import TrainingQueue
+from face_workers import RecognitionPool, ServiceBusy
+from concurrent.futures import wait as wait_futures
+try:
+    from flask_sock import Sock
+except ImportError:  # flask-sock 为可选依赖，未安装时只提供HTTP分块流式录入
+    Sock = None
 
 app = Flask(__name__)
 Swagger(app)
 CORS(app)  # 允许跨域请求
+sock = Sock(app) if Sock is not None else None
 
 # 全局变量
 id_dict = {}  # 字典里存的是id——name键值对
@@ -28,7 +41,32 @@ face_cascade = None
 eye_cascade = None
 smile_cascade = None
 recognizer = None
-system_state_lock = 0  # 0表示无子线程在运行 1表示正在刷脸 2表示正在录入新面孔
+cascade_paths = {}  # 分类器文件路径，供各线程创建自己的分类器实例
+face_detector = None  # 人脸检测与活体检测引擎，初始化时按 DETECTION_PROFILE 创建
+model_registry = ModelRegistry('face-recognition-cv2-master/traindata')  # 常驻内存的LBPH模型注册表
+histogram_extractor = HistogramExtractor()  # 计算探测人脸的LBPH直方图，用于身份索引查询
+sample_store = SampleStore('face-recognition-cv2-master/samples')  # 归一化人脸样本库，用于重新训练
+
+# 并发控制：识别请求在工作线程池中并发执行，录入会话之间互相隔离
+RECOGNITION_WORKERS = int(os.environ.get('FACE_RECOGNITION_WORKERS', 4))
+RECOGNITION_MAX_PENDING = int(os.environ.get('FACE_RECOGNITION_MAX_PENDING', 16))
+MAX_REGISTRATION_SESSIONS = int(os.environ.get('FACE_MAX_REGISTRATION_SESSIONS', 4))
+SESSION_TIMEOUT = 600  # 录入会话无操作超时时间（秒）
+MAX_BATCH_FRAMES = int(os.environ.get('FACE_MAX_BATCH_FRAMES', 32))  # /recognize_batch 每批最多帧数
+CONFIDENCE_THRESHOLD = 50  # LBPH距离小于该值视为识别成功 - 与main.py一致
+# 训练完成后是否把录入样本写入样本库，便于之后通过 /retrain 重新训练
+SPILL_ENROLLMENT_SAMPLES = os.environ.get('FACE_SPILL_SAMPLES', '1') != '0'
+# 检测前把图像最长边缩小到该像素数再做级联检测，人脸框映射回原图后在原图上裁剪（0表示不缩放）
+DETECT_MAX_SIDE = int(os.environ.get('FACE_DETECT_MAX_SIDE', 0))
+# 检测配置：accurate 与原检测参数一致，fast 用更粗的金字塔且不做宽松重试（见 face_benchmark.py --profiles）
+DETECTION_PROFILE = os.environ.get('FACE_DETECTION_PROFILE', 'accurate')
+recognition_pool = RecognitionPool(RECOGNITION_WORKERS, RECOGNITION_MAX_PENDING)
+# 模型训练在后台训练线程中执行，接口可同步等待结果或立即返回任务ID
+training_queue = TrainingQueue(int(os.environ.get('FACE_TRAINING_WORKERS', 1)))
+registration_lock = threading.Lock()  # 保护 registration_sessions 和用户ID分配
+config_lock = threading.Lock()  # 保护 id_dict / Total_face_num / config.txt
+reserved_user_ids = set()  # 已分配给进行中录入的用户ID
+registration_sessions = {}  # 录入会话，session_id -> 会话状态（每个会话有自己的锁）
 
 # 数据库配置
 DB_CONFIG = {
@@ -39,34 +77,60 @@ DB_CONFIG = {
     'database': 'tm',
     'charset': 'utf8mb4'
 }
+# 登录审计日志异步批量写入，数据库不可达时先写入本地溢出文件
+AUDIT_SPILL_PATH = os.environ.get('FACE_AUDIT_SPILL', 'face-recognition-cv2-master/audit_spill.jsonl')
+audit_writer = AuditWriter(DB_CONFIG, AUDIT_SPILL_PATH,
+                           max_queue=int(os.environ.get('FACE_AUDIT_MAX_QUEUE', 1000)))
 
-def reset_system_lock():
-    """重置系统锁"""
-    global system_state_lock
-    system_state_lock = 0
-    print("系统锁已重置为0")
+def reserve_user_id():
+    """为新的录入分配用户ID，需在 registration_lock 内调用"""
+    with config_lock:
+        candidates = [Total_face_num] + [uid + 1 for uid in id_dict]
+    candidates += [uid + 1 for uid in model_registry.user_ids()]
+    candidates += [uid + 1 for uid in reserved_user_ids]
+    user_id = max(candidates)
+    reserved_user_ids.add(user_id)
+    return user_id
 
-def acquire_system_lock(lock_type):
-    """获取系统锁
-    lock_type: 1表示识别状态，2表示录入状态
-    """
-    global system_state_lock
-    if system_state_lock != 0:
-        return False
-    system_state_lock = lock_type
-    print(f"系统锁已设置为: {lock_type}")
-    return True
+def release_user_id(user_id):
+    """释放录入结束（成功或失败）的用户ID"""
+    with registration_lock:
+        reserved_user_ids.discard(user_id)
+
+def expire_stale_sessions():
+    """清理超时或已失败的录入会话，需在 registration_lock 内调用"""
+    now = time.time()
+    for session_id, session in list(registration_sessions.items()):
+        if session['status'] == 'training':
+            continue  # 训练任务结束后由任务自己清理会话
+        if session['status'] == 'error' or now - session['last_active'] > SESSION_TIMEOUT:
+            reserved_user_ids.discard(session['user_id'])
+            del registration_sessions[session_id]
+            print(f"录入会话 {session_id} 已清理（状态: {session['status']}）")
 
-def release_system_lock():
-    """释放系统锁"""
-    global system_state_lock
-    system_state_lock = 0
-    print("系统锁已释放")
+def get_registration_session(session_id):
+    """按会话ID取出录入会话，不存在时返回None"""
+    if not session_id:
+        return None
+    with registration_lock:
+        return registration_sessions.get(session_id)
+
+def session_frame_stats(session):
+    """录入会话的逐帧处理统计（帧数、平均耗时、人脸跟踪命中情况）"""
+    with session['lock']:
+        frames = session['frames']
+        return {
+            'frames': frames,
+            'avg_latency_ms': round(session['frame_time'] / frames * 1000, 2) if frames else 0,
+            'tracker': session['tracker'].stats()
+        }
 
 def cleanup_on_exit():
     """程序退出时的清理函数"""
     print("正在清理系统资源...")
-    reset_system_lock()
+    recognition_pool.shutdown()
+    training_queue.shutdown()
+    audit_writer.close()
 
 # 注册退出时的清理函数
 atexit.register(cleanup_on_exit)
@@ -82,22 +146,21 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 def init_face_recognition():
     """初始化人脸识别系统"""
-    global Total_face_num, id_dict, face_cascade, eye_cascade, smile_cascade, recognizer
+    global Total_face_num, id_dict, face_cascade, eye_cascade, smile_cascade, recognizer, face_detector
     
     # 初始化OpenCV人脸检测器 - 使用OpenCV内置的分类器
     try:
         # 尝试使用OpenCV内置的分类器
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
+        face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        face_cascade = cv2.CascadeClassifier(face_cascade_path)
         
         # 如果内置分类器加载失败，尝试使用本地文件
         if face_cascade.empty():
             current_dir = os.path.dirname(os.path.abspath(__file__))
-            haar_file = os.path.join(
+            face_cascade_path = os.path.join(
                 current_dir, 'haarcascade_frontalface_default.xml'
             )
-            face_cascade = cv2.CascadeClassifier(haar_file)
+            face_cascade = cv2.CascadeClassifier(face_cascade_path)
             
         # 检查分类器是否加载成功
         if face_cascade.empty():
@@ -130,9 +193,25 @@ def init_face_recognition():
         print("错误: 无法加载微笑检测分类器")
         return False
     
+    # 记录分类器路径，各线程按需创建自己的实例
+    cascade_paths.update({
+        'face': face_cascade_path,
+        'eye': cv2.data.haarcascades + 'haarcascade_eye.xml',
+        'smile': cv2.data.haarcascades + 'haarcascade_smile.xml'
+    })
+    profile = DETECTION_PROFILE
+    if profile not in PROFILES:
+        print(f"未知的检测配置 {profile}，使用 accurate")
+        profile = 'accurate'
+    face_detector = FaceDetector(cascade_paths, profile)
+    print(f"人脸检测配置: {profile}")
+    
     # 初始化LBPH人脸识别器
     recognizer = cv2.face.LBPHFaceRecognizer_create()
     
+    # 加载（或增量刷新）模型注册表，只有mtime变化的模型文件会被重新读取
+    model_registry.refresh()
+    
     # 读取配置文件
     id_dict = {}
     if not os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.txt')):
@@ -182,130 +261,78 @@ def init_face_recognition():
     if not num_line_found:
         Total_face_num = max_id + 1
 
-def get_db_connection():
-    """获取数据库连接"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except mysql.connector.Error as err:
-        print(f"数据库连接错误: {err}")
-        return None
-
 def log_login_attempt(uid, login_type, login_status, login_address, face_image_path=None):
-    """记录登录日志"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return None
-            
-        cursor = conn.cursor()
-        
-        # 如果uid不为None，检查用户是否存在于数据库中
-        if uid is not None:
-            check_user_query = "SELECT uid FROM user WHERE uid = %s"
-            cursor.execute(check_user_query, (uid,))
-            user_exists = cursor.fetchone()
-            
-            if not user_exists:
-                print(f"警告: 用户ID {uid} 在数据库中不存在，跳过登录日志记录")
-                cursor.close()
-                conn.close()
-                return None
-        
-        # 插入登录日志
-        login_query = """
-        INSERT INTO login_log (uid, login_type, login_status, login_time, login_address)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        login_time = datetime.now()
-        cursor.execute(login_query, (uid, login_type, login_status, login_time, login_address))
-        
-        log_id = cursor.lastrowid
-        
-        # 如果有人脸图像且登录失败，记录到face_store表
-        if face_image_path and login_status == 0:
-            face_query = """
-            INSERT INTO face_store (log_id, get_face, create_time)
-            VALUES (%s, %s, %s)
-            """
-            cursor.execute(face_query, (log_id, face_image_path, datetime.now()))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return log_id
-        
-    except mysql.connector.Error as err:
-        print(f"记录登录日志错误: {err}")
-        return None
+    """记录登录日志：放入审计队列后立即返回，由后台线程批量写入 login_log / face_store"""
+    return audit_writer.log(uid, login_type, login_status, login_address, face_image_path)
 
 def base64_to_image(base64_string):
-    """将base64字符串转换为OpenCV图像"""
-    try:
-        print(f"开始处理base64图像数据，输入长度: {len(base64_string) if base64_string else 0}")
-        if not base64_string:
-            print("Base64转图像错误: 空的base64字符串")
-            return None
-            
-        # 移除base64前缀
-        original_string = base64_string
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        # 验证base64字符串长度
-        if len(base64_string) < 100:  # 太短的字符串可能不是有效图像
-            print(f"Base64转图像错误: base64字符串太短 ({len(base64_string)} 字符)")
-            return None
-            
-        # 解码base64
-        try:
-            image_data = base64.b64decode(base64_string)
-        except Exception as decode_error:
-            print(f"Base64解码错误: {decode_error}")
-            print(f"原始字符串前100字符: {original_string[:100]}")
-            return None
-        
-        # 验证解码后的数据长度
-        if len(image_data) < 1000:  # 太小的数据可能不是有效图像
-            print(f"Base64转图像错误: 解码后数据太小 ({len(image_data)} 字节)")
-            return None
-        
-        # 转换为PIL图像
-        try:
-            pil_image = Image.open(io.BytesIO(image_data))
-        except Exception as pil_error:
-            print(f"PIL图像打开错误: {pil_error}")
-            print(f"图像数据长度: {len(image_data)} 字节")
-            print(f"图像数据前20字节: {image_data[:20]}")
-            return None
-        
-        # 转换为OpenCV格式
-        try:
-            cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            print(f"成功转换图像，尺寸: {cv_image.shape}")
-            return cv_image
-        except Exception as cv_error:
-            print(f"OpenCV转换错误: {cv_error}")
-            return None
-            
-    except Exception as e:
-        print(f"Base64转图像未知错误: {e}")
-        print(f"输入字符串类型: {type(base64_string)}")
-        if isinstance(base64_string, str):
-            print(f"字符串长度: {len(base64_string)}")
-            print(f"字符串前100字符: {base64_string[:100]}")
+    """将base64字符串转换为OpenCV彩色图像（兼容旧调用，新代码请直接用 decode_gray 得到灰度图）"""
+    image_bytes = base64_to_bytes(base64_string)
+    if image_bytes is None:
         return None
+    return cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def get_request_params():
+    """合并查询字符串、表单字段和JSON请求体中的参数（后者优先）"""
+    params = request.args.to_dict()
+    params.update(request.form.to_dict())
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        params.update(data)
+    return params
+
+def read_request_image(params):
+    """读取请求中的编码图像字节
+
+    支持三种上传方式：multipart 表单的 image 文件、Content-Type 为 image/* 或
+    application/octet-stream 的原始请求体，以及JSON中的base64字符串（兼容旧前端）。
+    """
+    upload = request.files.get('image')
+    if upload is not None:
+        return upload.read()
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        return request.get_data(cache=False)
+    return base64_to_bytes(params.get('image'))
+
+def read_request_images(params):
+    """读取批量接口的多帧图像字节：multipart 的多个 images 文件、JSON 的 images 数组，
+    或按 read_request_image 的方式读取的单帧图像"""
+    uploads = request.files.getlist('images')
+    if uploads:
+        return [upload.read() for upload in uploads]
+    images = params.get('images')
+    if isinstance(images, list):
+        return [base64_to_bytes(image) if isinstance(image, str) else None for image in images]
+    image_bytes = read_request_image(params)
+    return [image_bytes] if image_bytes else []
+
+def param_flag(params, name):
+    """把请求参数解析为布尔值（JSON的true或字符串 1/true/yes）"""
+    value = params.get(name)
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def request_max_side(params):
+    """本次请求检测前的缩放尺寸：请求参数 max_side 优先，否则使用 DETECT_MAX_SIDE"""
+    try:
+        return max(0, int(params.get('max_side', DETECT_MAX_SIDE)))
+    except (TypeError, ValueError):
+        return DETECT_MAX_SIDE
 
 def save_face_image(image, filename):
-    """保存人脸图像"""
+    """保存人脸图像，image 可以是OpenCV图像，也可以是上传的原始编码字节（直接落盘，不重新编码）"""
     try:
         # 确保目录存在
         os.makedirs('face-recognition-cv2-master/face_images', exist_ok=True)
         
         # 保存图像
         filepath = os.path.join('face-recognition-cv2-master/face_images', filename)
-        cv2.imwrite(filepath, image)
+        if isinstance(image, (bytes, bytearray)):
+            with open(filepath, 'wb') as f:
+                f.write(image)
+        else:
+            cv2.imwrite(filepath, image)
         
         return filepath
     except Exception as e:
@@ -315,47 +342,53 @@ def save_face_image(image, filename):
 
 def detect_blink_and_smile(gray_face):
     """检测眨眼和微笑"""
-    eyes = eye_cascade.detectMultiScale(gray_face, 1.1, 5)
-    smiles = smile_cascade.detectMultiScale(gray_face, 1.8, 20)
-    
     # 眨眼检测：眼睛数量变化
-    eye_count = len(eyes)
-    has_smile = len(smiles) > 0
-    
+    eye_count, has_smile, _ = face_detector.liveness(gray_face)
     return eye_count, has_smile
 
 
-def check_face_exists(face_gray):
-    """检测当前人脸是否已经录入过"""
-    trainer_dir = 'face-recognition-cv2-master/traindata'
-    if not os.path.exists(trainer_dir) or not os.listdir(trainer_dir):
-        return False, "没有训练数据"
+def detect_and_extract(gray, max_side=0):
+    """在工作线程中检测灰度图中的所有人脸并提取LBPH直方图，返回 (人脸框, 直方图列表)"""
+    # 检测人脸 - 检测不到时按检测配置用更宽松的参数重试
+    faces = face_detector.detect(gray, max_side)
+    # 探测人脸与训练样本一样归一化为固定尺寸
+    probes = [histogram_extractor.extract(normalize_face(gray[y:y + h, x:x + w])) for (x, y, w, h) in faces]
+    return faces, probes
 
-    models = {}
-    for file_name in os.listdir(trainer_dir):
-        if file_name.endswith("_train.yml"):
-            try:
-                user_id = int(file_name.split('_')[0])
-                recog = cv2.face.LBPHFaceRecognizer_create()
-                recog.read(os.path.join(trainer_dir, file_name))
-                models[user_id] = recog
-            except:
-                continue
-    
-    if not models:
-        return False, "没有找到有效的模型文件"
 
+def recognize_gray(gray, max_side=0):
+    """在工作线程中检测并识别灰度图中的人脸 - 与main.py的scan_face逻辑一致
+
+    返回 (人脸框列表, 最佳匹配用户ID, 最小距离)，取所有人脸中距离最小的匹配。
+    max_side>0 时在缩小图上检测，识别仍使用原图上的人脸区域。
+    """
+    faces, probes = detect_and_extract(gray, max_side)
+    print(f"识别检测到 {len(faces)} 个人脸")
+    
     best_match_id = -1
     lowest_confidence = 100
+    if len(faces) == 0:
+        return faces, best_match_id, lowest_confidence
+    
+    for user_id, confidence in model_registry.index.search_batch(probes):
+        if confidence < lowest_confidence:
+            lowest_confidence = confidence
+            best_match_id = user_id
+    return faces, best_match_id, lowest_confidence
 
-    for user_id, model in models.items():
-        try:
-            idnum, confidence = model.predict(face_gray)
-            if confidence < lowest_confidence:
-                lowest_confidence = confidence
-                best_match_id = user_id
-        except:
-            continue
+
+def check_face_exists(face_gray):
+    """检测当前人脸是否已经录入过"""
+    if not len(model_registry.index):
+        return False, "没有找到有效的模型文件"
+
+    try:
+        best_match_id, lowest_confidence = model_registry.index.search(
+            histogram_extractor.extract(normalize_face(face_gray))
+        )
+    except Exception as e:
+        print(f"人脸查重失败: {e}")
+        return False, "新人脸"
 
     if lowest_confidence < 50:  # 置信度阈值
         user_name = id_dict.get(best_match_id, f"用户{best_match_id}")
@@ -364,9 +397,6 @@ def check_face_exists(face_gray):
     return False, "新人脸"
 
 
-# 全局变量用于存储录入会话
-registration_sessions = {}
-
 @app.route('/start_registration', methods=['POST'])
 def start_registration():
     """
@@ -379,15 +409,8 @@ def start_registration():
     @apiSuccess {String} message 提示信息
     @apiError (400) {Boolean} success false
     @apiError (400) {String} message 错误信息
+    @apiError (503) {Number} active_sessions 进行中的录入会话数（会话已满时）
     """
-    global system_state_lock, Total_face_num
-    
-    if system_state_lock != 0:
-        return jsonify({
-            'success': False,
-            'message': '系统正忙，请稍后重试'
-        }), 400
-    
     try:
         data = request.get_json()
         username = data.get('username')
@@ -398,30 +421,40 @@ def start_registration():
                 'message': '缺少用户名'
             }), 400
         
-        # 生成会话ID
-        session_id = f"reg_{int(time.time())}"
-        
-        # 创建录入会话 - 与main.py保持一致
-        registration_sessions[session_id] = {
-            'username': username,
-            'user_id': Total_face_num,
-            'collected_images': 0,
-            'target_images': 300,  # 与main.py中的pictur_num一致
-            'status': 'collecting',
-            'start_time': time.time(),
-            'face_duplicate_checked': False,  # 重复检测状态
-            'blink_verified': False,  # 眨眼验证状态
-            'verification_mode': False,  # 验证模式状态
-            'verification_counter': 0  # 验证计数器
-        }
-        
-        system_state_lock = 2  # 设置为录入状态
-        
-        # 创建数据目录 - 与main.py保持一致
-        data_dir = 'face-recognition-cv2-master/data'
-        if os.path.exists(data_dir):
-            shutil.rmtree(data_dir)
-        os.makedirs(data_dir, exist_ok=True)
+        with registration_lock:
+            expire_stale_sessions()
+            if len(registration_sessions) >= MAX_REGISTRATION_SESSIONS:
+                response = jsonify({
+                    'success': False,
+                    'message': '录入会话已满，请稍后重试',
+                    'active_sessions': len(registration_sessions)
+                })
+                response.headers['Retry-After'] = '10'
+                return response, 503
+            
+            # 生成会话ID，并为本次录入分配独立的用户ID
+            session_id = f"reg_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+            user_id = reserve_user_id()
+            
+            # 创建录入会话 - 与main.py保持一致
+            registration_sessions[session_id] = {
+                'username': username,
+                'user_id': user_id,
+                'collected_images': 0,
+                'target_images': 300,  # 与main.py中的pictur_num一致
+                'status': 'collecting',
+                'start_time': time.time(),
+                'last_active': time.time(),
+                'lock': threading.Lock(),  # 串行处理同一会话的请求
+                'buffer': EnrollmentBuffer(user_id, 300),  # 内存样本缓冲区，边采集边增量训练
+                'face_duplicate_checked': False,  # 重复检测状态
+                'blink_verified': False,  # 眨眼验证状态
+                'verification_mode': False,  # 验证模式状态
+                'verification_counter': 0,  # 验证计数器
+                'tracker': FaceTracker(),  # 跨帧人脸跟踪，只在上一帧人脸附近检测
+                'frames': 0,  # 已处理帧数
+                'frame_time': 0.0  # 已处理帧的总耗时（秒）
+            }
         
         return jsonify({
             'success': True,
@@ -431,101 +464,72 @@ def start_registration():
         })
         
     except Exception as e:
-        system_state_lock = 0
         print(f"开始录入错误: {e}")
         return jsonify({
             'success': False,
             'message': f'开始录入失败: {str(e)}'
         }), 500
 
-@app.route('/collect_image', methods=['POST'])
-def collect_image():
-    """
-    @api {post} /collect_image 收集单张人脸图像
-    @apiDescription 上传一张人脸图片到当前录入会话。
-    @apiParam {String} session_id 会话ID
-    @apiParam {String} image base64编码的人脸图片
-    @apiSuccess {Boolean} success 是否成功
-    @apiSuccess {String} message 提示信息
-    @apiSuccess {Number} collected_images 已采集图片数
-    @apiSuccess {Number} progress 录入进度百分比
-    @apiError (400) {Boolean} success false
-    @apiError (400) {String} message 错误信息
+def process_registration_frame(session, image_bytes, max_side=0):
+    """处理录入会话的一帧图像，返回 (响应内容, HTTP状态码)
+
+    /collect_image、流式HTTP和WebSocket录入共用此逻辑；会话的人脸跟踪器保存在
+    服务端，每帧的处理耗时（含解码）在响应的 latency_ms 字段中返回。
     """
-    try:
-        data = request.get_json()
-        session_id = data.get('session_id')
-        image_data = data.get('image')
-        
-        if not session_id or session_id not in registration_sessions:
-            return jsonify({
-                'success': False,
-                'message': '无效的会话ID'
-            }), 400
-        
-        if not image_data:
-            return jsonify({
-                'success': False,
-                'message': '缺少图像数据'
-            }), 400
-        
-        session = registration_sessions[session_id]
-        
+    started = time.perf_counter()
+    body, status_code = _process_registration_frame(session, image_bytes, max_side)
+    latency = time.perf_counter() - started
+    body['latency_ms'] = round(latency * 1000, 2)
+    with session['lock']:
+        session['frames'] += 1
+        session['frame_time'] += latency
+    return body, status_code
+
+def _process_registration_frame(session, image_bytes, max_side):
+    # 直接解码为灰度图
+    gray = decode_gray(image_bytes)
+    if gray is None:
+        return {
+            'success': False,
+            'message': '图像格式错误'
+        }, 400
+    # 同一会话的帧串行处理，不同会话之间互不阻塞
+    with session['lock']:
+        session['last_active'] = time.time()
         if session['status'] != 'collecting':
-            return jsonify({
+            return {
                 'success': False,
                 'message': '会话状态错误'
-            }), 400
-        
-        # 转换图像
-        cv_image = base64_to_image(image_data)
-        if cv_image is None:
-            return jsonify({
-                'success': False,
-                'message': '图像格式错误'
-            }), 400
+            }, 400
         
-        # 转换为灰度图
-        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        # 检测人脸：优先在上一帧人脸附近的窗口内检测，跟丢时才整帧检测
+        faces, detect_mode = session['tracker'].locate(gray, face_detector, max_side)
         
-        # 检测人脸 - 调整参数以提高检测率
-        faces = face_cascade.detectMultiScale(gray, 1.1, 3)
-        
-        print(f"检测到 {len(faces)} 个人脸")
+        print(f"检测到 {len(faces)} 个人脸（{detect_mode}）")
         
         if len(faces) == 0:
-            # 尝试更宽松的参数
-            faces = face_cascade.detectMultiScale(gray, 1.05, 2)
-            print(f"使用宽松参数检测到 {len(faces)} 个人脸")
-            
-            if len(faces) == 0:
-                return jsonify({
-                    'success': False,
-                    'message': '未检测到人脸，请确保人脸清晰可见'
-                }), 400
+            return {
+                'success': False,
+                'message': '未检测到人脸，请确保人脸清晰可见'
+            }, 400
         
         # 处理第一个检测到的人脸
         (x, y, w, h) = faces[0]
         face_gray = gray[y:y + h, x:x + w]
         
-        # 检测眨眼和微笑 - 与main.py完全一致
-        eye_count, has_smile = detect_blink_and_smile(face_gray)
-        
-        # 检测张嘴（使用微笑检测器的变体）- 与main.py一致
-        mouth_regions = smile_cascade.detectMultiScale(face_gray, 1.5, 10)
-        has_mouth_open = len(mouth_regions) > 0
+        # 检测眨眼、微笑和张嘴：眼睛只在人脸上半部分检测，微笑/张嘴共用一次检测
+        eye_count, has_smile, has_mouth_open = face_detector.liveness(face_gray)
         
         # 检查重复录入（只在开始时检测）- 与main.py逻辑一致
         if not session['face_duplicate_checked'] and session['collected_images'] < 10:
             is_duplicate, duplicate_message = check_face_exists(face_gray)
             if is_duplicate:
                 session['status'] = 'error'
-                system_state_lock = 0
-                return jsonify({
+                return {
                     'success': False,
                     'message': duplicate_message,
                     'duplicate': True
-                }), 400
+                }, 400
             session['face_duplicate_checked'] = True
         
         # 检查50%检查点的眨眼验证 - 与main.py逻辑完全一致
@@ -549,66 +553,108 @@ def collect_image():
                     session['verification_mode'] = False
                     session['verification_counter'] = 0
                     print("50%检查点眨眼验证完成，继续录入")
-                    return jsonify({
+                    return {
                         'success': True,
                         'message': '50%检查点眨眼验证完成，继续录入',
                         'collected_images': session['collected_images'],
                         'verification_complete': True,
                         'progress': session['collected_images'] / session['target_images'] * 100
-                    })
+                    }, 200
+                return {
+                    'success': True,
+                    'message': '检测到眨眼，请继续',
+                    'collected_images': session['collected_images'],
+                    'verification_mode': True,
+                    'verification_counter': session['verification_counter'],
+                    'progress': session['collected_images'] / session['target_images'] * 100
+                }, 200
             else:
                 # 重置验证计数器，因为眼睛又睁开了
                 if session['verification_counter'] > 0:
                     session['verification_counter'] = 0
                     print("眼睛睁开，重置验证计数器")
                 
-                return jsonify({
+                return {
                     'success': True,
                     'message': '50%检查点 - 请眨眼',
                     'collected_images': session['collected_images'],
                     'verification_mode': True,
                     'progress': session['collected_images'] / session['target_images'] * 100
-                })
+                }, 200
         else:
-            # 正常录入模式
+            # 正常录入模式：样本放入内存缓冲区，每满一批增量训练一次
+            session['buffer'].add(face_gray)
             session['collected_images'] += 1
             
-            # 保存图像 - 与main.py命名格式一致
-            filename = f"User.{session['user_id']}.{session['collected_images']}.jpg"
-            cv2.imwrite(os.path.join('face-recognition-cv2-master/data', filename), face_gray)
-            
-            print(f"正常录入模式: 保存第 {session['collected_images']} 张图像")
+            print(f"正常录入模式: 采集第 {session['collected_images']} 张图像")
             
             # 检查是否完成录入
             if session['collected_images'] >= session['target_images']:
                 # 检查是否完成了眨眼验证
                 if not session['blink_verified']:
                     session['status'] = 'error'
-                    system_state_lock = 0
-                    return jsonify({
+                    return {
                         'success': False,
                         'message': '录入完成但眨眼验证未通过，需要重新录入'
-                    }), 400
+                    }, 400
                 
                 session['status'] = 'collected'
-                return jsonify({
+                return {
                     'success': True,
                     'message': '录入完成，所有验证通过',
                     'collected_images': session['collected_images'],
                     'completed': True,
                     'progress': 100
-                })
+                }, 200
             
             # 显示录入进度
             progress_percent = session['collected_images'] / session['target_images'] * 100
             
-            return jsonify({
+            return {
                 'success': True,
                 'message': f'录入进度: {progress_percent:.1f}%',
                 'collected_images': session['collected_images'],
                 'progress': progress_percent
-            })
-            
+            }, 200
+
+@app.route('/collect_image', methods=['POST'])
+def collect_image():
+    """
+    @api {post} /collect_image 收集单张人脸图像
+    @apiDescription 上传一张人脸图片到当前录入会话。图像可以是JSON中的base64字符串、
+    multipart 表单的 image 文件，或 Content-Type 为 image/jpeg 的原始请求体
+    （此时 session_id 放在查询字符串中）。
+    @apiParam {String} session_id 会话ID（JSON字段、表单字段或查询参数）
+    @apiParam {String} image base64编码的人脸图片（JSON方式）
+    @apiParam {Number} [max_side] 检测前把图像最长边缩小到该像素数，默认取 FACE_DETECT_MAX_SIDE
+    @apiSuccess {Boolean} success 是否成功
+    @apiSuccess {String} message 提示信息
+    @apiSuccess {Number} collected_images 已采集图片数
+    @apiSuccess {Number} progress 录入进度百分比
+    @apiSuccess {Number} latency_ms 本帧服务端处理耗时（毫秒）
+    @apiError (400) {Boolean} success false
+    @apiError (400) {String} message 错误信息
+    """
+    try:
+        params = get_request_params()
+        session = get_registration_session(params.get('session_id'))
+        
+        if session is None:
+            return jsonify({
+                'success': False,
+                'message': '无效的会话ID'
+            }), 400
+        
+        image_bytes = read_request_image(params)
+        if not image_bytes:
+            return jsonify({
+                'success': False,
+                'message': '缺少图像数据'
+            }), 400
+        
+        body, status_code = process_registration_frame(session, image_bytes, request_max_side(params))
+        return jsonify(body), status_code
+        
     except Exception as e:
         print(f"收集图像错误: {e}")
         return jsonify({
@@ -616,91 +662,226 @@ def collect_image():
             'message': f'收集图像失败: {str(e)}'
         }), 500
 
+def stream_registration_frames(session, frames, max_side):
+    """逐帧处理录入图像并生成每帧的结果，会话采集完成或出错时停止
+
+    最后一帧的结果附带本会话的逐帧处理统计。
+    """
+    for image_bytes in frames:
+        body, status_code = process_registration_frame(session, image_bytes, max_side)
+        body['status_code'] = status_code
+        finished = session['status'] != 'collecting'
+        if finished:
+            body['stream_stats'] = session_frame_stats(session)
+        yield body
+        if finished:
+            break
+
+@app.route('/collect_stream', methods=['POST'])
+def collect_stream():
+    """
+    @api {post} /collect_stream 流式收集人脸图像（HTTP分块传输）
+    @apiDescription 在一个请求中持续上传多帧图像，人脸跟踪状态保存在服务端会话中。
+    请求体由若干帧依次拼接而成，每帧为4字节大端长度加JPEG字节，可用分块传输边采集边发送；
+    响应为 application/x-ndjson，每处理完一帧返回一行JSON（字段同 /collect_image，
+    另含 status_code），会话采集完成或出错时结束。
+    @apiParam {String} session_id 会话ID（查询参数）
+    @apiParam {Number} [max_side] 检测前把图像最长边缩小到该像素数
+    @apiSuccess {Number} latency_ms 每帧服务端处理耗时（毫秒）
+    @apiSuccess {Object} stream_stats 最后一行附带的逐帧统计（帧数、平均耗时、跟踪命中）
+    @apiError (400) {Boolean} success false
+    @apiError (400) {String} message 错误信息
+    """
+    params = request.args.to_dict()
+    session = get_registration_session(params.get('session_id'))
+    if session is None:
+        return jsonify({
+            'success': False,
+            'message': '无效的会话ID'
+        }), 400
+    
+    max_side = request_max_side(params)
+    stream = request.stream
+    
+    def generate():
+        try:
+            for body in stream_registration_frames(session, iter_length_prefixed(stream), max_side):
+                yield json.dumps(body, ensure_ascii=False) + '\n'
+        except Exception as e:
+            print(f"流式收集图像错误: {e}")
+            yield json.dumps({'success': False, 'message': f'收集图像失败: {str(e)}', 'status_code': 500},
+                             ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+if sock is not None:
+    @sock.route('/ws/registration')
+    def registration_socket(ws):
+        """
+        WebSocket录入会话：连接地址 /ws/registration?session_id=...[&max_side=...]。
+        客户端每发送一条二进制消息（JPEG字节）或文本消息（base64图像）即为一帧，
+        服务器对每帧回复一条JSON（字段同 /collect_stream 的每一行），会话结束后关闭连接。
+        """
+        params = request.args.to_dict()
+        session = get_registration_session(params.get('session_id'))
+        if session is None:
+            ws.send(json.dumps({'success': False, 'message': '无效的会话ID', 'status_code': 400}, ensure_ascii=False))
+            return
+        
+        def receive_frames():
+            while True:
+                message = ws.receive()
+                if message is None:
+                    return
+                yield message if isinstance(message, (bytes, bytearray)) else base64_to_bytes(message)
+        
+        try:
+            for body in stream_registration_frames(session, receive_frames(), request_max_side(params)):
+                ws.send(json.dumps(body, ensure_ascii=False))
+        except Exception as e:
+            print(f"WebSocket录入错误: {e}")
+
+def complete_enrollment(user_id, username, buffer):
+    """在训练线程中完成录入：训练最后一批样本、发布新版本模型并更新配置"""
+    # 采集过程中已按批增量训练，这里只需训练最后不足一批的样本
+    model = buffer.finalize()
+    samples = len(buffer)
+    
+    # 模型先写入版本文件，再原子替换线上的 <id>_train.yml 并登记到注册表
+    model_path, version = model_registry.publish(user_id, model)
+    print(f"模型训练完成，保存到: {model_path}（版本 {version}）")
+    
+    # 更新配置 - 与main.py的write_config一致
+    write_config(username, user_id)
+    
+    if SPILL_ENROLLMENT_SAMPLES:
+        sample_store.replace(user_id, buffer.samples)
+    buffer.clear()
+    
+    return {
+        'user_id': user_id,
+        'username': username,
+        'samples': samples,
+        'model_version': version
+    }
+
+def train_session_job(session_id, session):
+    """训练任务：完成录入会话的训练并清理会话"""
+    try:
+        result = complete_enrollment(session['user_id'], session['username'], session['buffer'])
+    except Exception:
+        session['status'] = 'error'
+        raise
+    session['status'] = 'completed'
+    with registration_lock:
+        registration_sessions.pop(session_id, None)
+        reserved_user_ids.discard(session['user_id'])
+    return result
+
+def train_images_job(user_id, username, buffer):
+    """训练任务：完成 /train 上传图像的训练，结束后释放预留的用户ID"""
+    try:
+        return complete_enrollment(user_id, username, buffer)
+    finally:
+        release_user_id(user_id)
+
+def retrain_job(user_id):
+    """训练任务：用样本库中保存的样本重新训练用户模型并发布新版本"""
+    samples, labels = sample_store.load(user_id)
+    model = cv2.face.LBPHFaceRecognizer_create()
+    # 样本库中的样本已是连续存放的固定尺寸数组，不需要再读取和解析图片文件
+    model.train(list(samples), np.asarray(labels, dtype=np.int32))
+    model_path, version = model_registry.publish(user_id, model)
+    print(f"用户 {user_id} 已用 {len(labels)} 张样本重新训练，保存到: {model_path}（版本 {version}）")
+    return {
+        'user_id': user_id,
+        'username': id_dict.get(user_id),
+        'samples': len(labels),
+        'model_version': version
+    }
+
+def training_response(job_id, wait, **extra):
+    """同步模式等待训练结束并返回与旧接口一致的结果；异步模式立即返回任务ID"""
+    if not wait:
+        job = training_queue.get(job_id)
+        return jsonify(dict({
+            'success': True,
+            'message': '训练任务已提交',
+            'job_id': job_id,
+            'status': job['status'],
+            'samples': job['samples']
+        }, **extra)), 202
+    
+    job = training_queue.wait(job_id)
+    if job['status'] != 'completed':
+        return jsonify({
+            'success': False,
+            'message': f"训练失败: {job['error']}",
+            'job_id': job_id
+        }), 500
+    return jsonify(dict(job['result'], **extra, **{
+        'success': True,
+        'message': '人脸训练完成，共训练 1 张人脸',
+        'job_id': job_id,
+        'train_time_ms': job['train_time_ms'],
+        'samples_per_second': job['samples_per_second']
+    }))
+
 @app.route('/train_session', methods=['POST'])
 def train_session():
     """
     @api {post} /train_session 训练指定会话的人脸模型
-    @apiDescription 对已采集完毕的会话进行人脸模型训练。
+    @apiDescription 对已采集完毕的会话进行人脸模型训练。训练在后台训练线程中执行，
+    默认等待训练结束后返回结果；传入 async=true 时立即返回任务ID，再通过 /train_jobs/:job_id 查询。
     @apiParam {String} session_id 会话ID
+    @apiParam {Boolean} [async=false] 是否异步训练
     @apiSuccess {Boolean} success 是否成功
     @apiSuccess {String} message 提示信息
+    @apiSuccess {String} job_id 训练任务ID
     @apiSuccess {Number} user_id 用户ID
     @apiSuccess {String} username 用户名
     @apiSuccess {Number} samples 训练样本数
+    @apiSuccess {String} model_version 模型版本号
+    @apiSuccess {Number} train_time_ms 训练耗时（毫秒）
+    @apiSuccess {Number} samples_per_second 训练吞吐量（样本/秒）
     @apiError (400) {Boolean} success false
     @apiError (400) {String} message 错误信息
     """
-    global system_state_lock, Total_face_num
-    
+    session = None
     try:
-        data = request.get_json()
-        session_id = data.get('session_id')
+        params = get_request_params()
+        session = get_registration_session(params.get('session_id'))
         
-        if not session_id or session_id not in registration_sessions:
+        if session is None:
             return jsonify({
                 'success': False,
                 'message': '无效的会话ID'
             }), 400
         
-        session = registration_sessions[session_id]
-        
-        if session['status'] != 'collected':
-            return jsonify({
-                'success': False,
-                'message': '会话状态错误，请先完成图像收集'
-            }), 400
-        
-        session['status'] = 'training'
-        
-        # 移动图像到Facedata目录 - 与main.py一致
-        facedata_dir = 'face-recognition-cv2-master/Facedata'
-        os.makedirs(facedata_dir, exist_ok=True)
-        
-        data_dir = 'face-recognition-cv2-master/data'
-        for filename in os.listdir(data_dir):
-            shutil.move(os.path.join(data_dir, filename), os.path.join(facedata_dir, filename))
+        # 状态检查与切换在会话锁内完成，避免重复提交训练
+        with session['lock']:
+            if session['status'] != 'collected':
+                return jsonify({
+                    'success': False,
+                    'message': '会话状态错误，请先完成图像收集'
+                }), 400
+            session['status'] = 'training'
+            session['last_active'] = time.time()
         
-        # 训练模型 - 与main.py的get_images_and_labels和Train_new_face逻辑一致
-        faces, ids = get_images_and_labels(facedata_dir, session['user_id'])
-        if len(faces) == 0:
+        if len(session['buffer']) == 0:
             session['status'] = 'error'
-            system_state_lock = 0
             return jsonify({
                 'success': False,
                 'message': '没有检测到有效的人脸数据'
             }), 400
         
-        # 训练识别器
-        recognizer.train(faces, np.array(ids))
-        
-        # 保存模型 - 与main.py一致
-        trainer_dir = 'face-recognition-cv2-master/traindata'
-        os.makedirs(trainer_dir, exist_ok=True)
-        model_path = os.path.join(trainer_dir, f'{session["user_id"]}_train.yml')
-        recognizer.save(model_path)
-        
-        # 更新配置 - 与main.py的write_config一致
-        write_config(session['username'])
-        Total_face_num += 1
-        
-        # 清理会话
-        session['status'] = 'completed'
-        del registration_sessions[session_id]
-        
-        system_state_lock = 0
-        
-        return jsonify({
-            'success': True,
-            'message': f'人脸训练完成，共训练 {len(np.unique(ids))} 张人脸',
-            'user_id': session['user_id'],
-            'username': session['username'],
-            'samples': len(faces)
-        })
+        job_id = training_queue.submit(train_session_job, params['session_id'], session,
+                                       user_id=session['user_id'], samples=len(session['buffer']))
+        return training_response(job_id, not param_flag(params, 'async'))
         
     except Exception as e:
-        system_state_lock = 0
-        if session_id in registration_sessions:
-            registration_sessions[session_id]['status'] = 'error'
+        if session is not None:
+            session['status'] = 'error'
         print(f"训练错误: {e}")
         return jsonify({
             'success': False,
@@ -711,71 +892,53 @@ def train_session():
 def train_face():
     """
     @api {post} /train 训练人脸模型（兼容旧接口）
-    @apiDescription 通过用户名和多张图片直接训练人脸模型。
+    @apiDescription 通过用户名和多张图片直接训练人脸模型。也可以用 multipart 表单上传：
+    username 为表单字段，多张图片都使用 images 字段。传入 async=true 时立即返回训练任务ID。
     @apiParam {String} username 用户名
     @apiParam {String[]} images base64编码的人脸图片数组
+    @apiParam {Boolean} [async=false] 是否异步训练
     @apiSuccess {Boolean} success 是否成功
     @apiSuccess {String} message 提示信息
+    @apiSuccess {String} job_id 训练任务ID
     @apiSuccess {Number} user_id 用户ID
     @apiSuccess {String} username 用户名
     @apiSuccess {Number} samples 训练样本数
     @apiSuccess {Number} valid_images 有效图片数
+    @apiSuccess {Number} train_time_ms 训练耗时（毫秒）
     @apiError (400) {Boolean} success false
     @apiError (400) {String} message 错误信息
     """
-    global Total_face_num
-    
-    # 尝试获取系统锁
-    if not acquire_system_lock(2):
-        return jsonify({
-            'success': False,
-            'message': '系统正忙，请稍后重试'
-        }), 400
+    # 为本次训练分配独立的用户ID，训练任务结束（或提交前失败）后释放
+    with registration_lock:
+        user_id = reserve_user_id()
+    submitted = False
     
     try:
-        data = request.get_json()
-        if not data:
-            release_system_lock()
-            return jsonify({
-                'success': False,
-                'message': '请求数据格式错误'
-            }), 400
-        
-        username = data.get('username')
-        images = data.get('images', [])
+        params = get_request_params()
+        username = params.get('username')
+        uploads = request.files.getlist('images')
+        if uploads:
+            images = [upload.read() for upload in uploads]
+        else:
+            images = params.get('images', [])
         
         if not username or not images:
-            release_system_lock()
             return jsonify({
                 'success': False,
                 'message': '缺少必要参数：用户名或图像数据'
             }), 400
         
         if not isinstance(images, list) or len(images) == 0:
-            release_system_lock()
             return jsonify({
                 'success': False,
                 'message': '图像数据格式错误或为空'
             }), 400
         
         print(f"开始训练用户 {username} 的人脸模型，图像数量: {len(images)}")
+        max_side = request_max_side(params)
         
-        # 创建数据目录
-        data_dir = 'face-recognition-cv2-master/data'
-        facedata_dir = 'face-recognition-cv2-master/Facedata'
-        
-        try:
-            if os.path.exists(data_dir):
-                shutil.rmtree(data_dir)
-            os.makedirs(data_dir, exist_ok=True)
-            os.makedirs(facedata_dir, exist_ok=True)
-        except Exception as e:
-            release_system_lock()
-            print(f"创建目录失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'创建数据目录失败: {str(e)}'
-            }), 500
+        # 人脸样本直接放入内存缓冲区并增量训练，不再写入 data 目录
+        buffer = EnrollmentBuffer(user_id, capacity=max(len(images) * 4, 1))
         
         # 处理图像数据
         sample_num = 0
@@ -783,25 +946,21 @@ def train_face():
         
         for i, image_data in enumerate(images):
             try:
-                cv_image = base64_to_image(image_data)
-                if cv_image is None:
+                if not isinstance(image_data, bytes):
+                    image_data = base64_to_bytes(image_data)
+                gray = decode_gray(image_data)
+                if gray is None:
                     print(f"图像 {i+1} 转换失败")
                     continue
                 
                 valid_images += 1
                 
-                # 转换为灰度图
-                gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-                
                 # 检测人脸
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+                faces = face_detector.detect(gray, max_side, fallback=False, scale_factor=1.3, min_neighbors=5)
                 
                 for (x, y, w, h) in faces:
-                    sample_num += 1
-                    # 保存人脸图像
-                    face_image = gray[y:y + h, x:x + w]
-                    filename = f"User.{Total_face_num}.{sample_num}.jpg"
-                    cv2.imwrite(os.path.join(data_dir, filename), face_image)
+                    if buffer.add(gray[y:y + h, x:x + w]):
+                        sample_num += 1
                     
             except Exception as e:
                 print(f"处理图像 {i+1} 时出错: {e}")
@@ -810,94 +969,85 @@ def train_face():
         print(f"有效图像: {valid_images}/{len(images)}, 检测到人脸样本: {sample_num}")
         
         if sample_num == 0:
-            release_system_lock()
             return jsonify({
                 'success': False,
                 'message': '未检测到人脸，请重新上传图像或调整拍摄角度'
             }), 400
         
-        # 移动图像到Facedata目录
-        try:
-            for filename in os.listdir(data_dir):
-                shutil.move(os.path.join(data_dir, filename), 
-                           os.path.join(facedata_dir, filename))
-        except Exception as e:
-            release_system_lock()
-            print(f"移动图像文件失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'保存图像文件失败: {str(e)}'
-            }), 500
-        
-        # 训练模型
-        try:
-            faces, ids = get_images_and_labels(facedata_dir, Total_face_num)
-            if len(faces) == 0:
-                release_system_lock()
-                return jsonify({
-                    'success': False,
-                    'message': '没有检测到有效的人脸数据用于训练'
-                }), 400
-            
-            # 训练识别器
-            recognizer.train(faces, np.array(ids))
-            
-            # 保存模型
-            trainer_dir = 'face-recognition-cv2-master/traindata'
-            os.makedirs(trainer_dir, exist_ok=True)
-            model_path = os.path.join(trainer_dir, f'{Total_face_num}_train.yml')
-            recognizer.save(model_path)
-            
-            print(f"模型训练完成，保存到: {model_path}")
-            
-        except Exception as e:
-            release_system_lock()
-            print(f"模型训练失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'模型训练失败: {str(e)}'
-            }), 500
-        
-        # 更新配置
-        try:
-            write_config(username)
-            Total_face_num += 1
-            print(f"配置更新完成，用户ID: {Total_face_num - 1}")
-        except Exception as e:
-            release_system_lock()
-            print(f"更新配置失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'更新用户配置失败: {str(e)}'
-            }), 500
-        
-        # 释放系统锁
-        release_system_lock()
-        
-        return jsonify({
-            'success': True,
-            'message': f'人脸训练完成，共训练 {len(np.unique(ids))} 张人脸',
-            'user_id': Total_face_num - 1,
-            'username': username,
-            'samples': sample_num,
-            'valid_images': valid_images
-        })
+        # 训练、发布模型和更新配置在后台训练线程中完成
+        job_id = training_queue.submit(train_images_job, user_id, username, buffer,
+                                       user_id=user_id, samples=sample_num)
+        submitted = True
+        return training_response(job_id, not param_flag(params, 'async'), valid_images=valid_images)
         
     except Exception as e:
-        # 确保在任何异常情况下都释放系统锁
-        release_system_lock()
         print(f"训练过程出现未预期错误: {e}")
         return jsonify({
             'success': False,
             'message': f'训练失败: {str(e)}'
         }), 500
+    finally:
+        if not submitted:
+            release_user_id(user_id)
+
+@app.route('/train_jobs/<job_id>', methods=['GET'])
+def get_train_job(job_id):
+    """
+    @api {get} /train_jobs/:job_id 查询训练任务
+    @apiDescription 查询后台训练任务的状态、耗时和结果。
+    @apiParam {String} job_id 训练任务ID
+    @apiSuccess {Boolean} success 是否成功
+    @apiSuccess {Object} job 任务状态（status: queued/running/completed/failed）
+    @apiError (404) {Boolean} success false
+    @apiError (404) {String} message 任务不存在
+    """
+    job = training_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': '训练任务不存在'
+        }), 404
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@app.route('/retrain/<int:user_id>', methods=['POST'])
+def retrain_user(user_id):
+    """
+    @api {post} /retrain/:user_id 用样本库重新训练
+    @apiDescription 用录入时写入样本库的归一化人脸样本重新训练该用户的模型，
+    发布新版本并更新身份索引，不需要重新采集。默认同步等待训练完成，async=true 时立即返回任务ID。
+    @apiParam {Number} user_id 用户ID
+    @apiParam {Boolean} [async=false] 是否异步训练
+    @apiSuccess {Boolean} success 是否成功
+    @apiSuccess {Number} samples 训练样本数
+    @apiSuccess {String} job_id 训练任务ID
+    @apiError (404) {Boolean} success false
+    @apiError (404) {String} message 用户不存在或样本库中没有该用户的样本
+    """
+    if user_id not in id_dict:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+    samples, _ = sample_store.load(user_id)
+    if len(samples) == 0:
+        return jsonify({
+            'success': False,
+            'message': '样本库中没有该用户的样本'
+        }), 404
+    job_id = training_queue.submit(retrain_job, user_id, user_id=user_id, samples=len(samples))
+    return training_response(job_id, not param_flag(get_request_params(), 'async'))
 
 @app.route('/recognize', methods=['POST'])
 def recognize_face():
     """
     @api {post} /recognize 人脸识别
-    @apiDescription 上传一张人脸图片，返回识别结果。
-    @apiParam {String} image base64编码的人脸图片
+    @apiDescription 上传一张人脸图片，返回识别结果。图像可以是JSON中的base64字符串、
+    multipart 表单的 image 文件，或 Content-Type 为 image/jpeg 的原始请求体。
+    @apiParam {String} image base64编码的人脸图片（JSON方式）
+    @apiParam {Number} [max_side] 检测前把图像最长边缩小到该像素数，默认取 FACE_DETECT_MAX_SIDE
     @apiSuccess {Boolean} success 是否成功
     @apiSuccess {String} message 提示信息
     @apiSuccess {Number} user_id 用户ID（识别成功时）
@@ -905,28 +1055,16 @@ def recognize_face():
     @apiSuccess {Number} confidence 置信度
     @apiError (400) {Boolean} success false
     @apiError (400) {String} message 错误信息
+    @apiError (503) {Number} queue_position 当前排队的识别任务数（识别队列已满时）
     """
     """人脸识别 - 与main.py的scan_face逻辑一致"""
     
-    # 检查系统锁状态
-    if system_state_lock == 2:
-        return jsonify({
-            'success': False,
-            'message': '系统正在录入人脸，请稍后重试'
-        }), 400
-    
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据格式错误'
-            }), 400
-        
-        image_data = data.get('image')
+        params = get_request_params()
+        image_bytes = read_request_image(params)
         client_ip = request.remote_addr
         
-        if not image_data:
+        if not image_bytes:
             return jsonify({
                 'success': False,
                 'message': '缺少图像数据'
@@ -934,10 +1072,10 @@ def recognize_face():
         
         print(f"开始人脸识别，客户端IP: {client_ip}")
         
-        # 转换图像
+        # 直接解码为灰度图
         try:
-            cv_image = base64_to_image(image_data)
-            if cv_image is None:
+            gray = decode_gray(image_bytes)
+            if gray is None:
                 return jsonify({
                     'success': False,
                     'message': '图像格式错误或转换失败'
@@ -949,121 +1087,60 @@ def recognize_face():
                 'message': f'图像处理失败: {str(e)}'
             }), 400
         
-        # 保存识别图像（用于失败记录）
+        # 保存识别图像（用于失败记录），直接写入上传的编码字节
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             image_filename = f'recognize_{timestamp}.jpg'
-            image_path = save_face_image(cv_image, image_filename)
+            image_path = save_face_image(image_bytes, image_filename)
         except Exception as e:
             print(f"保存识别图像失败: {e}")
             image_path = None
         
-        # 转换为灰度图
+        # 检测与识别在工作线程池中并发执行，排队已满时返回503
         try:
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        except Exception as e:
-            print(f"图像灰度转换失败: {e}")
-            return jsonify({
+            faces, best_match_id, lowest_confidence = recognition_pool.run(
+                recognize_gray, gray, request_max_side(params)
+            )
+        except ServiceBusy as busy:
+            response = jsonify({
                 'success': False,
-                'message': f'图像处理失败: {str(e)}'
-            }), 400
-        
-        # 检测人脸 - 调整参数以提高检测率
-        try:
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3)
-            print(f"识别检测到 {len(faces)} 个人脸")
-            
-            if len(faces) == 0:
-                # 尝试更宽松的参数
-                faces = face_cascade.detectMultiScale(gray, scaleFactor=1.05, minNeighbors=2)
-                print(f"识别使用宽松参数检测到 {len(faces)} 个人脸")
-                
-                if len(faces) == 0:
-                    # 暂时跳过数据库日志记录，避免连接错误
-                    # log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
-                    return jsonify({
-                        'success': False,
-                        'message': '未检测到人脸，请确保人脸清晰可见'
-                    }), 400
+                'message': '识别请求排队已满，请稍后重试',
+                'queue_position': busy.pending,
+                'max_pending': busy.capacity
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 503
         except Exception as e:
-            print(f"人脸检测失败: {e}")
+            print(f"人脸识别过程失败: {e}")
             return jsonify({
                 'success': False,
-                'message': f'人脸检测失败: {str(e)}'
+                'message': f'人脸识别过程失败: {str(e)}'
             }), 400
         
-        # 加载所有训练模型 - 与main.py的scan_face逻辑一致
-        try:
-            trainer_dir = 'face-recognition-cv2-master/traindata'
-            if not os.path.exists(trainer_dir) or not os.listdir(trainer_dir):
-                # 暂时跳过数据库日志记录，避免连接错误
-                # log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
-                return jsonify({
-                    'success': False,
-                    'message': '没有训练数据，请先录入人脸'
-                }), 400
-            
-            models = {}
-            for file_name in os.listdir(trainer_dir):
-                if file_name.endswith("_train.yml"):
-                    try:
-                        user_id = int(file_name.split('_')[0])
-                        recog = cv2.face.LBPHFaceRecognizer_create()
-                        recog.read(os.path.join(trainer_dir, file_name))
-                        models[user_id] = recog
-                    except Exception as e:
-                        print(f"加载模型 {file_name} 失败: {e}")
-                        continue
-            
-            if not models:
-                # 暂时跳过数据库日志记录，避免连接错误
-                # log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
-                return jsonify({
-                    'success': False,
-                    'message': '没有找到有效的模型文件'
-                }), 400
-        except Exception as e:
-            print(f"加载训练模型失败: {e}")
+        if len(faces) == 0:
+            log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
             return jsonify({
                 'success': False,
-                'message': f'加载识别模型失败: {str(e)}'
+                'message': '未检测到人脸，请确保人脸清晰可见'
             }), 400
         
-        # 识别人脸 - 与main.py的scan_face逻辑一致
-        try:
-            best_match_id = -1
-            lowest_confidence = 100
-            
-            for (x, y, w, h) in faces:
-                face_roi = gray[y:y + h, x:x + w]
-                
-                for user_id, model in models.items():
-                    try:
-                        idnum, confidence = model.predict(face_roi)
-                        if confidence < lowest_confidence:
-                            lowest_confidence = confidence
-                            best_match_id = user_id
-                    except Exception as e:
-                        print(f"模型 {user_id} 预测失败: {e}")
-                        continue
-        except Exception as e:
-            print(f"人脸识别过程失败: {e}")
+        # 所有已录入用户的样本都在常驻内存的身份索引中
+        if best_match_id == -1 and not len(model_registry.index):
+            log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
             return jsonify({
                 'success': False,
-                'message': f'人脸识别过程失败: {str(e)}'
+                'message': '没有训练数据，请先录入人脸'
             }), 400
         
         # 判断识别结果 - 与main.py的置信度阈值一致
-        confidence_threshold = 50
-        if lowest_confidence < confidence_threshold and best_match_id in id_dict:
+        if lowest_confidence < CONFIDENCE_THRESHOLD and best_match_id in id_dict:
             # 识别成功
             user_name = id_dict[best_match_id]
             confidence_percent = round(100 - lowest_confidence, 2)
             
             print(f"识别成功: 用户ID {best_match_id}, 用户名 {user_name}, 置信度 {confidence_percent}%")
             
-            # 暂时跳过数据库日志记录，避免连接错误
-            # log_login_attempt(best_match_id, '人脸识别', 1, client_ip)
+            log_login_attempt(best_match_id, '人脸识别', 1, client_ip)
             
             return jsonify({
                 'success': True,
@@ -1077,8 +1154,7 @@ def recognize_face():
             confidence_percent = round(100 - lowest_confidence, 2) if lowest_confidence < 100 else 0
             print(f"识别失败: 最佳匹配ID {best_match_id}, 置信度 {confidence_percent}%")
             
-            # 暂时跳过数据库日志记录，避免连接错误
-            # log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
+            log_login_attempt(None, '人脸识别', 0, client_ip, image_path)
             return jsonify({
                 'success': False,
                 'message': '人脸识别失败，未找到匹配的用户',
@@ -1092,6 +1168,126 @@ def recognize_face():
             'message': f'识别过程出错: {str(e)}'
         }), 500
 
+@app.route('/recognize_batch', methods=['POST'])
+def recognize_batch():
+    """
+    @api {post} /recognize_batch 批量人脸识别
+    @apiDescription 一次上传多帧图像（multipart 的多个 images 文件或JSON的 images 数组），
+    也可以只上传一帧包含多张人脸的图像。各帧的检测和特征提取在识别线程池中并发执行，
+    所有人脸在一次身份索引查询中完成匹配；连续帧中同一个人的结果合并到 people 中。
+    @apiParam {String[]} images base64编码的图片数组（JSON方式）
+    @apiParam {Number} [max_side] 检测前把图像最长边缩小到该像素数
+    @apiSuccess {Boolean} success 是否成功
+    @apiSuccess {Object[]} frames 每帧的人脸识别结果（box、user_id、username、confidence、recognized）
+    @apiSuccess {Object[]} people 跨帧去重后的人员列表（最高置信度、首末帧序号、出现帧数）
+    @apiSuccess {Object} timing 本批各阶段耗时（毫秒）
+    @apiError (400) {Boolean} success false
+    @apiError (400) {String} message 错误信息
+    @apiError (503) {Number} queue_position 当前排队的识别任务数（识别队列已满时）
+    """
+    started = time.perf_counter()
+    try:
+        params = get_request_params()
+        images = read_request_images(params)
+        if not images:
+            return jsonify({
+                'success': False,
+                'message': '缺少图像数据'
+            }), 400
+        if len(images) > MAX_BATCH_FRAMES:
+            return jsonify({
+                'success': False,
+                'message': f'每批最多 {MAX_BATCH_FRAMES} 帧'
+            }), 400
+        
+        # 解码（无法解码的帧记为空帧，不影响其他帧）
+        grays = [decode_gray(image_bytes) if image_bytes else None for image_bytes in images]
+        decoded = time.perf_counter()
+        max_side = request_max_side(params)
+        
+        # 各帧的检测和直方图提取在识别线程池中并发执行
+        futures = {}
+        try:
+            for i, gray in enumerate(grays):
+                if gray is not None:
+                    futures[i], _ = recognition_pool.submit(detect_and_extract, gray, max_side)
+        except ServiceBusy as busy:
+            wait_futures(list(futures.values()))
+            response = jsonify({
+                'success': False,
+                'message': '识别请求排队已满，请稍后重试',
+                'queue_position': busy.pending,
+                'max_pending': busy.capacity
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        detections = {i: future.result() for i, future in futures.items()}
+        detected = time.perf_counter()
+        
+        # 所有帧的全部人脸一次查询身份索引
+        probes = [probe for i in sorted(detections) for probe in detections[i][1]]
+        matches = iter(model_registry.index.search_batch(probes))
+        matched = time.perf_counter()
+        
+        frames = []
+        for i, gray in enumerate(grays):
+            faces = []
+            for box in (detections[i][0] if i in detections else []):
+                user_id, distance = next(matches)
+                recognized = distance < CONFIDENCE_THRESHOLD and user_id in id_dict
+                faces.append({
+                    'box': [int(v) for v in box],
+                    'user_id': user_id if recognized else -1,
+                    'username': id_dict.get(user_id) if recognized else None,
+                    'confidence': round(100 - distance, 2) if distance < 100 else 0,
+                    'recognized': recognized
+                })
+            frames.append({'index': i, 'decoded': gray is not None, 'faces': faces})
+        
+        people = []
+        for track in link_faces([frame['faces'] for frame in frames]):
+            best = max((face for _, face in track['faces']), key=lambda face: face['confidence'])
+            people.append({
+                'user_id': track['user_id'],
+                'username': best['username'],
+                'confidence': best['confidence'],
+                'recognized': best['recognized'],
+                'first_frame': track['faces'][0][0],
+                'last_frame': track['faces'][-1][0],
+                'frames': len(track['faces'])
+            })
+        
+        client_ip = request.remote_addr
+        for person in people:
+            if person['recognized']:
+                log_login_attempt(person['user_id'], '人脸识别', 1, client_ip)
+            else:
+                log_login_attempt(None, '人脸识别', 0, client_ip)
+        
+        total_faces = sum(len(frame['faces']) for frame in frames)
+        print(f"批量识别: {len(frames)} 帧, {total_faces} 张人脸, {len(people)} 人")
+        return jsonify({
+            'success': True,
+            'message': f'识别到 {len(people)} 人',
+            'frames': frames,
+            'people': people,
+            'timing': {
+                'frames': len(frames),
+                'faces': total_faces,
+                'decode_ms': round((decoded - started) * 1000, 2),
+                'detect_ms': round((detected - decoded) * 1000, 2),
+                'match_ms': round((matched - detected) * 1000, 2),
+                'total_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+        })
+        
+    except Exception as e:
+        print(f"批量识别出现未预期错误: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'批量识别出错: {str(e)}'
+        }), 500
+
 @app.route('/users', methods=['GET'])
 def get_users():
     """
@@ -1148,19 +1344,14 @@ def delete_user(user_id):
                 'message': '用户不存在'
             }), 404
         
-        # 删除模型文件
-        model_file = f'face-recognition-cv2-master/traindata/{user_id}_train.yml'
-        if os.path.exists(model_file):
-            os.remove(model_file)
+        # 删除模型文件（含历史版本）和样本库中的样本
+        model_registry.delete(user_id)
+        sample_store.delete(user_id)
         
-        # 删除用户数据
-        del id_dict[user_id]
-        
-        # 更新配置文件
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.txt'), 'w', encoding='utf-8') as f:
-            for uid, name in id_dict.items():
-                f.write(f"{uid}:{name}\n")
-            f.write(f'Total_face_num = {Total_face_num}\n')
+        # 删除用户数据并更新配置文件
+        with config_lock:
+            id_dict.pop(user_id, None)
+            save_config()
         
         return jsonify({
             'success': True,
@@ -1174,46 +1365,32 @@ def delete_user(user_id):
             'message': f'删除用户失败: {str(e)}'
         }), 500
 
-def get_images_and_labels(path, user_id):
-    """从数据集文件夹中获取训练图片和标签 - 与main.py完全一致"""
-    face_samples = []
-    ids = []
-    
-    if not os.path.exists(path):
-        return face_samples, ids
-    
-    # 与main.py的过滤逻辑一致
-    image_paths = [os.path.join(path, f) for f in os.listdir(path) 
-                   if f.split('.')[1] == str(user_id)]
-    
-    for image_path in image_paths:
-        try:
-            # 导入图片，转为灰度 - 与main.py一致
-            pil_image = Image.open(image_path).convert('L')
-            # 将图片转化为数组
-            img_numpy = np.array(pil_image, 'uint8')
-            # 获取图片id
-            id = int(os.path.split(image_path)[-1].split(".")[1])
-            # 检测人脸
-            faces = face_cascade.detectMultiScale(img_numpy)
-            # 将人脸区域和id添加到列表
-            for (x, y, w, h) in faces:
-                face_samples.append(img_numpy[y:y + h, x:x + w])
-                ids.append(id)
-        except Exception as e:
-            print(f"处理图片 {image_path} 时出错: {e}")
-    
-    return face_samples, ids
-
-def write_config(user_name):
-    """更新配置文件 - 与main.py的write_config完全一致"""
-    id_dict[Total_face_num] = user_name
+def save_config():
+    """把 id_dict 和 Total_face_num 写回配置文件，需在 config_lock 内调用"""
     with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.txt'), 'w', encoding='utf-8') as f:
         for user_id, name in id_dict.items():
             f.write(f"{user_id}:{name}\n")
-        f.write(f'Total_face_num = {Total_face_num + 1}\n')
-    # 重新初始化以更新全局变量
-    init_face_recognition()
+        f.write(f'Total_face_num = {Total_face_num}\n')
+
+def write_config(user_name, user_id):
+    """登记新用户并更新配置文件 - 与main.py的write_config格式一致
+
+    用户ID在录入开始时已分配，并发录入时各自写入自己的ID；
+    Total_face_num 始终保持为最大已用ID + 1。
+    """
+    global Total_face_num
+    with config_lock:
+        id_dict[user_id] = user_name
+        Total_face_num = max(Total_face_num, user_id + 1)
+        save_config()
+
+def system_lock_state():
+    """兼容旧的系统锁状态：2表示有录入会话，1表示有识别任务在执行，0表示空闲"""
+    with registration_lock:
+        registering = bool(registration_sessions)
+    if registering:
+        return 2
+    return 1 if recognition_pool.stats()['running'] else 0
 
 @app.route('/status', methods=['GET'])
 def get_status():
@@ -1222,43 +1399,101 @@ def get_status():
     @apiDescription 获取人脸识别系统当前状态信息。
     @apiSuccess {Boolean} success 是否成功
     @apiSuccess {String} status 系统状态
-    @apiSuccess {Number} system_lock 系统锁状态
+    @apiSuccess {Number} system_lock 系统锁状态（兼容字段，由当前会话/任务推导）
+    @apiSuccess {Number} registration_sessions 进行中的录入会话数
+    @apiSuccess {Object} recognition_pool 识别线程池状态（运行、排队、拒绝数）
     @apiSuccess {Number} total_users 用户总数
     @apiSuccess {Boolean} face_cascade_loaded 人脸检测器是否加载
+    @apiSuccess {String} detection_profile 当前检测配置（accurate/fast）
     @apiSuccess {Boolean} recognizer_loaded 识别器是否加载
+    @apiSuccess {Boolean} websocket_enabled 是否提供 /ws/registration（需安装flask-sock）
+    @apiSuccess {Object} audit 登录审计写入状态（队列深度、批量写入耗时、溢出文件待回放条数）
+    @apiSuccess {Object} training 后台训练队列状态（各状态任务数、训练吞吐量）
+    @apiSuccess {Object} samples 样本库状态（样本数、用户数、数据大小）
     """
     return jsonify({
         'success': True,
         'status': 'running',
-        'system_lock': system_state_lock,
+        'system_lock': system_lock_state(),
+        'registration_sessions': len(registration_sessions),
+        'recognition_pool': recognition_pool.stats(),
         'total_users': len(id_dict),
         'face_cascade_loaded': face_cascade is not None,
-        'recognizer_loaded': recognizer is not None
+        'detection_profile': face_detector.profile if face_detector is not None else DETECTION_PROFILE,
+        'recognizer_loaded': recognizer is not None,
+        'loaded_models': len(model_registry),
+        'websocket_enabled': sock is not None,
+        'audit': audit_writer.stats(),
+        'training': training_queue.stats(),
+        'samples': sample_store.stats()
     })
 
 
+@app.route('/models', methods=['GET'])
+def get_models():
+    """
+    @api {get} /models 获取已加载模型信息
+    @apiDescription 获取模型注册表中每个LBPH模型的加载耗时和内存占用，可选刷新。
+    @apiParam {Boolean} [refresh] 为true时先重新扫描模型目录（只加载mtime变化的文件）
+    @apiSuccess {Boolean} success 是否成功
+    @apiSuccess {Object[]} models 模型列表
+    @apiSuccess {Number} models.user_id 用户ID
+    @apiSuccess {String} models.model_file 模型文件名
+    @apiSuccess {Number} models.samples 样本（直方图）数
+    @apiSuccess {Number} models.load_time_ms 加载耗时（毫秒）
+    @apiSuccess {Number} models.memory_bytes 内存占用（字节）
+    @apiSuccess {Number} total_memory_bytes 总内存占用（字节）
+    @apiSuccess {Object} index 身份索引统计（样本数、用户数、内存）
+    @apiError (500) {Boolean} success false
+    @apiError (500) {String} message 错误信息
+    """
+    try:
+        if request.args.get('refresh', '').lower() in ('1', 'true'):
+            model_registry.refresh()
+        models = model_registry.stats()
+        return jsonify({
+            'success': True,
+            'models': models,
+            'total_memory_bytes': sum(m['memory_bytes'] for m in models),
+            'index': model_registry.index.stats()
+        })
+    except Exception as e:
+        print(f"获取模型信息错误: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'获取模型信息失败: {str(e)}'
+        }), 500
+
+
 @app.route('/reset_lock', methods=['POST'])
 def reset_system_lock_endpoint():
     """
     @api {post} /reset_lock 手动重置系统锁
-    @apiDescription 手动重置系统锁（用于调试和紧急情况）。
+    @apiDescription 手动终止所有录入会话并释放其占用的用户ID（用于调试和紧急情况）。
     @apiSuccess {Boolean} success 是否成功
     @apiSuccess {String} message 提示信息
     @apiSuccess {Number} previous_lock 重置前锁状态
     @apiSuccess {Number} current_lock 当前锁状态
+    @apiSuccess {Number} cleared_sessions 被终止的录入会话数
     @apiError (500) {Boolean} success false
     @apiError (500) {String} message 错误信息
     """
     try:
-        global system_state_lock
-        old_lock = system_state_lock
-        system_state_lock = 0
-        print(f"系统锁已手动重置: {old_lock} -> 0")
+        old_lock = system_lock_state()
+        with registration_lock:
+            cleared = len(registration_sessions)
+            for session in registration_sessions.values():
+                session['status'] = 'error'
+                reserved_user_ids.discard(session['user_id'])
+            registration_sessions.clear()
+        current_lock = system_lock_state()
+        print(f"系统锁已手动重置: {old_lock} -> {current_lock}，终止 {cleared} 个录入会话")
         return jsonify({
             'success': True,
-            'message': f'系统锁已重置: {old_lock} -> 0',
+            'message': f'系统锁已重置: {old_lock} -> {current_lock}',
             'previous_lock': old_lock,
-            'current_lock': system_state_lock
+            'current_lock': current_lock,
+            'cleared_sessions': cleared
         })
     except Exception as e:
         print(f"重置系统锁失败: {e}")
@@ -1332,9 +1567,16 @@ if __name__ == '__main__':
         print(f"已加载 {len(id_dict)} 个用户")
         print("API端点:")
         print("  POST /train - 训练人脸模型")
+        print("  GET /train_jobs/<job_id> - 查询后台训练任务")
+        print("  POST /retrain/<id> - 用样本库重新训练")
         print("  POST /recognize - 人脸识别")
+        print("  POST /recognize_batch - 批量人脸识别")
         print("  GET /users - 获取用户列表")
         print("  DELETE /user/<id> - 删除用户")
         print("  GET /status - 获取系统状态")
+        print("  GET /models - 获取已加载模型信息")
+        print("  POST /collect_stream - 流式录入（HTTP分块传输）")
+        if sock is not None:
+            print("  WS /ws/registration - WebSocket流式录入")
         
         app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,282 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+from mysql.connector import pooling
+
+# 连接不上或连接中断：整批写入溢出文件并暂停重试；其余数据库错误（DataError、IntegrityError等）
+# 只与具体记录有关，改为逐条重试
+CONNECTION_ERRORS = (mysql.connector.InterfaceError, mysql.connector.OperationalError,
+                     mysql.connector.PoolError, OSError)
+
+
+def login_values(record):
+    """login_log 一行的插入参数"""
+    return (record['uid'], record['login_type'], record['login_status'],
+            datetime.fromisoformat(record['login_time']), record['login_address'])
+
+
+class AuditWriter:
+    """异步批量写入登录审计日志
+
+    请求线程只把记录放入有界内存队列后立即返回；后台写入线程从连接池取连接，
+    把队列中的记录攒成一批：一次 SELECT ... IN 校验用户是否存在，再用多行 INSERT
+    写入 login_log / face_store，每批只提交一次。需要关联 face_store 的登录记录逐条
+    INSERT，用各自的 lastrowid 作为 log_id。
+    数据库不可达（或队列已满）时，记录追加到本地 JSONL 溢出文件，数据库恢复后
+    由写入线程自动回放。整批写入因数据错误失败时逐条重试，仍然写不进去的记录
+    记录日志后丢弃，不会阻塞后面的记录。
+    """
+
+    def __init__(self, db_config, spill_path, pool_size=2, max_queue=1000, batch_size=100,
+                 flush_interval=1.0, retry_interval=30.0, connection_timeout=5):
+        self.db_config = dict(db_config, connection_timeout=connection_timeout)
+        self.spill_path = spill_path
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pool = None
+        self._lock = threading.Lock()  # 保护线程启动和统计数据
+        self._spill_lock = threading.Lock()  # 保护溢出文件
+        self._stop = threading.Event()
+        self._thread = None
+        self._db_retry_at = 0.0  # 数据库不可达时，在此时间之前直接写溢出文件
+        self._stats = {
+            'written': 0,
+            'skipped': 0,
+            'spilled': 0,
+            'dropped': 0,
+            'replayed': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'flush_time': 0.0,
+            'last_flush_ms': 0.0,
+            'last_error': None
+        }
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name='face-audit', daemon=True)
+                self._thread.start()
+
+    def log(self, uid, login_type, login_status, login_address, face_image_path=None):
+        """登记一次登录尝试，不等待数据库写入；返回是否进入了内存队列"""
+        record = {
+            'uid': uid,
+            'login_type': login_type,
+            'login_status': login_status,
+            'login_time': datetime.now().isoformat(),
+            'login_address': login_address,
+            'face_image_path': face_image_path
+        }
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            # 队列已满时不阻塞请求线程，直接写入溢出文件
+            self._spill([record])
+            return False
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._drain()
+            if batch:
+                self._flush(batch)
+            elif time.time() >= self._db_retry_at and os.path.exists(self.spill_path):
+                self.replay_spill()
+
+    def _drain(self):
+        """等待第一条记录（最多 flush_interval 秒），再非阻塞地取满一批"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _connect(self):
+        if self._pool is None:
+            self._pool = pooling.MySQLConnectionPool(pool_name='face_audit', pool_size=self.pool_size,
+                                                     **self.db_config)
+        return self._pool.get_connection()
+
+    def _flush(self, batch):
+        """写入一批记录，数据库不可达时未写入的记录写入溢出文件；返回是否写入了数据库"""
+        if time.time() < self._db_retry_at:
+            self._spill(batch)
+            return False
+        start = time.perf_counter()
+        pending = batch  # 连接出错时需要写入溢出文件的记录
+        written = skipped = dropped = 0
+        try:
+            conn = self._connect()
+            try:
+                try:
+                    written, skipped = self._write_batch(conn, batch)
+                except CONNECTION_ERRORS:
+                    raise
+                except mysql.connector.Error as err:
+                    # 整批已回滚，逐条重试找出有问题的记录
+                    print(f"审计日志批量写入失败，逐条重试 {len(batch)} 条记录: {err}")
+                    for i, record in enumerate(batch):
+                        pending = batch[i:]
+                        try:
+                            row_written, row_skipped = self._write_batch(conn, [record])
+                        except CONNECTION_ERRORS:
+                            raise
+                        except mysql.connector.Error as row_err:
+                            print(f"丢弃无法写入的审计记录 {json.dumps(record, ensure_ascii=False)}: {row_err}")
+                            dropped += 1
+                            with self._lock:
+                                self._stats['last_error'] = str(row_err)
+                            continue
+                        written += row_written
+                        skipped += row_skipped
+            finally:
+                conn.close()  # 归还连接池
+        except CONNECTION_ERRORS as err:
+            print(f"审计日志写入失败，{len(pending)} 条记录写入溢出文件: {err}")
+            self._db_retry_at = time.time() + self.retry_interval
+            self._spill(pending)
+            with self._lock:
+                self._stats['written'] += written
+                self._stats['skipped'] += skipped
+                self._stats['dropped'] += dropped
+                self._stats['flush_errors'] += 1
+                self._stats['last_error'] = str(err)
+            return False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats['written'] += written
+            self._stats['skipped'] += skipped
+            self._stats['dropped'] += dropped
+            self._stats['flushes'] += 1
+            self._stats['flush_time'] += elapsed
+            self._stats['last_flush_ms'] = round(elapsed * 1000, 2)
+        return True
+
+    @staticmethod
+    def _write_batch(conn, batch):
+        """在一个事务中写入一批记录，返回 (写入条数, 因用户不存在而跳过的条数)"""
+        cursor = conn.cursor()
+        try:
+            # 一次查询校验本批所有用户ID，不存在的用户跳过（与逐条写入时的行为一致）
+            uids = sorted({r['uid'] for r in batch if r['uid'] is not None})
+            existing = set()
+            if uids:
+                placeholders = ', '.join(['%s'] * len(uids))
+                cursor.execute(f"SELECT uid FROM user WHERE uid IN ({placeholders})", uids)
+                existing = {row[0] for row in cursor.fetchall()}
+            records = [r for r in batch if r['uid'] is None or r['uid'] in existing]
+            skipped = len(batch) - len(records)
+            if skipped:
+                print(f"警告: {skipped} 条审计记录的用户ID在数据库中不存在，已跳过")
+            if not records:
+                return 0, skipped
+
+            # 登录失败且有人脸图像的记录同时写入 face_store。多行INSERT的自增ID不保证连续
+            # （innodb_autoinc_lock_mode=2 下并发插入会交错），这些记录逐条插入取各自的 lastrowid
+            with_face = [r for r in records if r['face_image_path'] and r['login_status'] == 0]
+            without_face = [r for r in records if not (r['face_image_path'] and r['login_status'] == 0)]
+            if without_face:
+                cursor.execute(
+                    "INSERT INTO login_log (uid, login_type, login_status, login_time, login_address) VALUES "
+                    + ', '.join(['(%s, %s, %s, %s, %s)'] * len(without_face)),
+                    [value for r in without_face for value in login_values(r)]
+                )
+            faces = []
+            for r in with_face:
+                cursor.execute(
+                    "INSERT INTO login_log (uid, login_type, login_status, login_time, login_address) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    login_values(r)
+                )
+                faces.append((cursor.lastrowid, r['face_image_path'], datetime.fromisoformat(r['login_time'])))
+            if faces:
+                cursor.execute(
+                    "INSERT INTO face_store (log_id, get_face, create_time) VALUES "
+                    + ', '.join(['(%s, %s, %s)'] * len(faces)),
+                    [value for row in faces for value in row]
+                )
+            conn.commit()
+            return len(records), skipped
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _spill(self, records):
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        with self._lock:
+            self._stats['spilled'] += len(records)
+
+    def _spill_pending(self):
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            with open(self.spill_path, encoding='utf-8') as f:
+                return sum(1 for _ in f)
+
+    def replay_spill(self):
+        """把溢出文件中的记录按批重新写入数据库，返回回放成功的条数"""
+        replaying = self.spill_path + '.replaying'
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            # 先改名，回放期间新的溢出记录写入新文件
+            os.replace(self.spill_path, replaying)
+        with open(replaying, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        os.remove(replaying)
+
+        replayed = 0
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            if not self._flush(batch):
+                # 写入失败的这批已重新进入溢出文件，剩余记录也放回去
+                self._spill(records[start + self.batch_size:])
+                break
+            replayed += len(batch)
+        if replayed:
+            print(f"已回放 {replayed} 条溢出的审计记录")
+            with self._lock:
+                self._stats['replayed'] += replayed
+        return replayed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        flushes = stats.pop('flushes')
+        flush_time = stats.pop('flush_time')
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'flushes': flushes,
+            'avg_flush_ms': round(flush_time / flushes * 1000, 2) if flushes else 0,
+            'spill_pending': self._spill_pending(),
+            'db_available': time.time() >= self._db_retry_at
+        })
+        return stats
+
+    def close(self, timeout=5.0):
+        """停止后台线程，尽量写完队列中剩余的记录"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,299 @@
+"""人脸识别流水线基准测试
+
+把一个目录中的图像（或一个视频文件）逐帧送入与 face_api 相同的处理阶段：
+  解码 -> 人脸检测 -> 活体检测（眼睛/微笑/张嘴）-> 身份识别（检测与活体检测由 FaceDetector 完成）
+并报告：
+  1. 每个阶段的延迟分位数（p50/p90/p99）
+  2. 用 N 个工作线程并发处理时的帧率（OpenCV计算时释放GIL）
+  3. scaleFactor / minNeighbors / 检测前缩放 对检测耗时和检出人脸数的影响（--sweep）
+  4. 原检测方式与 FaceDetector 各检测配置的耗时、召回率和眨眼、微笑、张嘴判定一致率（--profiles）
+测试图像很少时可用 --augment N 为每帧生成 N 个随机缩放、旋转、调整亮度和翻转的变体。
+身份索引由随机生成的合成用户构成，另把测试图像中检测到的人脸各录入为一个用户，
+不需要数据库和已训练的模型即可离线运行。
+
+用法: python face_benchmark.py --source ../RDD_yolo11/ultralytics/assets --users 100 --workers 1 2 4 --sweep --profiles
+      python face_benchmark.py --profiles --augment 40 --workers 1
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from face_decode import decode_gray, downscale, scale_boxes
+from face_detector import PROFILES, FaceDetector
+from face_index import FaceIndex, HistogramExtractor
+from face_samples import normalize_face
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', 'RDD_yolo11', 'ultralytics', 'assets')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+STAGES = ('decode', 'detect', 'liveness', 'recognize')
+
+
+def load_frames(source, max_frames):
+    """读取测试帧，返回编码后的JPEG字节列表（图像文件原样读取，视频逐帧编码）"""
+    if os.path.isdir(source):
+        frames = []
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(source, name), 'rb') as f:
+                    frames.append(f.read())
+        return frames[:max_frames]
+
+    frames = []
+    capture = cv2.VideoCapture(source)
+    while len(frames) < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.imencode('.jpg', frame)[1].tobytes())
+    capture.release()
+    return frames
+
+
+def augment_frames(frames, count, rng):
+    """每帧额外生成 count 个变体：缩放 0.5~1.2 倍、旋转 ±10 度、调整对比度和亮度、随机水平翻转"""
+    augmented = list(frames)
+    for image_bytes in frames:
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        height, width = image.shape[:2]
+        for _ in range(count):
+            scale = rng.uniform(0.5, 1.2)
+            matrix = cv2.getRotationMatrix2D((width / 2, height / 2), rng.uniform(-10, 10), scale)
+            variant = cv2.warpAffine(image, matrix, (width, height), borderMode=cv2.BORDER_REFLECT)
+            variant = cv2.convertScaleAbs(variant, alpha=rng.uniform(0.7, 1.3), beta=rng.uniform(-30, 30))
+            if rng.random() < 0.5:
+                variant = variant[:, ::-1]
+            augmented.append(cv2.imencode('.jpg', variant)[1].tobytes())
+    return augmented
+
+
+CASCADE_PATHS = {
+    'face': cv2.data.haarcascades + 'haarcascade_frontalface_default.xml',
+    'eye': cv2.data.haarcascades + 'haarcascade_eye.xml',
+    'smile': cv2.data.haarcascades + 'haarcascade_smile.xml'
+}
+
+
+class Pipeline:
+    """与 face_api 一致的检测、活体检测和识别阶段（检测与活体检测由 FaceDetector 完成）"""
+
+    def __init__(self, index, profile='accurate', max_side=0):
+        self.index = index
+        self.max_side = max_side
+        self.detector = FaceDetector(CASCADE_PATHS, profile)
+        self.extractor = HistogramExtractor()
+
+    def detect(self, gray):
+        return self.detector.detect(gray, self.max_side)
+
+    def liveness(self, face_gray):
+        return self.detector.liveness(face_gray)
+
+    def recognize(self, gray, faces):
+        probes = [self.extractor.extract(normalize_face(gray[y:y + h, x:x + w])) for (x, y, w, h) in faces]
+        return self.index.search_batch(probes) if probes else []
+
+    def process(self, image_bytes):
+        """处理一帧，返回 (各阶段耗时秒数, 识别结果)"""
+        timings = {}
+        start = time.perf_counter()
+        gray = decode_gray(image_bytes)
+        timings['decode'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        faces = self.detect(gray)
+        timings['detect'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if len(faces):
+            x, y, w, h = faces[0]
+            self.liveness(gray[y:y + h, x:x + w])
+        timings['liveness'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = self.recognize(gray, faces)
+        timings['recognize'] = time.perf_counter() - start
+        return timings, matches
+
+
+class LegacyPipeline(Pipeline):
+    """FaceDetector 之前 face_api 的检测方式：原图两次检测，整张人脸上分别检测眼睛、微笑、张嘴"""
+
+    def detect(self, gray, scale_factor=1.1, min_neighbors=3, max_side=None, fallback=True):
+        face_cascade = self.detector.cascades()[0]
+        small, scale = downscale(gray, self.max_side if max_side is None else max_side)
+        faces = face_cascade.detectMultiScale(small, scale_factor, min_neighbors)
+        if len(faces) == 0 and fallback:
+            faces = face_cascade.detectMultiScale(small, 1.05, 2)
+        return scale_boxes(faces, scale, gray.shape)
+
+    def liveness(self, face_gray):
+        _, eye_cascade, smile_cascade = self.detector.cascades()
+        eyes = eye_cascade.detectMultiScale(face_gray, 1.1, 5)
+        smiles = smile_cascade.detectMultiScale(face_gray, 1.8, 20)
+        mouths = smile_cascade.detectMultiScale(face_gray, 1.5, 10)
+        return len(eyes), len(smiles) > 0, len(mouths) > 0
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = min(ax + aw, bx + bw) - max(ax, bx)
+    h = min(ay + ah, by + bh) - max(ay, by)
+    inter = max(0, w) * max(0, h)
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def build_index(num_users, samples, frames, rng):
+    """合成用户 + 测试图像中检测到的每张人脸各作为一个用户，返回 (索引, 真实人脸用户数)"""
+    index = FaceIndex()
+    for user_id in range(num_users):
+        faces = [rng.integers(0, 256, (100, 100), dtype=np.uint8) for _ in range(samples)]
+        model = cv2.face.LBPHFaceRecognizer_create()
+        model.train(faces, np.array([user_id] * samples))
+        index.add(user_id, model.getHistograms())
+
+    extractor = HistogramExtractor()
+    pipeline = LegacyPipeline(index)
+    user_id = num_users
+    for image_bytes in frames:
+        gray = decode_gray(image_bytes)
+        for (x, y, w, h) in pipeline.detect(gray):
+            index.add(user_id, [extractor.extract(normalize_face(gray[y:y + h, x:x + w]))])
+            user_id += 1
+    return index, user_id - num_users
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return np.percentile(values, 50), np.percentile(values, 90), np.percentile(values, 99), values.mean()
+
+
+def report_stages(pipeline, frames, repeat):
+    samples = {stage: [] for stage in STAGES}
+    totals = []
+    for _ in range(repeat):
+        for image_bytes in frames:
+            timings, _ = pipeline.process(image_bytes)
+            for stage in STAGES:
+                samples[stage].append(timings[stage])
+            totals.append(sum(timings.values()))
+
+    print(f"\n各阶段延迟（{len(totals)} 帧，单位 ms）")
+    print(f"{'阶段':<10} {'p50':>9} {'p90':>9} {'p99':>9} {'平均':>9}")
+    for stage in STAGES:
+        print(f"{stage:<10} " + ' '.join(f"{v:9.2f}" for v in percentiles(samples[stage])))
+    print(f"{'total':<10} " + ' '.join(f"{v:9.2f}" for v in percentiles(totals)))
+
+
+def report_throughput(pipeline, frames, repeat, worker_counts):
+    workload = frames * repeat
+    print(f"\n并发吞吐量（{len(workload)} 帧）")
+    single = None
+    for workers in worker_counts:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(pipeline.process, frames))  # 预热：每个线程创建分类器
+            start = time.perf_counter()
+            list(executor.map(pipeline.process, workload))
+            fps = len(workload) / (time.perf_counter() - start)
+        single = single or fps
+        print(f"{workers:>3} 线程: {fps:8.2f} 帧/秒 | 相对单线程 {fps / single:5.2f}x")
+
+
+def report_profiles(index, frames, max_side, repeat):
+    """以原检测方式为基准，比较各检测配置的检测/活体检测耗时、人脸召回率和眨眼、微笑、张嘴判定一致率"""
+    grays = [decode_gray(image_bytes) for image_bytes in frames]
+    legacy = LegacyPipeline(index, max_side=max_side)
+    reference = [legacy.detect(g) for g in grays]
+    total = sum(len(faces) for faces in reference)
+    print(f"\n检测配置对比（{len(grays)} 帧，基准为原检测方式检出的 {total} 张人脸）")
+    print(f"{'配置':<10} {'检测ms/帧':>10} {'活体ms/脸':>10} {'召回率':>8} {'多检':>6} {'眨眼判定一致':>12} "
+          f"{'微笑一致':>10} {'张嘴一致':>10}")
+    pipelines = [('legacy', legacy)] + [(name, Pipeline(index, name, max_side)) for name in PROFILES]
+    for name, pipeline in pipelines:
+        detect_time = live_time = 0.0
+        matched = extra = agree = smile_agree = mouth_agree = 0
+        for gray, expected in zip(grays, reference):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                faces = pipeline.detect(gray)
+            detect_time += (time.perf_counter() - start) / repeat
+            hits = sum(1 for e in expected if any(iou(e, f) >= 0.5 for f in faces))
+            matched += hits
+            extra += max(0, len(faces) - hits)
+            # 活体检测统一在基准人脸框上比较，排除检测差异的影响
+            for (x, y, w, h) in expected:
+                face_gray = gray[y:y + h, x:x + w]
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    eyes, smile, mouth = pipeline.liveness(face_gray)
+                live_time += (time.perf_counter() - start) / repeat
+                legacy_eyes, legacy_smile, legacy_mouth = legacy.liveness(face_gray)
+                agree += (eyes < 2) == (legacy_eyes < 2)
+                smile_agree += smile == legacy_smile
+                mouth_agree += mouth == legacy_mouth
+        # fast 配置不检测微笑/张嘴，不参与比较
+        checks_smile = name == 'legacy' or PROFILES[name]['check_smile']
+        smile_columns = (f"{smile_agree / max(total, 1):10.1%} {mouth_agree / max(total, 1):10.1%}" if checks_smile
+                         else f"{'-':>10} {'-':>10}")
+        print(f"{name:<10} {detect_time * 1000 / len(grays):10.2f} {live_time * 1000 / max(total, 1):10.2f} "
+              f"{matched / max(total, 1):8.1%} {extra:>6} {agree / max(total, 1):12.1%} {smile_columns}")
+
+
+def report_sweep(pipeline, frames, scale_factors, min_neighbors_list, max_sides):
+    grays = [decode_gray(image_bytes) for image_bytes in frames]
+    pipeline = LegacyPipeline(pipeline.index)
+    reference = sum(len(pipeline.detect(g, 1.1, 3, 0, fallback=False)) for g in grays)
+    print(f"\n检测参数扫描（{len(grays)} 帧，基准 1.1/3/原图 共检出 {reference} 张人脸）")
+    print(f"{'scaleFactor':>11} {'minNeighbors':>12} {'max_side':>9} {'ms/帧':>9} {'人脸数':>7}")
+    for max_side in max_sides:
+        for scale_factor in scale_factors:
+            for min_neighbors in min_neighbors_list:
+                start = time.perf_counter()
+                found = sum(len(pipeline.detect(g, scale_factor, min_neighbors, max_side, fallback=False))
+                            for g in grays)
+                ms = (time.perf_counter() - start) * 1000 / len(grays)
+                print(f"{scale_factor:>11} {min_neighbors:>12} {max_side or '原图':>9} {ms:9.2f} {found:>7}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='人脸识别流水线基准测试')
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='图像目录或视频文件')
+    parser.add_argument('--max-frames', type=int, default=200, help='最多读取的帧数')
+    parser.add_argument('--augment', type=int, default=0, help='每帧额外生成的随机变体数')
+    parser.add_argument('--users', type=int, default=100, help='合成用户数')
+    parser.add_argument('--samples', type=int, default=5, help='每个合成用户的样本数')
+    parser.add_argument('--repeat', type=int, default=5, help='每帧重复处理次数')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='并发线程数')
+    parser.add_argument('--max-side', type=int, default=0, help='检测前缩放的最长边（0表示不缩放）')
+    parser.add_argument('--profile', default='accurate', choices=sorted(PROFILES), help='检测配置')
+    parser.add_argument('--profiles', action='store_true', help='对比原检测方式与各检测配置')
+    parser.add_argument('--sweep', action='store_true', help='扫描检测参数')
+    parser.add_argument('--scale-factors', type=float, nargs='+', default=[1.05, 1.1, 1.2, 1.3])
+    parser.add_argument('--min-neighbors', type=int, nargs='+', default=[2, 3, 5])
+    parser.add_argument('--max-sides', type=int, nargs='+', default=[0, 640, 480, 320])
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.max_frames)
+    if not frames:
+        raise SystemExit(f"没有可用的测试帧: {args.source}")
+    if args.augment:
+        frames = augment_frames(frames, args.augment, np.random.default_rng(1))
+
+    index, real_users = build_index(args.users, args.samples, frames, np.random.default_rng(0))
+    stats = index.stats()
+    print(f"测试帧: {len(frames)}（{args.source}），CPU核数: {os.cpu_count()}")
+    print(f"身份索引: {stats['users']} 个用户（其中 {real_users} 个来自测试图像）, {stats['samples']} 个样本")
+
+    pipeline = Pipeline(index, args.profile, args.max_side)
+    print(f"检测配置: {args.profile}")
+    report_stages(pipeline, frames, args.repeat)
+    report_throughput(pipeline, frames, args.repeat, args.workers)
+    if args.profiles:
+        report_profiles(index, frames, args.max_side, args.repeat)
+    if args.sweep:
+        report_sweep(pipeline, frames, args.scale_factors, args.min_neighbors, args.max_sides)
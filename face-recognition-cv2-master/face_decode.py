@@ -0,0 +1,92 @@
+import base64
+import binascii
+
+import cv2
+import numpy as np
+
+# 太短/太小的数据不可能是有效图像，与 base64_to_image 原有的校验保持一致
+MIN_BASE64_LENGTH = 100
+MIN_IMAGE_BYTES = 1000
+
+
+def base64_to_bytes(base64_string):
+    """把（可带 data:image/...;base64, 前缀的）base64字符串解码为图像字节，无效时返回None"""
+    if not base64_string:
+        return None
+    if ',' in base64_string:
+        base64_string = base64_string.split(',', 1)[1]
+    if len(base64_string) < MIN_BASE64_LENGTH:
+        print(f"Base64转图像错误: base64字符串太短 ({len(base64_string)} 字符)")
+        return None
+    try:
+        image_bytes = base64.b64decode(base64_string)
+    except (binascii.Error, ValueError) as e:
+        print(f"Base64解码错误: {e}")
+        return None
+    if len(image_bytes) < MIN_IMAGE_BYTES:
+        print(f"Base64转图像错误: 解码后数据太小 ({len(image_bytes)} 字节)")
+        return None
+    return image_bytes
+
+
+def decode_gray(image_bytes):
+    """把JPEG/PNG等编码字节直接解码为灰度图
+
+    np.frombuffer 不拷贝请求体，cv2.imdecode 以 IMREAD_GRAYSCALE 解码时
+    JPEG解码器只输出亮度通道，省去 PIL 打开、转ndarray、RGB->BGR->GRAY 的多次整帧拷贝。
+    """
+    if not image_bytes:
+        return None
+    return cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def downscale(gray, max_side):
+    """最长边超过 max_side 时等比缩小，返回 (图像, 缩放比例)；max_side<=0 表示不缩放"""
+    height, width = gray.shape[:2]
+    if not max_side or max(height, width) <= max_side:
+        return gray, 1.0
+    scale = max_side / max(height, width)
+    small = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                       interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def scale_boxes(boxes, scale, shape):
+    """把缩小图上的 (x, y, w, h) 人脸框映射回原图坐标，并裁剪到图像范围内"""
+    if scale == 1.0 or len(boxes) == 0:
+        return boxes
+    boxes = np.round(np.asarray(boxes, dtype=np.float64) / scale).astype(np.int32)
+    height, width = shape[:2]
+    boxes[:, 0] = np.clip(boxes[:, 0], 0, width - 1)
+    boxes[:, 1] = np.clip(boxes[:, 1], 0, height - 1)
+    boxes[:, 2] = np.minimum(boxes[:, 2], width - boxes[:, 0])
+    boxes[:, 3] = np.minimum(boxes[:, 3], height - boxes[:, 1])
+    return boxes
+
+
+def iter_length_prefixed(stream, max_frame_bytes=16 * 1024 * 1024):
+    """从流中依次读出 "4字节大端长度 + 数据" 格式的帧，流结束时停止"""
+    while True:
+        header = _read_exact(stream, 4)
+        if header is None:
+            return
+        length = int.from_bytes(header, 'big')
+        if length > max_frame_bytes:
+            raise ValueError(f"帧长度超出限制: {length} 字节")
+        frame = _read_exact(stream, length)
+        if frame is None:
+            return
+        yield frame
+
+
+def _read_exact(stream, size):
+    """读取恰好 size 字节，流提前结束时返回None"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
@@ -0,0 +1,137 @@
+import threading
+
+import cv2
+import numpy as np
+
+# 缩小后希望最小人脸达到的边长（像素），略大于 frontalface 分类器 24x24 的检测窗口
+TARGET_FACE_SIZE = 30
+# 眼睛只在人脸框上部这一比例的区域内检测
+EYE_REGION = 0.55
+
+# 跟踪窗口内的检测参数单独配置（roi_passes，依次尝试直到检测到人脸）：窗口很小，两个配置都用
+# 原来的 1.1/3 加宽松重试 1.05/2，保证整帧找到的人脸在下一帧窗口内仍能找回。
+# smile_neighbors：微笑与张嘴共用一次 1.5/10 的微笑分类器检测，邻居数超过该值的区域判定为微笑。
+# 原来单独用 1.8/20 检测微笑；两种金字塔的邻居数不能一一对应，该值取增广人脸样本上不把原来
+# 判定为非微笑的人脸误判为微笑的最小值（见 face_benchmark.py --profiles --augment）
+PROFILES = {
+    # 与原来 face_api 的检测参数一致：1.1/3 检测不到时再用 1.05/2 检测一次，整张人脸上检测微笑/张嘴
+    'accurate': {
+        'scale_factor': 1.1,
+        'min_neighbors': 3,
+        'fallback': (1.05, 2),
+        'min_face_ratio': 0.03,
+        'roi_passes': ((1.1, 3), (1.05, 2)),
+        'check_smile': True,
+        'smile_neighbors': 33
+    },
+    # 更粗的金字塔、更大的最小人脸、不做宽松重试，跳过录入流程不使用的微笑检测
+    'fast': {
+        'scale_factor': 1.2,
+        'min_neighbors': 4,
+        'fallback': None,
+        'min_face_ratio': 0.1,
+        'roi_passes': ((1.1, 3), (1.05, 2)),
+        'check_smile': False,
+        'smile_neighbors': 33
+    }
+}
+
+
+class FaceDetector:
+    """人脸检测与活体检测引擎
+
+    检测前先按"最小人脸尺寸"缩小整帧：假定待检测的人脸不小于画面短边的
+    min_face_ratio，把它缩放到 TARGET_FACE_SIZE 像素左右再做级联检测，人脸框映射回
+    原图坐标；宽松参数的重试复用同一张缩小图。
+    活体检测时眼睛只在人脸上半部分检测，微笑和张嘴由整张人脸上的一次微笑分类器检测判定。
+    OpenCV分类器不是线程安全的，每个线程持有自己的一组实例。
+    """
+
+    def __init__(self, cascade_paths, profile='accurate', **overrides):
+        if profile not in PROFILES:
+            raise ValueError(f"未知的检测配置: {profile}，可选 {', '.join(PROFILES)}")
+        self.profile = profile
+        self.params = dict(PROFILES[profile], **overrides)
+        self.cascade_paths = dict(cascade_paths)
+        self._local = threading.local()
+
+    def cascades(self):
+        """当前线程私有的 (人脸, 眼睛, 微笑) 分类器"""
+        cascades = getattr(self._local, 'cascades', None)
+        if cascades is None:
+            cascades = tuple(
+                cv2.CascadeClassifier(self.cascade_paths[name]) for name in ('face', 'eye', 'smile')
+            )
+            self._local.cascades = cascades
+        return cascades
+
+    def _scale(self, shape, max_side, min_face):
+        height, width = shape[:2]
+        if min_face is None:
+            min_face = self.params['min_face_ratio'] * min(height, width)
+        scale = min(1.0, TARGET_FACE_SIZE / min_face) if min_face > 0 else 1.0
+        if max_side and max(height, width) * scale > max_side:
+            scale = max_side / max(height, width)
+        return scale
+
+    def detect(self, gray, max_side=0, fallback=True, min_face=None, scale_factor=None, min_neighbors=None):
+        """检测人脸，返回原图坐标下的 (x, y, w, h) 人脸框数组
+
+        max_side>0 时缩小后的最长边不超过该值；min_face 为预期最小人脸边长（像素），
+        默认由 min_face_ratio 推算；fallback=False 时不做宽松参数重试。
+        """
+        passes = [(scale_factor or self.params['scale_factor'], min_neighbors or self.params['min_neighbors'])]
+        if fallback and self.params['fallback']:
+            passes.append(self.params['fallback'])
+        return self._detect(gray, max_side, min_face, passes)
+
+    def detect_roi(self, window, min_face, max_side=0):
+        """在跟踪窗口内检测人脸，按配置的 roi_passes 依次检测，返回窗口坐标下的人脸框数组"""
+        return self._detect(window, max_side, min_face, self.params['roi_passes'])
+
+    def _detect(self, gray, max_side, min_face, passes):
+        height, width = gray.shape[:2]
+        scale = self._scale(gray.shape, max_side, min_face)
+        if scale < 1.0:
+            small = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small, scale = gray, 1.0
+
+        face_cascade = self.cascades()[0]
+        faces = ()
+        for scale_factor, min_neighbors in passes:
+            faces = face_cascade.detectMultiScale(small, scale_factor, min_neighbors)
+            if len(faces):
+                break
+        if len(faces) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+
+        faces = np.asarray(faces, dtype=np.float64)
+        if scale != 1.0:
+            faces = faces / scale
+        faces = np.round(faces).astype(np.int32)
+        faces[:, 0] = np.clip(faces[:, 0], 0, width - 1)
+        faces[:, 1] = np.clip(faces[:, 1], 0, height - 1)
+        faces[:, 2] = np.minimum(faces[:, 2], width - faces[:, 0])
+        faces[:, 3] = np.minimum(faces[:, 3], height - faces[:, 1])
+        return faces
+
+    def liveness(self, face_gray):
+        """返回 (眼睛数, 是否微笑, 是否张嘴)
+
+        眼睛只在人脸上部 EYE_REGION 内检测（原来在整张人脸上检测）。check_smile 的配置在整张
+        人脸上用微笑分类器做一次 1.5/10 检测：有检测结果即张嘴（与原来相同），邻居数超过
+        smile_neighbors 即微笑（原来另做一次 1.8/20 检测）；fast 配置跳过这次检测。
+        眨眼、微笑和张嘴判定与原来的一致率见 face_benchmark.py --profiles。
+        """
+        _, eye_cascade, smile_cascade = self.cascades()
+        height = face_gray.shape[0]
+        eyes = eye_cascade.detectMultiScale(face_gray[:max(1, int(height * EYE_REGION))], 1.1, 5)
+
+        has_smile = has_mouth_open = False
+        if self.params['check_smile']:
+            mouths, neighbors = smile_cascade.detectMultiScale2(face_gray, 1.5, 10)
+            has_mouth_open = len(mouths) > 0
+            has_smile = has_mouth_open and int(np.max(neighbors)) > self.params['smile_neighbors']
+        return len(eyes), has_smile, has_mouth_open
@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+
+from face_samples import normalize_face
+
+
+class EnrollmentBuffer:
+    """录入会话的内存样本缓冲区，边采集边增量训练
+
+    人脸样本归一化为固定尺寸后保存在容量有限的内存列表中，不再逐张写入 data 目录；每积累
+    batch_size 张样本就调用一次 LBPHFaceRecognizer.update 追加直方图，
+    因此会话结束时只需处理最后不足一批的样本即可得到完整模型。
+    """
+
+    def __init__(self, user_id, capacity, batch_size=30):
+        self.user_id = user_id
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.samples = []
+        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
+        self._pending = []
+        self.trained = 0
+
+    def add(self, face_gray):
+        """加入一张人脸样本，缓冲区已满时返回False"""
+        if len(self.samples) >= self.capacity:
+            return False
+        # 缩放为固定尺寸（新数组），同时避免持有整帧图像的引用
+        sample = normalize_face(face_gray).copy()
+        self.samples.append(sample)
+        self._pending.append(sample)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        """把尚未训练的样本增量更新到识别器"""
+        if not self._pending:
+            return
+        self.recognizer.update(self._pending, np.full(len(self._pending), self.user_id, dtype=np.int32))
+        self.trained += len(self._pending)
+        self._pending = []
+
+    def finalize(self):
+        """完成训练并返回识别器"""
+        self.flush()
+        return self.recognizer
+
+    def clear(self):
+        self.samples = []
+        self._pending = []
+
+    def __len__(self):
+        return len(self.samples)
@@ -0,0 +1,174 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+class HistogramExtractor:
+    """提取与LBPHFaceRecognizer完全一致的LBPH空间直方图
+
+    OpenCV没有单独暴露直方图计算接口，这里用一个只训练单张样本的LBPH识别器
+    得到探测图像的直方图，参数与 LBPHFaceRecognizer_create() 的默认值保持一致。
+    OpenCV对象不是线程安全的，每个线程持有自己的识别器实例。
+    """
+
+    def __init__(self, radius=1, neighbors=8, grid_x=8, grid_y=8):
+        self.params = (radius, neighbors, grid_x, grid_y)
+        self._local = threading.local()
+
+    def _recognizer(self):
+        recog = getattr(self._local, 'recognizer', None)
+        if recog is None:
+            recog = cv2.face.LBPHFaceRecognizer_create(*self.params)
+            self._local.recognizer = recog
+        return recog
+
+    def extract(self, face_gray):
+        """返回一维float32直方图"""
+        recog = self._recognizer()
+        recog.train([face_gray], np.array([0]))
+        return recog.getHistograms()[0].reshape(-1)
+
+
+class FaceIndex:
+    """多身份LBPH直方图索引
+
+    所有已录入样本的直方图保存在同一个float32矩阵中，标签数组记录每个样本对应的
+    用户ID。一次查询对整个矩阵做向量化的卡方距离计算，结果与逐个模型调用
+    LBPHFaceRecognizer.predict 得到的最小距离一致。
+    新用户录入只追加样本，删除用户只压缩矩阵，不需要重新训练其他用户。
+
+    矩阵按"特征维度 x 样本"存放：LBPH直方图很稀疏，查询时只需取出探测直方图
+    非零的那些维度（连续的行），其余维度的距离项恒等于 2*h，可由预先计算的
+    每个样本直方图总和直接得到。
+    """
+
+    def __init__(self, chunk_size=1024):
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._matrix = None  # (dim, capacity)，有效列为 [:, :self._size]
+        self._totals = np.empty(0, dtype=np.float64)  # 每个样本直方图的总和
+        self._labels = np.empty(0, dtype=np.int64)
+        self._size = 0
+
+    def _reserve(self, count, dim):
+        """保证矩阵至少能容纳 count 个样本，容量按倍数增长以摊薄追加开销"""
+        if self._matrix is not None and self._matrix.shape[0] != dim:
+            raise ValueError(f"直方图维度不一致: {dim} != {self._matrix.shape[0]}")
+        capacity = 0 if self._matrix is None else self._matrix.shape[1]
+        if count <= capacity:
+            return
+        self._reallocate(max(count, capacity * 2, 64), dim, slice(0, self._size))
+
+    def _reallocate(self, capacity, dim, keep):
+        """分配新数组并拷贝保留的样本；不原地修改，保证已取得快照的查询不受影响"""
+        matrix = np.empty((dim, capacity), dtype=np.float32)
+        totals = np.empty(capacity, dtype=np.float64)
+        labels = np.empty(capacity, dtype=np.int64)
+        kept = 0
+        if self._size:
+            kept_totals = self._totals[:self._size][keep]
+            kept = len(kept_totals)
+            matrix[:, :kept] = self._matrix[:, :self._size][:, keep]
+            totals[:kept] = kept_totals
+            labels[:kept] = self._labels[:self._size][keep]
+        self._matrix, self._totals, self._labels, self._size = matrix, totals, labels, kept
+
+    def _remove_locked(self, user_id):
+        if not self._size:
+            return 0
+        keep = self._labels[:self._size] != user_id
+        removed = self._size - int(keep.sum())
+        if removed:
+            self._reallocate(self._matrix.shape[1], self._matrix.shape[0], keep)
+        return removed
+
+    def _add_locked(self, user_id, rows):
+        self._reserve(self._size + len(rows), rows.shape[1])
+        end = self._size + len(rows)
+        self._matrix[:, self._size:end] = rows.T
+        self._totals[self._size:end] = rows.sum(axis=1, dtype=np.float64)
+        self._labels[self._size:end] = user_id
+        self._size = end
+
+    @staticmethod
+    def _stack(histograms):
+        return np.vstack([np.asarray(h, dtype=np.float32).reshape(1, -1) for h in histograms])
+
+    def add(self, user_id, histograms):
+        """追加一个用户的若干样本直方图"""
+        rows = self._stack(histograms)
+        with self._lock:
+            self._add_locked(user_id, rows)
+
+    def replace(self, user_id, histograms):
+        """替换一个用户的全部样本（重新训练后使用）"""
+        rows = self._stack(histograms)
+        with self._lock:
+            self._remove_locked(user_id)
+            self._add_locked(user_id, rows)
+
+    def remove(self, user_id):
+        """删除一个用户的全部样本，返回删除的样本数"""
+        with self._lock:
+            return self._remove_locked(user_id)
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._size:
+                return None, None, None
+            return self._matrix[:, :self._size], self._totals[:self._size], self._labels[:self._size]
+
+    def _distances(self, matrix, totals, probe):
+        """计算probe到每个样本的卡方距离（与OpenCV HISTCMP_CHISQR_ALT一致）
+
+        d = sum 2*(h-p)^2/(h+p)；p=0 的维度上该项等于 2*h，合并后为
+        2*(total - sum_{p>0} h)，因此只需对 p>0 的维度做逐元素运算。
+        """
+        cols = np.flatnonzero(probe)
+        values = probe[cols][:, None]
+        distances = np.empty(matrix.shape[1], dtype=np.float64)
+        for start in range(0, matrix.shape[1], self.chunk_size):
+            end = min(start + self.chunk_size, matrix.shape[1])
+            block = matrix[cols, start:end]
+            rest = totals[start:end] - block.sum(axis=0, dtype=np.float64)
+            diff = block - values
+            np.square(diff, out=diff)
+            block += values  # values>0，分母恒为正
+            diff /= block
+            distances[start:end] = 2.0 * (rest + diff.sum(axis=0, dtype=np.float64))
+        return distances
+
+    def search(self, probe):
+        """返回 (最佳匹配用户ID, 距离)，索引为空时返回 (-1, inf)"""
+        return self.search_batch([probe])[0]
+
+    def search_batch(self, probes):
+        """对多个探测直方图分别返回 (最佳匹配用户ID, 距离)"""
+        matrix, totals, labels = self._snapshot()
+        if matrix is None:
+            return [(-1, float('inf')) for _ in probes]
+        results = []
+        for probe in probes:
+            distances = self._distances(matrix, totals, np.asarray(probe, dtype=np.float32).reshape(-1))
+            best = int(np.argmin(distances))
+            results.append((int(labels[best]), float(distances[best])))
+        return results
+
+    def user_ids(self):
+        _, _, labels = self._snapshot()
+        return [] if labels is None else sorted(set(labels.tolist()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'samples': self._size,
+                'users': len(set(self._labels[:self._size].tolist())),
+                'memory_bytes': 0 if self._matrix is None else int(
+                    self._matrix.nbytes + self._totals.nbytes + self._labels.nbytes
+                )
+            }
+
+    def __len__(self):
+        with self._lock:
+            return self._size
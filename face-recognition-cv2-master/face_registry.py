@@ -0,0 +1,167 @@
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+from face_index import FaceIndex
+
+
+class ModelRegistry:
+    """常驻内存的LBPH模型注册表
+
+    启动时一次性加载 traindata 目录下所有 <id>_train.yml 模型，之后只对
+    修改时间(mtime)发生变化的文件重新加载，被删除的文件从注册表中移除。
+    模型中的样本直方图被写入统一的 FaceIndex，识别时只需一次向量化查询；
+    注册表自身只保留每个模型的元数据。
+    新训练的模型通过 publish 以版本文件的形式保存在 versions 子目录，再原子替换
+    线上的 <id>_train.yml，读取方不会读到写了一半的模型文件。
+    所有读写都在同一把锁下完成，可在多线程的Flask服务中安全使用。
+    """
+
+    def __init__(self, trainer_dir, index=None, keep_versions=3):
+        self.trainer_dir = trainer_dir
+        self.versions_dir = os.path.join(trainer_dir, 'versions')
+        self.keep_versions = keep_versions  # 每个用户保留的历史版本数
+        self.index = index if index is not None else FaceIndex()
+        self._lock = threading.RLock()
+        self._entries = {}  # user_id -> {'path', 'mtime', 'load_time', 'memory', 'samples', 'version'}
+
+    @staticmethod
+    def _parse_user_id(file_name):
+        """从 <id>_train.yml 文件名中解析用户ID，不是模型文件时返回None"""
+        if not file_name.endswith("_train.yml"):
+            return None
+        try:
+            return int(file_name.split('_')[0])
+        except ValueError:
+            return None
+
+    def _install_locked(self, user_id, path, mtime, model, load_time, version=None):
+        histograms = model.getHistograms()
+        self.index.replace(user_id, histograms)
+        self._entries[user_id] = {
+            'path': path,
+            'mtime': mtime,
+            'load_time': load_time,
+            'memory': sum(h.nbytes for h in histograms),
+            'samples': len(histograms),
+            'version': version
+        }
+
+    def _load(self, user_id, path, mtime):
+        start = time.perf_counter()
+        model = cv2.face.LBPHFaceRecognizer_create()
+        model.read(path)
+        load_time = time.perf_counter() - start
+        self._install_locked(user_id, path, mtime, model, load_time)
+        print(f"模型 {os.path.basename(path)} 已加载，耗时 {load_time * 1000:.1f} ms")
+
+    def install(self, user_id, path, model, version=None):
+        """直接登记刚训练并保存好的模型，避免再从YAML文件读取一遍"""
+        with self._lock:
+            self._install_locked(user_id, path, os.path.getmtime(path), model, 0.0, version)
+
+    def model_path(self, user_id):
+        return os.path.join(self.trainer_dir, f'{user_id}_train.yml')
+
+    def _version_files(self, user_id):
+        """返回该用户的历史版本文件名，按版本号从旧到新排序"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        prefix = f'{user_id}_train.'
+        return sorted(name for name in os.listdir(self.versions_dir)
+                      if name.startswith(prefix) and name.endswith('.yml'))
+
+    def publish(self, user_id, model):
+        """保存新训练的模型并原子替换线上版本，返回 (线上模型路径, 版本号)
+
+        模型先完整写入 versions/<id>_train.<版本号>.yml，再硬链接（不支持时复制）
+        为临时文件并用 os.replace 替换 <id>_train.yml，最后登记到注册表和身份索引。
+        """
+        version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version_path = os.path.join(self.versions_dir, f'{user_id}_train.{version}.yml')
+        model.save(version_path)
+
+        live_path = self.model_path(user_id)
+        tmp_path = f'{live_path}.{version}.tmp'
+        try:
+            os.link(version_path, tmp_path)
+        except OSError:
+            shutil.copyfile(version_path, tmp_path)
+        os.replace(tmp_path, live_path)
+        self.install(user_id, live_path, model, version)
+
+        for name in self._version_files(user_id)[:-self.keep_versions]:
+            os.remove(os.path.join(self.versions_dir, name))
+        return live_path, version
+
+    def delete(self, user_id):
+        """删除用户的线上模型文件和全部历史版本，并从注册表中移除"""
+        live_path = self.model_path(user_id)
+        if os.path.exists(live_path):
+            os.remove(live_path)
+        for name in self._version_files(user_id):
+            os.remove(os.path.join(self.versions_dir, name))
+        return self.remove(user_id)
+
+    def refresh(self):
+        """扫描模型目录，只重新加载新增或mtime变化的模型文件
+
+        返回 (已加载的用户ID列表, 已移除的用户ID列表)
+        """
+        loaded, removed = [], []
+        with self._lock:
+            found = {}
+            if os.path.isdir(self.trainer_dir):
+                for file_name in os.listdir(self.trainer_dir):
+                    user_id = self._parse_user_id(file_name)
+                    if user_id is not None:
+                        found[user_id] = os.path.join(self.trainer_dir, file_name)
+
+            for user_id in list(self._entries):
+                if user_id not in found:
+                    self.remove(user_id)
+                    removed.append(user_id)
+
+            for user_id, path in found.items():
+                try:
+                    mtime = os.path.getmtime(path)
+                    entry = self._entries.get(user_id)
+                    if entry is not None and entry['mtime'] == mtime:
+                        continue
+                    self._load(user_id, path, mtime)
+                    loaded.append(user_id)
+                except Exception as e:
+                    print(f"加载模型 {path} 失败: {e}")
+                    continue
+        return loaded, removed
+
+    def remove(self, user_id):
+        """从注册表和身份索引中移除指定用户"""
+        with self._lock:
+            self.index.remove(user_id)
+            return self._entries.pop(user_id, None) is not None
+
+    def user_ids(self):
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        """返回每个模型的加载耗时和内存占用"""
+        with self._lock:
+            return [{
+                'user_id': user_id,
+                'model_file': os.path.basename(entry['path']),
+                'samples': entry['samples'],
+                'load_time_ms': round(entry['load_time'] * 1000, 2),
+                'memory_bytes': entry['memory'],
+                'version': entry['version']
+            } for user_id, entry in sorted(self._entries.items())]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,204 @@
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# 样本统一缩放到的人脸尺寸 (宽, 高)。缩放后同一人脸在不同拍摄距离下的LBPH距离仍低于
+# 识别阈值50；更小的尺寸（如100x100）会把同尺度人脸的距离也推到接近阈值
+SAMPLE_SIZE = (128, 128)
+
+
+def normalize_face(face_gray, size=SAMPLE_SIZE):
+    """把人脸裁剪缩放为固定尺寸的uint8灰度图，训练样本和识别探测图使用同一尺寸"""
+    face_gray = np.asarray(face_gray, dtype=np.uint8)
+    if face_gray.shape[1::-1] == tuple(size):
+        return np.ascontiguousarray(face_gray)
+    interpolation = cv2.INTER_AREA if face_gray.shape[1] > size[0] else cv2.INTER_LINEAR
+    return cv2.resize(face_gray, tuple(size), interpolation=interpolation)
+
+
+class SampleStore:
+    """紧凑的人脸样本库，取代 data 目录下逐张保存的 User.<id>.<n>.jpg
+
+    所有样本按 SAMPLE_SIZE 归一化后顺序写入同一个uint8数据文件
+    samples.<代>.u8，可直接 np.memmap 为 (N, 高, 宽) 数组；标签（用户ID）和
+    数据文件的代号保存在索引文件 samples.npz 中。
+    追加样本时先写数据文件再原子替换索引；删除用户时把保留的样本写入新一代
+    数据文件，再原子替换索引并删除旧文件。索引只记录完整写入的样本，
+    进程中途退出不会读到写了一半的数据。
+    """
+
+    def __init__(self, root, size=SAMPLE_SIZE):
+        self.root = root
+        self.size = tuple(size)
+        self.index_path = os.path.join(root, 'samples.npz')
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._labels = np.empty(0, dtype=np.int64)
+        self._mmap = None
+        self._load_index()
+
+    @property
+    def sample_bytes(self):
+        return self.size[0] * self.size[1]
+
+    def _data_path(self, generation):
+        return os.path.join(self.root, f'samples.{generation}.u8')
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with np.load(self.index_path) as index:
+            size = tuple(int(v) for v in index['size'])
+            if size != self.size:
+                raise ValueError(f"样本库尺寸 {size} 与配置的 {self.size} 不一致")
+            self._generation = int(index['generation'])
+            self._labels = index['labels'].astype(np.int64)
+
+    def _write_index(self, generation, labels):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, generation=np.int64(generation), size=np.array(self.size, dtype=np.int64),
+                     labels=labels)
+        os.replace(tmp_path, self.index_path)
+        self._generation = generation
+        self._labels = labels
+        self._mmap = None
+
+    def _samples(self):
+        """以只读memmap形式返回全部样本 (N, 高, 宽)"""
+        count = len(self._labels)
+        if count == 0:
+            return np.empty((0, self.size[1], self.size[0]), dtype=np.uint8)
+        if self._mmap is None or len(self._mmap) != count:
+            self._mmap = np.memmap(self._data_path(self._generation), dtype=np.uint8, mode='r',
+                                   shape=(count, self.size[1], self.size[0]))
+        return self._mmap
+
+    def append(self, user_id, faces):
+        """追加一个用户的人脸样本（任意尺寸，写入前归一化），返回写入的样本数"""
+        faces = [normalize_face(face, self.size) for face in faces]
+        if not faces:
+            return 0
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            data_path = self._data_path(self._generation)
+            with open(data_path, 'ab') as f:
+                # 丢弃上次追加中途退出时残留的、索引中没有记录的尾部数据
+                f.truncate(len(self._labels) * self.sample_bytes)
+                f.write(np.stack(faces).tobytes())
+            labels = np.concatenate([self._labels, np.full(len(faces), user_id, dtype=np.int64)])
+            self._write_index(self._generation, labels)
+        return len(faces)
+
+    def delete(self, user_id):
+        """删除一个用户的全部样本，返回删除的样本数"""
+        with self._lock:
+            keep = self._labels != user_id
+            removed = int(len(keep) - keep.sum())
+            if removed == 0:
+                return 0
+            old_path = self._data_path(self._generation)
+            generation = self._generation + 1
+            new_path = self._data_path(generation)
+            samples = self._samples()
+            with open(new_path, 'wb') as f:
+                for start in range(0, len(samples), 1024):
+                    f.write(np.ascontiguousarray(samples[start:start + 1024][keep[start:start + 1024]]).tobytes())
+            self._mmap = None
+            del samples
+            self._write_index(generation, self._labels[keep])
+            try:
+                os.remove(old_path)
+            except OSError as e:
+                # Windows下仍被映射的旧文件无法删除，留待下次压缩时覆盖
+                print(f"删除旧样本文件 {old_path} 失败: {e}")
+        return removed
+
+    def replace(self, user_id, faces):
+        """用新的样本替换一个用户的全部样本"""
+        with self._lock:
+            self.delete(user_id)
+            return self.append(user_id, faces)
+
+    def load(self, user_id=None):
+        """返回 (样本数组, 标签数组)
+
+        不指定用户时返回整个样本库的memmap；指定用户时，其样本在文件中连续存放
+        （一次录入一次追加）则直接返回memmap切片，否则返回拷贝。
+        """
+        with self._lock:
+            samples, labels = self._samples(), self._labels
+            if user_id is None:
+                return samples, labels
+            rows = np.flatnonzero(labels == user_id)
+            if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+                return samples[rows[0]:rows[-1] + 1], labels[rows[0]:rows[-1] + 1]
+            return samples[rows], labels[rows]
+
+    def user_ids(self):
+        with self._lock:
+            return [int(v) for v in np.unique(self._labels)]
+
+    def import_directory(self, path):
+        """导入旧版 User.<id>.<n>.jpg 样本目录，返回 {用户ID: 样本数}"""
+        grouped = {}
+        for file_name in sorted(os.listdir(path)):
+            parts = file_name.split('.')
+            if len(parts) < 3 or not parts[1].isdigit():
+                continue
+            face = cv2.imread(os.path.join(path, file_name), cv2.IMREAD_GRAYSCALE)
+            if face is None:
+                print(f"读取样本 {file_name} 失败，已跳过")
+                continue
+            grouped.setdefault(int(parts[1]), []).append(face)
+        return {user_id: self.replace(user_id, faces) for user_id, faces in grouped.items()}
+
+    def stats(self):
+        with self._lock:
+            user_ids, counts = np.unique(self._labels, return_counts=True)
+            return {
+                'samples': len(self._labels),
+                'users': len(user_ids),
+                'sample_size': list(self.size),
+                'data_bytes': len(self._labels) * self.sample_bytes,
+                'generation': self._generation,
+                'per_user': {int(u): int(c) for u, c in zip(user_ids, counts)}
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='人脸样本库：导入旧版JPG样本目录并比较读取耗时')
+    parser.add_argument('source', help='旧版 User.<id>.<n>.jpg 样本目录')
+    parser.add_argument('--store', default='face-recognition-cv2-master/samples', help='样本库目录')
+    args = parser.parse_args()
+
+    store = SampleStore(args.store)
+    start = time.perf_counter()
+    imported = store.import_directory(args.source)
+    print(f"导入 {sum(imported.values())} 张样本（{len(imported)} 个用户），"
+          f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    files = [f for f in os.listdir(args.source) if f.endswith('.jpg')]
+    for file_name in files:
+        cv2.imread(os.path.join(args.source, file_name), cv2.IMREAD_GRAYSCALE)
+    print(f"逐张读取 {len(files)} 个JPG: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    reopened = SampleStore(args.store)
+    samples, labels = reopened.load()
+    total = int(np.asarray(samples).sum(dtype=np.int64))
+    print(f"读取样本库 {len(labels)} 张: {(time.perf_counter() - start) * 1000:.1f} ms (checksum {total})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class FaceTracker:
+    """录入会话中跨帧跟踪人脸位置
+
+    连续帧之间人脸移动很小：上一帧找到人脸后，下一帧只在上一帧人脸框向四周
+    扩展 expand 倍后的窗口内检测（按上一帧人脸大小缩放窗口）；
+    窗口内检测不到时视为跟丢，才回退到整帧检测（按检测配置可能包含宽松重试），
+    并从整帧中最大的人脸开始跟踪。窗口内的检测参数由检测配置的 roi_passes 单独指定。
+    检测由 FaceDetector 完成。
+    """
+
+    def __init__(self, expand=0.5):
+        self.expand = expand
+        self.box = None  # 上一帧跟踪到的人脸框
+        self.roi_hits = 0
+        self.full_searches = 0
+        self.lost = 0
+
+    def _window(self, shape):
+        x, y, w, h = self.box
+        margin_x, margin_y = int(w * self.expand), int(h * self.expand)
+        height, width = shape[:2]
+        return (max(0, x - margin_x), max(0, y - margin_y),
+                min(width, x + w + margin_x), min(height, y + h + margin_y))
+
+    def _nearest_first(self, faces):
+        """把离上一帧人脸中心最近的框排在最前面"""
+        x, y, w, h = self.box
+        centers = faces[:, :2] + faces[:, 2:] / 2.0
+        order = np.argsort(np.hypot(centers[:, 0] - (x + w / 2.0), centers[:, 1] - (y + h / 2.0)))
+        return faces[order]
+
+    def locate(self, gray, detector, max_side=0):
+        """检测当前帧的人脸，返回 (人脸框数组, 'roi' 或 'full')，第一个框是被跟踪的人脸"""
+        if self.box is not None:
+            x0, y0, x1, y1 = self._window(gray.shape)
+            # 窗口内的人脸应与上一帧大小相近，按其60%作为最小人脸缩小窗口图像
+            faces = detector.detect_roi(gray[y0:y1, x0:x1], 0.6 * min(self.box[2], self.box[3]), max_side)
+            if len(faces):
+                faces = np.array(faces, dtype=np.int32).reshape(-1, 4)
+                faces[:, 0] += x0
+                faces[:, 1] += y0
+                faces = self._nearest_first(faces)
+                self.box = tuple(int(v) for v in faces[0])
+                self.roi_hits += 1
+                return faces, 'roi'
+            self.lost += 1
+            self.box = None
+
+        self.full_searches += 1
+        faces = detector.detect(gray, max_side)
+        if len(faces):
+            # 录入时用户的人脸离摄像头最近，从最大的人脸开始跟踪（小框多为背景误检，窗口内难以找回）
+            faces = faces[np.argsort(-faces[:, 2].astype(np.int64) * faces[:, 3], kind='stable')]
+            self.box = tuple(int(v) for v in faces[0])
+        return faces, 'full'
+
+    def reset(self):
+        self.box = None
+
+    def stats(self):
+        return {
+            'roi_hits': self.roi_hits,
+            'full_searches': self.full_searches,
+            'lost': self.lost
+        }
+
+
+def box_iou(a, b):
+    """两个 (x, y, w, h) 框的交并比"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = min(ax + aw, bx + bw) - max(ax, bx)
+    h = min(ay + ah, by + bh) - max(ay, by)
+    inter = max(0, w) * max(0, h)
+    union = aw * ah + bw * bh - inter
+    return inter / float(union) if union > 0 else 0.0
+
+
+def link_faces(frames, iou_threshold=0.3, max_gap=1):
+    """把连续帧中属于同一个人的人脸合并为轨迹，用于批量识别结果去重
+
+    frames 是按时间顺序排列的每帧人脸列表，每张人脸是包含 'box' 和 'user_id'
+    （未识别为 -1）的字典。已识别的人脸按用户ID合并，未识别的人脸按位置重叠(IoU)合并；
+    相隔超过 max_gap 帧没有出现的轨迹不再延续。
+    返回轨迹列表，每条轨迹为 {'user_id', 'faces': [(帧序号, 人脸), ...]}。
+    """
+    tracks = []
+    for frame_index, faces in enumerate(frames):
+        active = [t for t in tracks if frame_index - t['faces'][-1][0] <= max_gap]
+        extended = set()
+        for face in faces:
+            best, best_score = None, 0.0
+            for track in active:
+                if id(track) in extended or track['user_id'] != face['user_id']:
+                    continue
+                score = box_iou(track['faces'][-1][1]['box'], face['box'])
+                if face['user_id'] != -1:
+                    score += 1.0  # 同一已识别用户无论位置都属于同一轨迹，重叠更多者优先
+                if score > best_score:
+                    best, best_score = track, score
+            if best is None or (face['user_id'] == -1 and best_score < iou_threshold):
+                best = {'user_id': face['user_id'], 'faces': []}
+                tracks.append(best)
+            best['faces'].append((frame_index, face))
+            extended.add(id(best))
+    return tracks
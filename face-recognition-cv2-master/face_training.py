@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TrainingQueue:
+    """后台人脸模型训练任务队列
+
+    训练任务提交后立即返回任务ID，在独立的训练线程中执行（OpenCV训练和保存模型时
+    释放GIL，不阻塞识别线程）。每个任务记录排队、训练耗时和样本吞吐量，
+    只保留最近 max_jobs 个已结束的任务供查询。
+    """
+
+    def __init__(self, workers=1, max_jobs=200):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='face-train')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> 任务状态
+        self._futures = {}
+        self._trained_samples = 0
+        self._train_time = 0.0
+
+    def submit(self, fn, *args, user_id=None, samples=0, **kwargs):
+        """提交训练任务，返回任务ID；fn 的返回值（字典）会合并到任务结果中"""
+        job_id = f"train_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'user_id': user_id,
+                'status': 'queued',
+                'samples': samples,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'queue_wait_ms': None,
+                'train_time_ms': None,
+                'samples_per_second': None,
+                'result': None,
+                'error': None
+            }
+            self._prune_locked()
+            self._futures[job_id] = self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _prune_locked(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            self._jobs.pop(job_id)
+            self._futures.pop(job_id, None)
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            job['queue_wait_ms'] = round((job['started_at'] - job['submitted_at']) * 1000, 2)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+            error = None
+        except Exception as e:
+            print(f"训练任务 {job_id} 失败: {e}")
+            result, error = None, str(e)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            job['finished_at'] = time.time()
+            job['train_time_ms'] = round(elapsed * 1000, 2)
+            if error is None:
+                job['status'] = 'completed'
+                job['result'] = result
+                if job['samples'] and elapsed > 0:
+                    job['samples_per_second'] = round(job['samples'] / elapsed, 1)
+                self._trained_samples += job['samples']
+                self._train_time += elapsed
+            else:
+                job['status'] = 'failed'
+                job['error'] = error
+
+    def get(self, job_id):
+        """返回任务状态的副本，任务不存在时返回None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id, timeout=None):
+        """等待任务结束并返回任务状态"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return self.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return dict(counts, **{
+                'workers': self.workers,
+                'trained_samples': self._trained_samples,
+                'samples_per_second': round(self._trained_samples / self._train_time, 1) if self._train_time else 0
+            })
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
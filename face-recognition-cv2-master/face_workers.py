@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ServiceBusy(Exception):
+    """等待队列已满，调用方应返回503并提示稍后重试"""
+
+    def __init__(self, pending, capacity):
+        super().__init__(f"识别队列已满: {pending}/{capacity}")
+        self.pending = pending
+        self.capacity = capacity
+
+
+class RecognitionPool:
+    """带准入控制的识别工作线程池
+
+    识别任务在固定数量的工作线程中并发执行（OpenCV在计算时释放GIL），
+    排队中的任务数超过 max_pending 时直接拒绝，而不是让请求无限堆积。
+    OpenCV对象不是线程安全的，任务函数应使用线程私有的分类器/识别器实例。
+    """
+
+    def __init__(self, workers=4, max_pending=16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='face-recognize')
+        self._lock = threading.Lock()
+        self._in_flight = 0  # 执行中 + 排队中的任务数
+        self._completed = 0
+        self._rejected = 0
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self._rejected += 1
+                raise ServiceBusy(self._in_flight - self.workers, self.max_pending)
+            self._in_flight += 1
+            # 前面还有多少个任务在排队（0表示可以立即执行）
+            return max(0, self._in_flight - self.workers)
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """提交任务，返回 (future, 排队位置)；队列已满时抛出 ServiceBusy"""
+        position = self._admit()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future, position
+
+    def run(self, fn, *args, **kwargs):
+        """提交任务并等待结果"""
+        future, _ = self.submit(fn, *args, **kwargs)
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'running': min(self._in_flight, self.workers),
+                'queued': max(0, self._in_flight - self.workers),
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 人脸服务的模块以顶层模块方式互相导入（与 python face_api.py 启动时一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
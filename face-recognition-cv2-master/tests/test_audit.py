@@ -0,0 +1,118 @@
+"""AuditWriter 批量写入测试：face_store.log_id 关联、数据错误逐条重试、连接错误写入溢出文件（用模拟游标代替MySQL）"""
+import json
+from datetime import datetime
+
+import mysql.connector
+
+from face_audit import AuditWriter
+
+
+class FakeCursor:
+    """自增ID不连续（模拟 innodb_autoinc_lock_mode=2 下与其他连接交错插入）"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        if self.conn.error is not None:
+            raise self.conn.error
+        if sql.startswith('SELECT uid FROM user'):
+            self._rows = [(uid,) for uid in params]
+        elif sql.startswith('INSERT INTO login_log'):
+            rows = len(params) // 5
+            if any(params[i * 5 + 4] is None for i in range(rows)):
+                raise mysql.connector.IntegrityError("Column 'login_address' cannot be null")
+            self.lastrowid = self.conn.next_id
+            for i in range(rows):
+                self.conn.pending_log.append((self.conn.next_id, tuple(params[i * 5:i * 5 + 5])))
+                self.conn.next_id += 7  # 其他连接插入的ID夹在中间
+        elif sql.startswith('INSERT INTO face_store'):
+            self.conn.pending_face.extend(tuple(params[i:i + 3]) for i in range(0, len(params), 3))
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.next_id = 100
+        self.login_log = []
+        self.face_store = []
+        self.pending_log = []
+        self.pending_face = []
+        self.committed = False
+        self.error = None  # 设置后所有语句都抛出该异常（模拟连接中断）
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.login_log += self.pending_log
+        self.face_store += self.pending_face
+        self.pending_log, self.pending_face = [], []
+        self.committed = True
+
+    def rollback(self):
+        self.pending_log, self.pending_face = [], []
+
+    def close(self):
+        pass
+
+
+def record(uid, status, face=None, address='127.0.0.1'):
+    return {'uid': uid, 'login_type': 'face', 'login_status': status, 'login_time': datetime.now().isoformat(),
+            'login_address': address, 'face_image_path': face}
+
+
+def make_writer(tmp_path, conn):
+    writer = AuditWriter({}, str(tmp_path / 'spill.jsonl'))
+    writer._connect = lambda: conn
+    return writer
+
+
+def spilled(writer):
+    with open(writer.spill_path, encoding='utf-8') as f:
+        return [json.loads(line)['uid'] for line in f]
+
+
+def test_face_store_rows_reference_their_login_log_id():
+    conn = FakeConnection()
+    batch = [record(1, 1), record(2, 0, 'a.jpg'), record(3, 1, 'ignored.jpg'), record(4, 0, 'b.jpg'), record(5, 0)]
+    assert AuditWriter._write_batch(conn, batch) == (5, 0)
+    assert conn.committed
+    ids_by_uid = {values[0]: log_id for log_id, values in conn.login_log}
+    assert len(ids_by_uid) == 5
+    assert [(log_id, face) for log_id, face, _ in conn.face_store] == [(ids_by_uid[2], 'a.jpg'),
+                                                                       (ids_by_uid[4], 'b.jpg')]
+
+
+def test_bad_record_is_dropped_without_blocking_the_batch(tmp_path):
+    conn = FakeConnection()
+    writer = make_writer(tmp_path, conn)
+    batch = [record(1, 1), record(2, 0, 'a.jpg'), record(3, 1, address=None), record(4, 0, 'b.jpg')]
+    assert writer._flush(batch)
+    assert [values[0] for _, values in conn.login_log] == [1, 2, 4]
+    assert [face for _, face, _ in conn.face_store] == ['a.jpg', 'b.jpg']
+    stats = writer.stats()
+    assert (stats['written'], stats['dropped'], stats['spilled']) == (3, 1, 0)
+    assert stats['db_available']
+
+
+def test_connection_error_spills_the_batch_and_backs_off(tmp_path):
+    conn = FakeConnection()
+    conn.error = mysql.connector.OperationalError('Lost connection to MySQL server during query')
+    writer = make_writer(tmp_path, conn)
+    assert not writer._flush([record(1, 1), record(2, 1)])
+    assert spilled(writer) == [1, 2]
+    assert not writer.stats()['db_available']
+
+    # 数据库恢复后回放溢出的记录
+    conn.error = None
+    writer._db_retry_at = 0
+    assert writer.replay_spill() == 2
+    assert [values[0] for _, values in conn.login_log] == [1, 2]
@@ -0,0 +1,53 @@
+"""FaceDetector 活体检测与原检测方式的一致性测试"""
+import os
+
+import cv2
+import pytest
+
+from face_detector import FaceDetector
+from test_face_tracker import CASCADE_PATHS
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'RDD_yolo11', 'ultralytics', 'assets')
+
+
+def asset_faces():
+    detector = FaceDetector(CASCADE_PATHS)
+    faces = []
+    for name in ('zidane.jpg', 'bus.jpg'):
+        gray = cv2.imread(os.path.join(ASSETS, name), cv2.IMREAD_GRAYSCALE)
+        if gray is not None:
+            faces += [gray[y:y + h, x:x + w] for (x, y, w, h) in detector.detect(gray)]
+    return faces
+
+
+def test_accurate_mouth_matches_original_pass_and_smile_agrees():
+    faces = asset_faces()
+    if not faces:
+        pytest.skip('缺少测试图片')
+    detector = FaceDetector(CASCADE_PATHS, 'accurate')
+    smile_cascade = cv2.CascadeClassifier(CASCADE_PATHS['smile'])
+    for face_gray in faces:
+        _, has_smile, has_mouth_open = detector.liveness(face_gray)
+        # 张嘴与原来的 1.5/10 检测完全相同；微笑由同一次检测的邻居数判定，在测试图片上与原来 1.8/20 一致
+        assert has_mouth_open == (len(smile_cascade.detectMultiScale(face_gray, 1.5, 10)) > 0)
+        assert has_smile == (len(smile_cascade.detectMultiScale(face_gray, 1.8, 20)) > 0)
+
+
+def test_smile_needs_more_neighbors_than_mouth():
+    faces = asset_faces()
+    if not faces:
+        pytest.skip('缺少测试图片')
+    strict = FaceDetector(CASCADE_PATHS, 'accurate')
+    loose = FaceDetector(CASCADE_PATHS, 'accurate', smile_neighbors=10)
+    for face_gray in faces:
+        _, _, has_mouth_open = strict.liveness(face_gray)
+        assert loose.liveness(face_gray)[1] == has_mouth_open  # 阈值等于 minNeighbors 时每个检测结果都算微笑
+        assert strict.liveness(face_gray)[1] <= has_mouth_open
+
+
+def test_fast_skips_smile_check():
+    faces = asset_faces()
+    if not faces:
+        pytest.skip('缺少测试图片')
+    detector = FaceDetector(CASCADE_PATHS, 'fast')
+    assert all(detector.liveness(face_gray)[1:] == (False, False) for face_gray in faces)
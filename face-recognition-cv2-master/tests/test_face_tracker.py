@@ -0,0 +1,53 @@
+"""FaceTracker 窗口跟踪命中率回归测试
+
+用仓库自带的 zidane.jpg 中右侧人脸合成摄像头画面（640x480，人脸占画面高度的 20%~40%），
+同一画面重复输入时除第一帧整帧检测外都应在窗口内命中，不应出现跟丢。
+"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from face_detector import PROFILES, FaceDetector
+from face_tracker import FaceTracker
+
+ASSET = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'RDD_yolo11', 'ultralytics', 'assets',
+                     'zidane.jpg')
+CASCADE_PATHS = {
+    'face': cv2.data.haarcascades + 'haarcascade_frontalface_default.xml',
+    'eye': cv2.data.haarcascades + 'haarcascade_eye.xml',
+    'smile': cv2.data.haarcascades + 'haarcascade_smile.xml'
+}
+FACE_CENTER, FACE_SIZE = (993, 185), 152  # 1280x720 原图中右侧人脸
+
+
+def webcam_frame(face_fraction, offset):
+    """以人脸为中心（水平偏移 offset 倍画面宽度）裁剪缩放出 640x480 的画面"""
+    image = cv2.imread(ASSET, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        pytest.skip('缺少测试图片 zidane.jpg')
+    crop_h = FACE_SIZE / face_fraction
+    crop_w = crop_h * 4 / 3
+    x0 = FACE_CENTER[0] - crop_w / 2 + offset * crop_w
+    y0 = FACE_CENTER[1] - crop_h / 2
+    matrix = np.float32([[640 / crop_w, 0, -x0 * 640 / crop_w], [0, 480 / crop_h, -y0 * 480 / crop_h]])
+    return cv2.warpAffine(image, matrix, (640, 480), borderMode=cv2.BORDER_REFLECT)
+
+
+@pytest.mark.parametrize('profile', sorted(PROFILES))
+@pytest.mark.parametrize('face_fraction, offset', [(0.15, 0.2), (0.2, 0.2), (0.25, 0.1), (0.4, 0.0)])
+def test_identical_frames_stay_in_roi(profile, face_fraction, offset):
+    frame = webcam_frame(face_fraction, offset)
+    detector = FaceDetector(CASCADE_PATHS, profile)
+    tracker = FaceTracker()
+    frames = 300
+    boxes = []
+    for _ in range(frames):
+        faces, _ = tracker.locate(frame, detector)
+        boxes.append(faces[0])
+    stats = tracker.stats()
+    assert stats['lost'] == 0, stats
+    assert stats['roi_hits'] >= 0.95 * frames, stats
+    # 跟踪的是真实人脸（面积最大的框），而不是背景误检
+    assert min(box[3] for box in boxes) >= 0.7 * face_fraction * 480
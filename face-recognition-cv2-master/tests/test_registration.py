@@ -0,0 +1,112 @@
+"""录入会话通过50%眨眼检查点的流程测试（/collect_image 和 /collect_stream）"""
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+import face_api
+
+BOX = np.array([[20, 20, 60, 60]], dtype=np.int32)
+
+
+class ScriptedDetector:
+    """每帧返回同一个人脸框，眼睛数由测试指定"""
+
+    def __init__(self):
+        self.eyes = 2
+
+    def detect(self, gray, max_side=0, fallback=True, min_face=None, **kwargs):
+        return BOX.copy()
+
+    def detect_roi(self, window, min_face, max_side=0):
+        return BOX - [10, 10, 0, 0]
+
+    def liveness(self, face_gray):
+        return self.eyes, False, False
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    detector = ScriptedDetector()
+    monkeypatch.setattr(face_api, 'face_detector', detector)
+    monkeypatch.setattr(face_api, 'check_face_exists', lambda face_gray: (False, '新人脸'))
+    return detector
+
+
+@pytest.fixture
+def client():
+    return face_api.app.test_client()
+
+
+@pytest.fixture
+def frame():
+    image = np.random.default_rng(0).integers(0, 256, (120, 120), dtype=np.uint8)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+def start_session(client):
+    response = client.post('/start_registration', json={'username': 'tester'})
+    assert response.status_code == 200
+    session_id = response.get_json()['session_id']
+    return session_id, face_api.registration_sessions[session_id]
+
+
+def collect(client, session_id, frame):
+    response = client.post(f'/collect_image?session_id={session_id}', data=frame, content_type='image/jpeg')
+    return response.status_code, response.get_json()
+
+
+def test_collect_image_passes_blink_checkpoint(client, detector, frame):
+    session_id, session = start_session(client)
+    try:
+        for _ in range(150):
+            status_code, body = collect(client, session_id, frame)
+            assert status_code == 200, body
+        assert session['collected_images'] == 150
+
+        # 到达检查点后睁眼的帧提示眨眼，不录入样本
+        status_code, body = collect(client, session_id, frame)
+        assert status_code == 200 and body['verification_mode']
+        assert session['collected_images'] == 150
+
+        # 连续6帧眨眼：前5帧返回计数，第6帧完成验证
+        detector.eyes = 1
+        for counter in range(1, 6):
+            status_code, body = collect(client, session_id, frame)
+            assert status_code == 200, body
+            assert body['verification_mode'] and body['verification_counter'] == counter
+        status_code, body = collect(client, session_id, frame)
+        assert status_code == 200 and body['verification_complete']
+        assert session['blink_verified']
+
+        detector.eyes = 2
+        status_code, body = collect(client, session_id, frame)
+        assert status_code == 200 and body['collected_images'] == 151
+    finally:
+        face_api.registration_sessions.pop(session_id, None)
+
+
+def test_collect_stream_continues_through_blink_checkpoint(client, detector, frame, monkeypatch):
+    session_id, session = start_session(client)
+    # 每帧开始处理时按帧序号设置眼睛数：第151~156帧眨眼
+    decode_gray = face_api.decode_gray
+    frames = iter(range(1, 1000))
+
+    def scripted_decode(image_bytes):
+        index = next(frames)
+        detector.eyes = 1 if 151 <= index <= 156 else 2
+        return decode_gray(image_bytes)
+
+    monkeypatch.setattr(face_api, 'decode_gray', scripted_decode)
+    payload = b''.join(len(frame).to_bytes(4, 'big') + frame for _ in range(170))
+    try:
+        response = client.post(f'/collect_stream?session_id={session_id}', data=payload,
+                               content_type='application/octet-stream')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+        assert len(lines) == 170
+        assert all(line['status_code'] == 200 for line in lines)
+        assert any(line.get('verification_complete') for line in lines)
+        assert session['collected_images'] == 164
+    finally:
+        face_api.registration_sessions.pop(session_id, None)